@@ -1,5 +1,6 @@
 # api/__init__.py
 """API関連モジュール"""
-from api.router import router, set_graph_repository
+from api.container import Container
+from api.router import router
 
-__all__ = ["router", "set_graph_repository"]
+__all__ = ["Container", "router"]
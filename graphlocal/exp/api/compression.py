@@ -0,0 +1,244 @@
+# api/compression.py
+# ---------------------------------------------------------
+# ストリーミングレスポンス（SSE・NDJSON）の圧縮と Accept-Encoding のネゴシエーション
+# ---------------------------------------------------------
+import asyncio
+import time
+import zlib
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Sequence, Union
+
+from config import CompressionConfig
+from utils.metrics import MetricsRegistry, get_metrics
+
+try:
+    import brotli  # オプション依存（uv pip install -e ".[brotli]"）
+except ImportError:
+    brotli = None
+
+# ポンプタスクとレスポンスの間で溜める要素数の上限
+_PUMP_QUEUE_SIZE = 64
+
+
+class GzipEncoder:
+    """gzip エンコーダー（呼び出しごとに Z_SYNC_FLUSH し、受信側がその場で展開できるようにする）"""
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def encode(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    """brotli エンコーダー（呼び出しごとにフラッシュする）"""
+    name = "br"
+
+    def __init__(self, quality: int = 4):
+        if brotli is None:
+            raise RuntimeError("brotli is not installed")
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def encode(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+Encoder = Union[GzipEncoder, BrotliEncoder]
+
+
+def supported_encodings() -> List[str]:
+    """このプロセスで使えるエンコーディング（brotli は未インストールの場合は除く）"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding ヘッダーをエンコーディング名と q 値の対応に変換（不正な q 値は 0 扱い）"""
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate_encoding(header: Optional[str], preferred: Sequence[str]) -> Optional[str]:
+    """
+    Accept-Encoding とサーバー側の優先順から使うエンコーディングを決める
+
+    q 値が最大のものを選び、同じ q 値ならサーバー側の優先順に従う。
+    "*" は明示されていないエンコーディングに適用する。
+
+    Returns:
+        エンコーディング名（圧縮しない場合はNone）
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in preferred:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    if best is not None and accepted.get("identity", 0.0) > best_q:
+        return None
+    return best
+
+
+async def _coalesce(
+    chunks: AsyncIterable[bytes],
+    min_size: int,
+    max_delay: Optional[float],
+) -> AsyncIterator[bytes]:
+    """
+    min_size バイト溜まるか、最初に溜めたチャンクから max_delay 秒経つまでチャンクをまとめる
+
+    ソースは専用のタスク1つで最後まで読む（チャットサービスは実行中のタスクを
+    ドレインの中断対象として登録するので、チャンクごとに別タスクで読んではいけない）。
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_PUMP_QUEUE_SIZE)
+    done = object()
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+        except asyncio.CancelledError:
+            # 読み手がいなくなった場合はキューが空かないので終端を置かない
+            raise
+        except BaseException:
+            await queue.put(done)
+            raise
+        await queue.put(done)
+
+    task = asyncio.create_task(pump())
+    buffer: List[bytes] = []
+    size = 0
+    held_since = 0.0
+    try:
+        while True:
+            timeout = None
+            if buffer and max_delay is not None:
+                timeout = max(0.0, held_since + max_delay - time.monotonic())
+            try:
+                chunk = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                # 次のチャンクが max_delay 以内に来なければ、溜まった分を送る
+                yield b"".join(buffer)
+                buffer, size = [], 0
+                continue
+            if chunk is done:
+                break
+            if not buffer:
+                held_since = time.monotonic()
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= min_size:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+        # ソースの例外はレスポンス側に伝える
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+class StreamCompression:
+    """
+    ストリーミングレスポンスの圧縮
+
+    イベントごとにフラッシュすると、数十バイトのトークンイベントでも圧縮ブロックの
+    終端（gzip で 5〜6 バイト）と CPU コストがかかり、かえって大きくなる。
+    そのため min_size バイトに満たないイベントは max_delay 秒まで溜めてからまとめて
+    圧縮・フラッシュする（遅延は max_delay で頭打ち）。
+    """
+
+    def __init__(self, config: CompressionConfig, metrics: Optional[MetricsRegistry] = None):
+        """
+        初期化
+
+        Args:
+            config: 圧縮設定
+            metrics: 圧縮前後のバイト数の記録先（Noneの場合はデフォルトレジストリ）
+        """
+        self.config = config
+        self.metrics = metrics or get_metrics()
+        available = supported_encodings()
+        self.encodings = [name for name in config.encoding_list if name in available]
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Accept-Encoding から使うエンコーディングを決める（圧縮しない場合はNone）"""
+        if not self.config.enabled:
+            return None
+        return negotiate_encoding(accept_encoding, self.encodings)
+
+    def create_encoder(self, encoding: str) -> Encoder:
+        """エンコーダーを作成"""
+        if encoding == "br":
+            return BrotliEncoder(self.config.brotli_quality)
+        if encoding == "gzip":
+            return GzipEncoder(self.config.gzip_level)
+        raise ValueError(f"Unsupported encoding '{encoding}'")
+
+    async def encode_stream(
+        self,
+        chunks: AsyncIterable[Union[str, bytes]],
+        encoding: Optional[str],
+        batch: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """
+        チャンクのストリームを圧縮する
+
+        Args:
+            chunks: 送信するチャンク（SSEのイベント・NDJSONの行など）
+            encoding: negotiate() の結果（Noneの場合はそのまま返す）
+            batch: Trueの場合は遅延を気にせず batch_size バイトずつまとめる（エクスポート用）
+        """
+        raw = _as_bytes(chunks)
+        if encoding is None:
+            async for chunk in raw:
+                yield chunk
+            return
+        encoder = self.create_encoder(encoding)
+        if batch:
+            groups = _coalesce(raw, self.config.batch_size, None)
+        else:
+            groups = _coalesce(raw, self.config.min_size, self.config.max_delay)
+        try:
+            async for data in groups:
+                encoded = encoder.encode(data)
+                self._record(encoding, len(data), len(encoded))
+                yield encoded
+            tail = encoder.finish()
+            self._record(encoding, 0, len(tail))
+            yield tail
+        finally:
+            await groups.aclose()
+
+    def _record(self, encoding: str, bytes_in: int, bytes_out: int) -> None:
+        """圧縮前後のバイト数を記録"""
+        self.metrics.inc(f"compression.{encoding}.bytes_in", bytes_in)
+        self.metrics.inc(f"compression.{encoding}.bytes_out", bytes_out)
+
+
+async def _as_bytes(chunks: AsyncIterable[Union[str, bytes]]) -> AsyncIterator[bytes]:
+    """文字列のチャンクをUTF-8のバイト列に変換"""
+    async for chunk in chunks:
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
@@ -0,0 +1,143 @@
+# api/container.py
+# ---------------------------------------------------------
+# 依存性コンテナ（リポジトリ・サービス・コントローラーを lifespan で1回だけ作成して共有）
+# ---------------------------------------------------------
+from typing import Any, Dict, Optional
+
+from api.compression import StreamCompression
+from api.controllers.admin_controller import AdminController
+from api.controllers.chat_controller import ChatController
+from api.controllers.health_controller import HealthController
+from api.controllers.job_controller import JobController
+from api.controllers.thread_controller import ThreadController
+from api.lifecycle import GracefulShutdown
+from api.repositories.blob_repository import BlobRepository
+from api.repositories.graph_repository import GraphRepository
+from api.repositories.job_repository import JobRepository
+from api.services.admin_service import AdminService
+from api.services.chat_service import ChatService
+from api.services.health_service import HealthService
+from api.services.job_service import JobService
+from api.services.lane_scheduler import Lane, LaneScheduler
+from api.services.profiler_service import ProfilerService
+from api.services.rate_limiter import RateLimiter
+from api.services.stream_tracker import StreamTracker
+from api.services.thread_service import ThreadService
+from config import AppSettings
+from utils.loop_lag import LoopLagMonitor, SlowCallbackDetector
+from utils.memory import get_allocation_tracker
+
+
+class Container:
+    """
+    アプリケーションで共有するオブジェクト
+
+    create_app の lifespan で作成して app.state.container に保持し、ルーターの依存性関数は
+    ここから取り出すだけにする（リクエストごとにコントローラー・サービスを作らない）。
+    テストなどで差し替える場合は、キーワード引数で作成済みのオブジェクトを渡す。
+    """
+
+    def __init__(
+        self,
+        graph_repository: GraphRepository,
+        settings: AppSettings,
+        scheduler: Optional[LaneScheduler] = None,
+        tracker: Optional[StreamTracker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        job_repository: Optional[JobRepository] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            graph_repository: グラフリポジトリ
+            settings: アプリケーション設定
+            scheduler: レーンスケジューラー（Noneの場合は設定値から作成）
+            tracker: 実行中ストリームの追跡（Noneの場合は新しく作成）
+            rate_limiter: レート制限（共有バックエンドを使う場合など、Noneの場合は設定値から作成）
+            job_repository: ジョブの保存先（Noneの場合は設定値から作成）
+        """
+        self.settings = settings
+        self.graph_repository = graph_repository
+        self.lane_scheduler = scheduler if scheduler is not None else LaneScheduler(
+            max_concurrency=settings.scheduler.max_concurrency,
+            weights={
+                Lane.INTERACTIVE: settings.scheduler.interactive_weight,
+                Lane.BULK: settings.scheduler.bulk_weight,
+            },
+        )
+        self.stream_tracker = tracker if tracker is not None else StreamTracker()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(settings.rate_limit)
+        self.compression = StreamCompression(settings.compression)
+        self.blob_repository = BlobRepository(settings.limits.blob_directory)
+
+        # サービス
+        self.chat_service = ChatService(
+            graph_repository,
+            scheduler=self.lane_scheduler,
+            tracker=self.stream_tracker,
+            stateless_without_thread=settings.graph.stateless_without_thread,
+            blob_repository=self.blob_repository,
+            inline_input_chars=settings.limits.inline_input_chars,
+        )
+        self.thread_service = ThreadService(graph_repository, blob_repository=self.blob_repository)
+        self.job_service = JobService(
+            self.chat_service,
+            job_repository if job_repository is not None else JobRepository(settings.jobs.directory),
+            settings.jobs,
+        )
+        self.loop_monitor = LoopLagMonitor(settings.health.loop_lag_interval)
+        self.slow_callbacks = SlowCallbackDetector(
+            threshold=settings.loop_monitor.slow_callback_threshold,
+            debug=settings.loop_monitor.debug,
+            history=settings.loop_monitor.history,
+        )
+        self.admin_service = AdminService(
+            graph_repository, get_allocation_tracker(), loop_monitor=self.loop_monitor, slow_callbacks=self.slow_callbacks
+        )
+        self.health_service = HealthService(
+            graph_repository, self.stream_tracker, self.lane_scheduler, self.loop_monitor, settings.health
+        )
+        self.profiler_service = ProfilerService(graph_repository, settings.profiler)
+
+        # コントローラー
+        self.chat_controller = ChatController(
+            self.chat_service,
+            bulk_api_keys=settings.scheduler.bulk_api_key_set,
+            compression=self.compression,
+            rate_limiter=self.rate_limiter,
+            max_message_bytes=settings.limits.max_body_bytes,
+        )
+        self.job_controller = JobController(self.job_service, rate_limiter=self.rate_limiter)
+        self.thread_controller = ThreadController(self.thread_service, compression=self.compression)
+        self.admin_controller = AdminController(self.admin_service, self.profiler_service)
+        self.health_controller = HealthController(self.health_service)
+
+        self.shutdown = GracefulShutdown(self.stream_tracker, self.thread_service, settings.shutdown)
+
+    async def start(self) -> None:
+        """
+        前回の停止時に書き出したスレッドを読み込み、ジョブのワーカーを起動し、
+        グラフのウォームアップとイベントループの監視を始め、プロファイルのシグナルを登録する
+        （ready になるのはウォームアップの完了後）
+        """
+        await self.shutdown.startup()
+        await self.job_service.start()
+        await self.health_service.start()
+        self.slow_callbacks.start()
+        await self.profiler_service.start()
+
+    async def stop(self) -> Dict[str, Any]:
+        """
+        新しいリクエストを断り、実行中のストリーム（ジョブを含む）を期限までドレインしてから
+        スレッドを書き出し、ジョブのワーカーを止める
+
+        Returns:
+            GracefulShutdown.shutdown の結果
+        """
+        summary = await self.shutdown.shutdown()
+        await self.job_service.stop()
+        await self.profiler_service.stop()
+        self.slow_callbacks.stop()
+        await self.health_service.stop()
+        return summary
@@ -0,0 +1,57 @@
+# api/controllers/admin_controller.py
+# ---------------------------------------------------------
+# 管理用コントローラー（HTTP処理のみ）
+# ---------------------------------------------------------
+import logging
+from typing import Any, Dict
+
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+
+from api.models import ProfileScope
+from api.services.admin_service import AdminService
+from api.services.profiler_service import ProfilerService, profile_filename
+
+logger = logging.getLogger(__name__)
+
+
+class AdminController:
+    """管理用エンドポイントのコントローラー（HTTP処理のみ）"""
+    
+    def __init__(self, admin_service: AdminService, profiler_service: ProfilerService):
+        """
+        初期化
+        
+        Args:
+            admin_service: 管理用サービス
+            profiler_service: プロファイラーサービス
+        """
+        self.admin_service = admin_service
+        self.profiler_service = profiler_service
+    
+    async def memory(self, top: int = 10, allocations: bool = False) -> Dict[str, Any]:
+        """メモリ使用状況のレポート"""
+        return self.admin_service.memory_report(top=top, allocations=allocations)
+    
+    async def stop_allocations(self) -> Dict[str, Any]:
+        """メモリ割り当てのトレースを停止"""
+        return self.admin_service.stop_allocation_tracking()
+    
+    async def loop(self, limit: int = 20) -> Dict[str, Any]:
+        """イベントループの遅延と、ループをブロックした直近のコールバック"""
+        return self.admin_service.loop_report(limit=limit)
+    
+    async def profile(self, seconds: float, scope: ProfileScope) -> PlainTextResponse:
+        """CPUプロファイルを collapsed 形式のファイルとして返す（プロファイル中の場合は409）"""
+        try:
+            profile = await self.profiler_service.profile(seconds, scope)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return PlainTextResponse(
+            profile.to_collapsed(),
+            headers={
+                "Content-Disposition": f'attachment; filename="{profile_filename(profile)}"',
+                "X-Profile-Samples": str(profile.total),
+                "X-Profile-Seconds": f"{profile.seconds:.3f}",
+            },
+        )
@@ -2,34 +2,98 @@
 # ---------------------------------------------------------
 # チャットコントローラー（HTTP処理のみ）
 # ---------------------------------------------------------
+import asyncio
+import json
 import logging
+from typing import AbstractSet, Dict, Optional
 from uuid import uuid4
 
-from fastapi import HTTPException
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
+from api.compression import StreamCompression
 from api.models import ChatRequest
 from api.services.chat_service import ChatService
+from api.services.lane_scheduler import Lane
+from api.services.rate_limiter import RateLimitDecision, RateLimiter
 
 logger = logging.getLogger(__name__)
 
+# WebSocketの送信待ちフレーム数の上限（超えた場合は各ターンのストリームが送信を待つ）
+WS_OUTBOX_SIZE = 256
+
 
 class ChatController:
     """チャット関連のコントローラー（HTTP処理のみ）"""
     
-    def __init__(self, chat_service: ChatService):
+    def __init__(
+        self,
+        chat_service: ChatService,
+        bulk_api_keys: AbstractSet[str] = frozenset(),
+        compression: Optional[StreamCompression] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_message_bytes: int = 0,
+    ):
         """
         初期化
         
         Args:
             chat_service: チャットサービス
+            bulk_api_keys: bulk レーンで実行するAPIキーの集合
+            compression: SSEの圧縮（Noneの場合は圧縮しない）
+            rate_limiter: クライアント・スレッドごとのレート制限（Noneの場合は制限しない）
+            max_message_bytes: WebSocketの受信フレームの上限（バイト、0の場合は制限しない。HTTPはミドルウェアで制限）
         """
         self.chat_service = chat_service
+        self.bulk_api_keys = bulk_api_keys
+        self.compression = compression
+        self.rate_limiter = rate_limiter
+        self.max_message_bytes = max_message_bytes
+    
+    def resolve_lane(self, request: ChatRequest, api_key: Optional[str] = None) -> str:
+        """
+        実行レーンを決定（bulk用APIキーは常にbulk、それ以外はリクエストの指定に従う）
+        
+        Args:
+            request: チャットリクエスト
+            api_key: X-API-Key ヘッダーの値
+        
+        Returns:
+            レーン名
+        """
+        if api_key is not None and api_key in self.bulk_api_keys:
+            return Lane.BULK
+        return request.priority or Lane.INTERACTIVE
+    
+    async def check_rate_limit(
+        self,
+        client: str,
+        thread_id: Optional[str],
+        graph_name: str = "default"
+    ) -> Optional[RateLimitDecision]:
+        """
+        レート制限を確認
+        
+        Args:
+            client: クライアントID（client_identity() の結果）
+            thread_id: リクエストで指定されたスレッドID
+            graph_name: 使用するグラフ名
+        
+        Returns:
+            判定（レート制限が無効な場合はNone）
+        """
+        if self.rate_limiter is None:
+            return None
+        return await self.rate_limiter.check(client, thread_id=thread_id, graph_name=graph_name)
     
     async def chat(
         self,
         request: ChatRequest,
-        graph_name: str = "default"
+        graph_name: str = "default",
+        api_key: Optional[str] = None,
+        accept_encoding: Optional[str] = None,
+        client: Optional[str] = None
     ) -> StreamingResponse:
         """
         チャットエンドポイント（SSEストリーミング）
@@ -37,24 +101,156 @@ class ChatController:
         Args:
             request: チャットリクエスト
             graph_name: 使用するグラフ名（デフォルト: "default"）
+            api_key: X-API-Key ヘッダーの値（レーンの決定に使用）
+            accept_encoding: Accept-Encoding ヘッダーの値（圧縮の決定に使用）
+            client: クライアントID（レート制限のキー）
         
         Returns:
             SSEストリーミングレスポンス
         """
+        if not self.chat_service.accepting:
+            raise HTTPException(status_code=503, detail="サーバーを停止しています", headers={"Retry-After": "1"})
+        limit = await self.check_rate_limit(client or "anonymous", request.thread_id, graph_name)
+        if limit is not None and not limit.allowed:
+            raise HTTPException(status_code=429, detail="リクエストが多すぎます", headers=limit.headers())
         try:
-            # スレッドIDを取得（リクエストから、または生成）
-            thread_id = request.thread_id or str(uuid4())
+            # スレッドIDと実行モードを確定（ステートレスの場合はスレッドIDを返さない）
+            request = self.chat_service.prepare_request(request)
+            lane = self.resolve_lane(request, api_key)
+
+            headers = {"X-Lane": lane}
+            if request.stateless:
+                headers["X-Stateless"] = "true"
+            if request.thread_id is not None:
+                headers["X-Thread-Id"] = request.thread_id
+            if limit is not None:
+                headers.update(limit.headers())
             
-            # サービスを呼び出してストリーミングを生成
-            async def gen():
-                async for chunk in self.chat_service.process_chat_stream(request, graph_name):
-                    yield chunk
+            # サービスのジェネレーターをそのままレスポンスに渡す
+            body = self.chat_service.process_chat_stream(request, graph_name, lane=lane)
+            if self.compression is not None:
+                encoding = self.compression.negotiate(accept_encoding)
+                headers["Vary"] = "Accept-Encoding"
+                if encoding is not None:
+                    headers["Content-Encoding"] = encoding
+                    body = self.compression.encode_stream(body, encoding)
             
             return StreamingResponse(
-                gen(),
+                body,
                 media_type="text/event-stream",
-                headers={"X-Thread-Id": thread_id}
+                headers=headers
             )
         except Exception as e:
             logger.error(f"Chat controller error: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"内部サーバーエラー: {str(e)}")
+    
+    async def chat_ws(
+        self,
+        websocket: WebSocket,
+        graph_name: str = "default",
+        api_key: Optional[str] = None,
+        client: Optional[str] = None
+    ) -> None:
+        """
+        チャットエンドポイント（WebSocket、1接続で複数スレッドを多重化）
+        
+        受信フレーム（JSONテキスト）:
+            {"t": "<thread_id>", "input": "...", "timeout": 3.0, "priority": "bulk"}  # ターンを開始
+            {"t": "<thread_id>", "op": "cancel"}                                      # 実行中のターンを中断
+        送信フレーム:
+            {"t": "<thread_id>", "ch": "<チャネル>", "data": ...}  # SSEと同じイベントにスレッドIDを付与
+            {"t": "<thread_id>", "ch": "end"}                     # ターンの終了
+        
+        実行モードとスレッドIDは /chat と同じく ChatService.prepare_request で確定する。"t" のない
+        ターンは、採番したスレッドID（ステートレスの場合は接続内だけの相関ID）をフレームに付ける。
+        
+        Args:
+            websocket: WebSocket接続
+            graph_name: 使用するグラフ名（デフォルト: "default"）
+            api_key: X-API-Key ヘッダーの値（レーンの決定に使用）
+            client: クライアントID（レート制限のキー、ターンごとに確認）
+        """
+        await websocket.accept()
+        outbox: asyncio.Queue[str] = asyncio.Queue(maxsize=WS_OUTBOX_SIZE)
+        turns: Dict[str, asyncio.Task] = {}
+        
+        async def send(thread_id: Optional[str], event: dict):
+            if sender.done():
+                # 送信ループが終了している（切断済み）場合は破棄する
+                return
+            await outbox.put(self.chat_service.encode_event({"t": thread_id, **event}))
+        
+        async def send_loop():
+            while True:
+                await websocket.send_text(await outbox.get())
+        
+        async def run_turn(turn_id: str, request: ChatRequest, lane: str):
+            try:
+                async for event in self.chat_service.stream_events(request, graph_name, lane=lane):
+                    await send(turn_id, event)
+            finally:
+                turns.pop(turn_id, None)
+                await send(turn_id, {"ch": "end"})
+        
+        sender = asyncio.create_task(send_loop())
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+                raw = message.get("text")
+                if raw is None:
+                    # バイナリフレームは受け付けない（接続は切らずにエラーを返す）
+                    await send(None, {"ch": "error", "data": {"message": "テキストフレームのみ受け付けます"}})
+                    continue
+                if self.max_message_bytes and len(raw.encode("utf-8")) > self.max_message_bytes:
+                    await send(None, {"ch": "error", "data": {"message": "フレームが大きすぎます", "status": 413}})
+                    continue
+                try:
+                    frame = json.loads(raw)
+                    if not isinstance(frame, dict):
+                        raise ValueError("frame must be a JSON object")
+                except ValueError as e:
+                    await send(None, {"ch": "error", "data": {"message": f"不正なフレーム: {e}"}})
+                    continue
+                
+                thread_id = frame.get("t")
+                if frame.get("op") == "cancel":
+                    task = turns.get(thread_id)
+                    if task is not None:
+                        task.cancel()
+                    continue
+                if not self.chat_service.accepting:
+                    await send(thread_id, {"ch": "error", "data": {"message": "サーバーを停止しています"}})
+                    continue
+                if thread_id in turns:
+                    # 同じスレッドのターンを並行に実行するとチェックポイントが競合する
+                    await send(thread_id, {"ch": "error", "data": {"message": "このスレッドは実行中です"}})
+                    continue
+                limit = await self.check_rate_limit(client or "anonymous", thread_id, graph_name)
+                if limit is not None and not limit.allowed:
+                    await send(thread_id, {
+                        "ch": "error",
+                        "data": {"message": "リクエストが多すぎます", "retry_after": limit.retry_after},
+                    })
+                    continue
+                try:
+                    fields = {k: v for k, v in frame.items() if k not in ("t", "op")}
+                    request = ChatRequest(**fields, thread_id=thread_id)
+                except (ValidationError, TypeError) as e:
+                    await send(thread_id, {"ch": "error", "data": {"message": f"不正なリクエスト: {e}"}})
+                    continue
+                # /chat と同じく実行モードとスレッドIDを確定（"t" のないターンは既定でステートレス）
+                request = self.chat_service.prepare_request(request)
+                turn_id = request.thread_id or str(uuid4())
+                lane = self.resolve_lane(request, api_key)
+                turns[turn_id] = asyncio.create_task(run_turn(turn_id, request, lane))
+        except WebSocketDisconnect:
+            logger.debug("WebSocket disconnected")
+        finally:
+            # 切断時は送信ループを止めてから実行中のターンを中断する
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            for task in list(turns.values()):
+                task.cancel()
+            await asyncio.gather(*turns.values(), return_exceptions=True)
@@ -0,0 +1,40 @@
+# api/controllers/health_controller.py
+# ---------------------------------------------------------
+# ヘルスチェックコントローラー（HTTP処理のみ）
+# ---------------------------------------------------------
+import logging
+from typing import Any, Dict
+
+from fastapi.responses import JSONResponse
+
+from api.services.health_service import HealthService
+
+logger = logging.getLogger(__name__)
+
+
+class HealthController:
+    """ヘルスチェック・レディネス・飽和度のコントローラー（HTTP処理のみ）"""
+    
+    def __init__(self, health_service: HealthService):
+        """
+        初期化
+        
+        Args:
+            health_service: ヘルスサービス
+        """
+        self.health_service = health_service
+    
+    async def liveness(self) -> Dict[str, Any]:
+        """プロセスが応答できることを返す"""
+        return self.health_service.liveness()
+    
+    async def readiness(self) -> JSONResponse:
+        """ready でない場合は503を返す（ロードバランサーが振り分けから外す）"""
+        report = self.health_service.readiness()
+        if report["ready"]:
+            return JSONResponse(report)
+        return JSONResponse(report, status_code=503, headers={"Retry-After": "1"})
+    
+    async def saturation(self) -> Dict[str, Any]:
+        """オートスケーラー向けの飽和度"""
+        return self.health_service.saturation()
@@ -0,0 +1,91 @@
+# api/controllers/job_controller.py
+# ---------------------------------------------------------
+# ジョブコントローラー（HTTP処理のみ）
+# ---------------------------------------------------------
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from api.models import ChatRequest
+from api.services.job_service import JobQueueFull, JobService
+from api.services.lane_scheduler import Lane
+from api.services.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class JobController:
+    """ジョブ関連のコントローラー（HTTP処理のみ）"""
+    
+    def __init__(self, job_service: JobService, rate_limiter: Optional[RateLimiter] = None):
+        """
+        初期化
+        
+        Args:
+            job_service: ジョブサービス
+            rate_limiter: クライアント・スレッドごとのレート制限（Noneの場合は制限しない）
+        """
+        self.job_service = job_service
+        self.rate_limiter = rate_limiter
+    
+    async def submit(
+        self,
+        request: ChatRequest,
+        graph_name: str = "default",
+        client: Optional[str] = None,
+    ) -> JSONResponse:
+        """ジョブを登録し、202でジョブの状態を返す（priority 未指定の場合は bulk レーンで実行）"""
+        if not self.job_service.chat_service.accepting:
+            raise HTTPException(status_code=503, detail="サーバーを停止しています", headers={"Retry-After": "1"})
+        headers = {}
+        if self.rate_limiter is not None:
+            limit = await self.rate_limiter.check(client or "anonymous", request.thread_id, graph_name)
+            if limit is not None:
+                if not limit.allowed:
+                    raise HTTPException(status_code=429, detail="リクエストが多すぎます", headers=limit.headers())
+                headers.update(limit.headers())
+        try:
+            job = await self.job_service.submit(request, graph_name, lane=request.priority or Lane.BULK)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except JobQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        headers["Location"] = f"/jobs/{job['id']}"
+        return JSONResponse(job, status_code=202, headers=headers)
+    
+    async def get_job(self, job_id: str) -> Dict[str, Any]:
+        """ジョブの状態を返す"""
+        job = self.job_service.describe(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        return job
+    
+    async def events(self, job_id: str, after: int = -1) -> StreamingResponse:
+        """ジョブのイベントをSSEで返す（id はイベント番号、Last-Event-ID で続きから再開できる）"""
+        if self.job_service.describe(job_id) is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        
+        async def gen() -> AsyncIterator[bytes]:
+            async for index, event in self.job_service.events(job_id, after):
+                yield f"id: {index}\ndata: {event}\n\n".encode()
+        
+        return StreamingResponse(gen(), media_type="text/event-stream", headers={"X-Job-Id": job_id})
+    
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """実行中・待機中のジョブを中断する"""
+        job = await self.job_service.cancel(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        return job
+    
+    async def delete(self, job_id: str) -> Dict[str, Any]:
+        """終了したジョブと記録したイベントを削除する"""
+        try:
+            deleted = self.job_service.delete(job_id)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if not deleted:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        return {"job_id": job_id, "deleted": True}
@@ -0,0 +1,93 @@
+# api/controllers/thread_controller.py
+# ---------------------------------------------------------
+# スレッドコントローラー（HTTP処理のみ）
+# ---------------------------------------------------------
+import logging
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from api.compression import StreamCompression
+from api.services.thread_service import ThreadService
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadController:
+    """スレッド関連のコントローラー（HTTP処理のみ）"""
+    
+    def __init__(self, thread_service: ThreadService, compression: Optional[StreamCompression] = None):
+        """
+        初期化
+        
+        Args:
+            thread_service: スレッドサービス
+            compression: エクスポートの圧縮（Noneの場合は圧縮しない）
+        """
+        self.thread_service = thread_service
+        self.compression = compression
+    
+    async def get_thread(self, thread_id: str, graph_name: str = "default") -> dict:
+        """スレッドの最新状態を返す"""
+        try:
+            state = await self.thread_service.get_thread(thread_id, graph_name)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        if state is None:
+            raise HTTPException(status_code=404, detail=f"Thread '{thread_id}' not found")
+        return state
+    
+    async def get_blob(self, blob_id: str) -> Response:
+        """退避した入力の全文を返す"""
+        data = self.thread_service.get_blob(blob_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"Blob '{blob_id}' not found")
+        # 内容のハッシュがIDなので、同じIDの内容は変わらない
+        return Response(
+            data,
+            media_type="text/plain; charset=utf-8",
+            headers={"Cache-Control": "private, max-age=31536000, immutable"},
+        )
+    
+    async def delete_thread(self, thread_id: str, graph_name: str = "default") -> dict:
+        """スレッドを削除する"""
+        try:
+            deleted = await self.thread_service.delete_thread(thread_id, graph_name)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        if not deleted:
+            raise HTTPException(status_code=404, detail=f"Thread '{thread_id}' not found")
+        return {"thread_id": thread_id, "deleted": True}
+    
+    async def export_threads(
+        self,
+        graph_name: str = "default",
+        thread_ids: Optional[list[str]] = None,
+        drain: bool = False,
+        accept_encoding: Optional[str] = None,
+    ) -> StreamingResponse:
+        """スレッドをNDJSONでストリーミングエクスポートする"""
+        # グラフの存在を先に確認してからストリーミングを開始する
+        if self.thread_service.graph_repo.get(graph_name) is None:
+            raise HTTPException(status_code=404, detail=f"Graph '{graph_name}' not found")
+        body = self.thread_service.export_threads(graph_name, thread_ids, drain=drain)
+        headers = {}
+        if self.compression is not None:
+            encoding = self.compression.negotiate(accept_encoding)
+            headers["Vary"] = "Accept-Encoding"
+            if encoding is not None:
+                # 1行ごとに届く必要はないので batch_size ずつまとめて圧縮する
+                headers["Content-Encoding"] = encoding
+                body = self.compression.encode_stream(body, encoding, batch=True)
+        return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+    
+    async def import_threads(self, request: Request, graph_name: str = "default") -> dict:
+        """NDJSONのリクエストボディをストリーミングで読み込んでインポートする"""
+        if self.thread_service.graph_repo.get(graph_name) is None:
+            raise HTTPException(status_code=404, detail=f"Graph '{graph_name}' not found")
+        try:
+            imported = await self.thread_service.import_threads(request.stream(), graph_name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"imported": imported}
@@ -0,0 +1,97 @@
+# api/lifecycle.py
+# ---------------------------------------------------------
+# グレースフルシャットダウン（ストリームのドレインとチェックポイントの書き出し）
+# ---------------------------------------------------------
+import asyncio
+import logging
+import signal
+import threading
+from typing import Any, Dict, Optional
+
+from api.services.stream_tracker import DrainResult, StreamTracker
+from api.services.thread_service import ThreadService
+from config import ShutdownConfig
+
+logger = logging.getLogger(__name__)
+
+# ドレインを始めるシグナル（uvicorn のハンドラーの前に割り込む）
+DRAIN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class GracefulShutdown:
+    """
+    ワーカーの停止手順
+
+    uvicorn は SIGTERM を受けると新しい接続の受け付けを止め、既存の接続が閉じるのを待ってから
+    lifespan の shutdown を呼ぶ。SSE のストリームが続いている間は lifespan まで到達しないため、
+    シグナルハンドラーに割り込んでその時点からドレインを始め、期限を過ぎたストリームを中断する。
+    """
+
+    def __init__(self, tracker: StreamTracker, thread_service: ThreadService, config: ShutdownConfig):
+        """
+        初期化
+
+        Args:
+            tracker: 実行中ストリームの追跡
+            thread_service: スレッドサービス（チェックポイントの書き出し・読み込み）
+            config: シャットダウン設定
+        """
+        self.tracker = tracker
+        self.thread_service = thread_service
+        self.config = config
+        self._drain_task: Optional[asyncio.Task] = None
+        self._previous_handlers: Dict[int, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def startup(self) -> Dict[str, int]:
+        """
+        前回の停止時に書き出したスレッドを読み込み、シグナルハンドラーを登録する
+
+        Returns:
+            グラフ名と読み込んだスレッド数の対応
+        """
+        restored = {}
+        if self.config.checkpoint_dir:
+            restored = await self.thread_service.restore_snapshot(self.config.checkpoint_dir)
+            if restored:
+                logger.info(f"Restored threads from {self.config.checkpoint_dir}: {restored}")
+        self._loop = asyncio.get_running_loop()
+        if threading.current_thread() is threading.main_thread():
+            for sig in DRAIN_SIGNALS:
+                self._previous_handlers[sig] = signal.signal(sig, self._handle_signal)
+        return restored
+
+    def _handle_signal(self, sig: int, frame: Any) -> None:
+        """ドレインを始めてから、元のハンドラー（uvicorn）に処理を渡す"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.begin_drain)
+        previous = self._previous_handlers.get(sig)
+        if callable(previous):
+            previous(sig, frame)
+
+    def begin_drain(self) -> asyncio.Task:
+        """ドレインを開始する（2回目以降は開始済みのタスクを返す）"""
+        if self._drain_task is None:
+            self.tracker.start_draining()
+            self._drain_task = asyncio.ensure_future(
+                self.tracker.drain(self.config.drain_timeout, kill_grace=self.config.kill_grace)
+            )
+        return self._drain_task
+
+    async def shutdown(self) -> Dict[str, Any]:
+        """
+        ドレインの完了を待ち、スレッドを書き出し、シグナルハンドラーを元に戻す
+
+        Returns:
+            ドレインしたストリーム数・中断したストリーム数・書き出したスレッド数
+        """
+        result: DrainResult = await self.begin_drain()
+        saved = {}
+        if self.config.checkpoint_dir:
+            saved = await self.thread_service.save_snapshot(self.config.checkpoint_dir)
+        for sig, handler in self._previous_handlers.items():
+            signal.signal(sig, handler)
+        self._previous_handlers.clear()
+        summary = {"drained": result.drained, "killed": result.killed, "checkpointed": saved}
+        logger.info(f"Shutdown complete: {summary}")
+        return summary
@@ -0,0 +1,80 @@
+# api/middleware.py
+# ---------------------------------------------------------
+# ASGIミドルウェア（リクエストボディの大きさの上限）
+# ---------------------------------------------------------
+from typing import Mapping, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics import MetricsRegistry, get_metrics
+
+BODY_TOO_LARGE = "リクエストボディが大きすぎます"
+
+
+class BodySizeLimitMiddleware:
+    """
+    リクエストボディが max_bytes を超えたら413を返す
+
+    Content-Length がある場合は読み込む前に断り、ない場合（chunked）は受信したバイト数を数えて、
+    超えた時点で読み込みを打ち切る（ボディ全体をバッファしない）。
+    path_limits に一致するパス（大きなボディを受け付けるインポートなど）はそのパスの上限を使う。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_bytes: int,
+        path_limits: Optional[Mapping[str, int]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            app: ASGIアプリケーション
+            max_bytes: ボディの上限（バイト、0以下の場合は制限しない）
+            path_limits: パスの接頭辞ごとの上限（max_bytes の代わりに使う、0以下の場合は制限しない）
+            metrics: 拒否数の記録先（Noneの場合はデフォルトレジストリ）
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = dict(path_limits or {})
+        self.metrics = metrics or get_metrics()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        max_bytes = next(
+            (limit for prefix, limit in self.path_limits.items() if scope["path"].startswith(prefix)),
+            self.max_bytes,
+        )
+        if max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > max_bytes:
+                    self.metrics.inc("limits.body.rejected")
+                    response = JSONResponse({"detail": BODY_TOO_LARGE}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # ボディの解析中に送出され、FastAPI の例外ハンドラーが413を返す
+                    self.metrics.inc("limits.body.rejected")
+                    raise HTTPException(status_code=413, detail=BODY_TOO_LARGE)
+            return message
+
+        await self.app(scope, limited_receive, send)
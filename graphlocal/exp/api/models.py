@@ -2,12 +2,65 @@
 # ---------------------------------------------------------
 # Pydanticモデル定義
 # ---------------------------------------------------------
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# グラフのストリームモード（クライアント向けのチャネル）
+StreamChannel = Literal["messages", "updates", "custom"]
+
+# CPUプロファイルの対象（graph: stream_execution とノード関数のスタックのみ、all: すべてのスレッド）
+ProfileScope = Literal["graph", "all"]
+
+
+class EventFilter(BaseModel):
+    """
+    クライアントに送るイベントの絞り込み（グラフのストリームの段階で適用する）
+
+    None の項目は絞り込まない。グラフごとの設定とリクエストの指定は merge() で両方を満たすように合成する。
+    """
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    channels: Optional[List[StreamChannel]] = Field(
+        None, description="送るストリームモード（未指定の場合は messages / updates / custom のすべて）"
+    )
+    nodes: Optional[List[str]] = Field(
+        None, description="送るノード名（サブグラフのイベントは親グラフのノード名で判定、custom には適用しない）"
+    )
+    subgraphs: bool = Field(True, description="サブグラフのイベントを含める")
+
+    def merge(self, other: Optional["EventFilter"]) -> "EventFilter":
+        """両方の条件を満たす絞り込みを返す"""
+        if other is None:
+            return self
+        return EventFilter(
+            channels=_intersect(self.channels, other.channels),
+            nodes=_intersect(self.nodes, other.nodes),
+            subgraphs=self.subgraphs and other.subgraphs,
+        )
+
+
+def _intersect(a: Optional[List[str]], b: Optional[List[str]]) -> Optional[List[str]]:
+    """None を「すべて」とみなした共通部分（順序は a に従う）"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return [item for item in a if item in b]
 
 
 class ChatRequest(BaseModel):
     """チャットリクエストモデル"""
     input: str = Field(..., min_length=1, description="ユーザーの入力テキスト")
     thread_id: Optional[str] = Field(None, description="スレッドID（未指定の場合は自動生成）")
+    timeout: Optional[float] = Field(None, gt=0, description="リクエスト全体のタイムアウト秒数（グラフ内の各ノードに伝播）")
+    priority: Optional[Literal["interactive", "bulk"]] = Field(
+        None, description="実行レーン（未指定の場合はinteractive、bulk用APIキーの場合は常にbulk）"
+    )
+    stateless: Optional[bool] = Field(
+        None,
+        description="チェックポイントを書かずに実行する（未指定の場合は thread_id がなければステートレス）",
+    )
+    events: Optional[EventFilter] = Field(
+        None, description="送るイベントの絞り込み（グラフごとの絞り込みと両方を満たすものだけ送る）"
+    )
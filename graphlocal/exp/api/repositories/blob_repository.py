@@ -0,0 +1,119 @@
+# api/repositories/blob_repository.py
+# ---------------------------------------------------------
+# ブロブの保存先（内容のハッシュをキーにした、大きな入力の退避先）
+# ---------------------------------------------------------
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+# ブロブID（SHA-256の16進表記）
+_BLOB_ID = re.compile(r"^[0-9a-f]{64}$")
+
+
+def blob_id_of(data: bytes) -> str:
+    """内容からブロブIDを求める"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobRepository:
+    """
+    内容のハッシュ（SHA-256）をキーにしたブロブの保存先
+
+    同じ内容は1つにまとめて保存する。ディレクトリを指定した場合は
+    <directory>/<IDの先頭2文字>/<ID> に書き出し、メモリには保持しない。
+    owner（スレッド、graph.result_store.thread_owner() の値）を指定して保存したブロブは参照を数え、
+    release でどのスレッドからも参照されなくなったブロブを削除する（参照の数はメモリにのみ保持する）。
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            directory: 保存先ディレクトリ（Noneの場合はメモリ）
+        """
+        self.directory = Path(directory) if directory else None
+        self._blobs: Dict[str, bytes] = {}
+        self._owners: Dict[str, Set[str]] = {}
+        self._refs: Dict[str, Set[str]] = {}
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def is_valid_id(blob_id: str) -> bool:
+        """ブロブIDの形式か（パスに使う前に確認する）"""
+        return bool(_BLOB_ID.match(blob_id))
+
+    def put(self, data: bytes, owner: Optional[str] = None) -> str:
+        """
+        ブロブを保存（同じ内容が保存済みの場合は何もしない）
+
+        Args:
+            data: 内容
+            owner: 参照するスレッド（Noneの場合は release で削除しない）
+
+        Returns:
+            ブロブID
+        """
+        blob_id = blob_id_of(data)
+        if owner is not None:
+            self._owners.setdefault(blob_id, set()).add(owner)
+            self._refs.setdefault(owner, set()).add(blob_id)
+        if self.directory is None:
+            self._blobs.setdefault(blob_id, data)
+            return blob_id
+        path = self._path(blob_id)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return blob_id
+
+    def get(self, blob_id: str) -> Optional[bytes]:
+        """ブロブを取得（存在しない場合・IDの形式が不正な場合はNone）"""
+        if not self.is_valid_id(blob_id):
+            return None
+        if self.directory is None:
+            return self._blobs.get(blob_id)
+        try:
+            return self._path(blob_id).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def refcount(self, blob_id: str) -> int:
+        """ブロブを参照しているスレッドの数"""
+        return len(self._owners.get(blob_id, ()))
+
+    def release(self, owner: str) -> int:
+        """
+        owner からの参照をすべて外し、参照されなくなったブロブを削除
+
+        Returns:
+            削除したブロブの数
+        """
+        evicted = 0
+        for blob_id in self._refs.pop(owner, ()):
+            owners = self._owners[blob_id]
+            owners.discard(owner)
+            if not owners:
+                del self._owners[blob_id]
+                evicted += self.delete(blob_id)
+        return evicted
+
+    def delete(self, blob_id: str) -> bool:
+        """ブロブを削除（存在しない場合はFalse）"""
+        if not self.is_valid_id(blob_id):
+            return False
+        if self.directory is None:
+            return self._blobs.pop(blob_id, None) is not None
+        try:
+            self._path(blob_id).unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _path(self, blob_id: str) -> Path:
+        return self.directory / blob_id[:2] / blob_id
@@ -2,10 +2,16 @@
 # ---------------------------------------------------------
 # グラフリポジトリ（グラフインスタンス管理と実行）
 # ---------------------------------------------------------
+import base64
 import logging
-from typing import Any, AsyncIterator, Dict, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Optional
 
-from graph.state import GraphState
+from api.models import EventFilter
+from api.repositories.blob_repository import BlobRepository, blob_id_of
+from graph.messages import collect_blobs
+from graph.result_store import collect_refs, get_tool_result_store, output_key, thread_owner
+from graph.run_scope import CONFIG_KEY_RUN_SCOPE, RunScope
+from graph.state import STREAM_MODES, GraphState
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +22,30 @@ class GraphRepository:
     def __init__(self):
         """初期化"""
         self._graphs: Dict[str, Any] = {}
+        # チェックポインターを外したグラフ（ステートレス実行用、初回の実行時に作成）
+        self._stateless_graphs: Dict[str, Any] = {}
+        # グラフごとのイベントの絞り込み
+        self._event_filters: Dict[str, EventFilter] = {}
+        # スレッドの状態から参照されるツールの出力（スレッドの削除で参照を外す）
+        self.tool_results = get_tool_result_store()
     
-    def register(self, name: str, graph_instance: Any) -> None:
+    def register(self, name: str, graph_instance: Any, event_filter: Optional[EventFilter] = None) -> None:
         """
         グラフインスタンスを登録
         
         Args:
             name: グラフ名（例: "default", "v2_graph"）
             graph_instance: グラフインスタンス
+            event_filter: このグラフのイベントの絞り込み（内部ノードのイベントを送らない場合など）
         """
         if name in self._graphs:
             logger.warning(f"Graph '{name}' is already registered. Overwriting.")
         self._graphs[name] = graph_instance
+        self._stateless_graphs.pop(name, None)
+        if event_filter is not None:
+            self._event_filters[name] = event_filter
+        else:
+            self._event_filters.pop(name, None)
         logger.info(f"Graph '{name}' registered successfully")
     
     def get(self, name: str = "default") -> Optional[Any]:
@@ -53,12 +71,51 @@ class GraphRepository:
             グラフ名のリスト
         """
         return list(self._graphs.keys())
+
+    def node_functions(self) -> Dict[str, Any]:
+        """
+        登録されているグラフのノード関数を取得（LangGraph の内部ノードは含めない）
+
+        Returns:
+            "<グラフ名>/<ノード名>" とノード関数（非同期の場合はコルーチン関数）の対応
+        """
+        functions = {}
+        for graph_name, graph in self._graphs.items():
+            for node_name, node in getattr(graph, "nodes", {}).items():
+                if node_name.startswith("__"):
+                    continue
+                bound = getattr(node, "bound", None)
+                func = getattr(bound, "afunc", None) or getattr(bound, "func", None)
+                if callable(func):
+                    functions[f"{graph_name}/{node_name}"] = func
+        return functions
+
+    def get_stateless(self, name: str = "default") -> Optional[Any]:
+        """
+        チェックポインターを外したグラフを取得（ノード・エッジは登録したグラフと共有）
+        
+        Args:
+            name: グラフ名（デフォルト: "default"）
+        
+        Returns:
+            グラフインスタンス（存在しない場合はNone）
+        """
+        graph = self._stateless_graphs.get(name)
+        if graph is None:
+            base = self.get(name)
+            if base is None:
+                return None
+            graph = base if base.checkpointer is None else base.copy(update={"checkpointer": None})
+            self._stateless_graphs[name] = graph
+        return graph
     
     async def stream_execution(
         self,
         graph_name: str,
         initial_state: GraphState,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        stateless: bool = False,
+        event_filter: Optional[EventFilter] = None
     ) -> AsyncIterator[Any]:
         """
         グラフを実行してストリーミング形式でイベントを返す
@@ -67,24 +124,438 @@ class GraphRepository:
             graph_name: グラフ名
             initial_state: 初期状態
             config: 実行設定（thread_id等）
+            stateless: Trueの場合はチェックポイントを書かずに実行する（再開しない1回限りのリクエスト用）
+            event_filter: リクエストのイベントの絞り込み（グラフごとの絞り込みと合成する）
         
         Yields:
-            グラフ実行イベント
+            グラフ実行イベント（(名前空間, ストリームモード, データ) のタプル）
         
         Raises:
             ValueError: グラフが見つからない場合
         """
-        graph = self.get(graph_name)
+        graph = self.get_stateless(graph_name) if stateless else self.get(graph_name)
         if graph is None:
             raise ValueError(f"Graph '{graph_name}' not found. Available graphs: {self.list_graphs()}")
         
-        if config is None:
-            config = {}
+        # ノード間で受け渡す実行中のタスク（ツールのストリーム等）は、実行が終われば受け取られていなくても破棄する
+        with RunScope() as scope:
+            run_config = {"configurable": {**(config or {}), CONFIG_KEY_RUN_SCOPE: scope}}
+            async for event in self._astream(graph, graph_name, initial_state, run_config, event_filter):
+                yield event
+    
+    async def _astream(
+        self,
+        graph: Any,
+        graph_name: str,
+        initial_state: GraphState,
+        config: Dict[str, Any],
+        event_filter: Optional[EventFilter],
+    ) -> AsyncIterator[Any]:
+        graph_filter = self._event_filters.get(graph_name)
+        if graph_filter is not None:
+            event_filter = graph_filter.merge(event_filter)
+        if event_filter is None:
+            async for event in graph.astream(
+                initial_state,
+                stream_mode=list(STREAM_MODES),
+                subgraphs=True,
+                config=config,
+            ):
+                yield event
+            return
         
+        # 送らないストリームモード・サブグラフはグラフに要求しない（チャネルが空でも実行はする）
+        modes = [mode for mode in STREAM_MODES if event_filter.channels is None or mode in event_filter.channels]
+        nodes = frozenset(event_filter.nodes) if event_filter.nodes is not None else None
         async for event in graph.astream(
             initial_state,
-            stream_mode=["messages", "updates"],
-            subgraphs=True,
-            config={"configurable": config} if config else None,
+            stream_mode=modes or ["updates"],
+            subgraphs=event_filter.subgraphs,
+            config=config,
         ):
+            if not event_filter.subgraphs:
+                # subgraphs=False の場合は名前空間なしの (モード, データ) が返る
+                event = ((), *event)
+            if not modes:
+                continue
+            if nodes is not None:
+                event = self._filter_nodes(event, nodes)
+                if event is None:
+                    continue
             yield event
+    
+    @staticmethod
+    def _filter_nodes(event: tuple, nodes: frozenset) -> Optional[tuple]:
+        """
+        指定したノードのイベントだけ残す（シリアライズ前に判定する）
+        
+        Returns:
+            絞り込んだイベント（送らない場合はNone）
+        """
+        namespace, mode, data = event
+        if namespace:
+            # サブグラフのイベントは親グラフのノード名（"<ノード名>:<タスクID>"）で判定
+            return event if namespace[0].split(":", 1)[0] in nodes else None
+        if mode == "messages":
+            _, metadata = data
+            return event if metadata.get("langgraph_node") in nodes else None
+        if mode == "updates":
+            if not isinstance(data, dict):
+                return event
+            kept = {node: update for node, update in data.items() if node in nodes}
+            if not kept:
+                return None
+            return event if len(kept) == len(data) else (namespace, mode, kept)
+        return event
+
+    # ========= Memory =========
+    @staticmethod
+    def _typed_size(value: Any) -> int:
+        """シリアライズ済みの値 (type, bytes) のバイト数"""
+        if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], (bytes, bytearray)):
+            return len(value[1])
+        return 0
+    
+    def _thread_memory(self, checkpointer: Any) -> Optional[Dict[str, Dict[str, int]]]:
+        """
+        MemorySaver のストレージからスレッドごとのチェックポイント数と概算バイト数を集計
+        
+        Returns:
+            スレッドIDと {"checkpoints", "bytes"} の対応（ストレージを参照できない場合はNone）
+        """
+        storage = getattr(checkpointer, "storage", None)
+        if storage is None:
+            return None
+        threads: Dict[str, Dict[str, int]] = {}
+        for thread_id, namespaces in storage.items():
+            entry = threads.setdefault(thread_id, {"checkpoints": 0, "bytes": 0})
+            for checkpoints in namespaces.values():
+                for checkpoint, metadata, _ in checkpoints.values():
+                    entry["checkpoints"] += 1
+                    entry["bytes"] += self._typed_size(checkpoint) + self._typed_size(metadata)
+        for (thread_id, *_), writes in getattr(checkpointer, "writes", {}).items():
+            entry = threads.setdefault(thread_id, {"checkpoints": 0, "bytes": 0})
+            entry["bytes"] += sum(self._typed_size(write[2]) for write in writes.values())
+        for (thread_id, *_), blob in getattr(checkpointer, "blobs", {}).items():
+            entry = threads.setdefault(thread_id, {"checkpoints": 0, "bytes": 0})
+            entry["bytes"] += self._typed_size(blob)
+        return threads
+    
+    def memory_stats(self, top: int = 10) -> Dict[str, Any]:
+        """
+        グラフ・スレッドごとのチェックポイント数と概算バイト数を集計
+        
+        バイト数はチェックポイント・書き込み・チャネル値のシリアライズ後のサイズの合計で、
+        Pythonオブジェクトのオーバーヘッドは含まない。
+        
+        Args:
+            top: 返す最大スレッド数
+        
+        Returns:
+            {"graphs": グラフごとの集計, "largest_threads": バイト数の大きいスレッド, "total_bytes": 合計,
+             "tool_results": 共有しているツールの出力の集計}
+        """
+        graphs: Dict[str, Any] = {}
+        threads = []
+        for graph_name, graph in self._graphs.items():
+            checkpointer = getattr(graph, "checkpointer", None)
+            thread_memory = self._thread_memory(checkpointer) if checkpointer else None
+            if thread_memory is None:
+                graphs[graph_name] = {"supported": False}
+                continue
+            graphs[graph_name] = {
+                "supported": True,
+                "threads": len(thread_memory),
+                "checkpoints": sum(entry["checkpoints"] for entry in thread_memory.values()),
+                "bytes": sum(entry["bytes"] for entry in thread_memory.values()),
+            }
+            threads.extend(
+                {"graph": graph_name, "thread_id": thread_id, **entry} for thread_id, entry in thread_memory.items()
+            )
+        threads.sort(key=lambda entry: entry["bytes"], reverse=True)
+        return {
+            "graphs": graphs,
+            "largest_threads": threads[:top],
+            "total_bytes": sum(entry.get("bytes", 0) for entry in graphs.values()),
+            "tool_results": self.tool_results.stats(),
+        }
+    
+    # ========= Thread State =========
+    def _get_checkpointer(self, graph_name: str) -> Any:
+        """
+        グラフのチェックポインターを取得
+        
+        Raises:
+            ValueError: グラフが見つからない、またはチェックポインターがない場合
+        """
+        graph = self.get(graph_name)
+        if graph is None:
+            raise ValueError(f"Graph '{graph_name}' not found. Available graphs: {self.list_graphs()}")
+        checkpointer = getattr(graph, "checkpointer", None)
+        if not checkpointer:
+            raise ValueError(f"Graph '{graph_name}' has no checkpointer")
+        return checkpointer
+    
+    def thread_owner(self, graph_name: str, thread_id: str) -> str:
+        """
+        スレッドから参照される出力・ブロブの参照カウントの単位（チェックポインターとスレッドIDの組）
+        
+        Raises:
+            ValueError: グラフが見つからない、またはチェックポインターがない場合
+        """
+        return thread_owner(self._get_checkpointer(graph_name), thread_id)
+    
+    def _release(self, checkpointer: Any, thread_id: str, blobs: Optional[BlobRepository]) -> None:
+        """削除したスレッドからのツール出力・ブロブの参照を外す"""
+        owner = thread_owner(checkpointer, thread_id)
+        self.tool_results.release(owner)
+        if blobs is not None:
+            blobs.release(owner)
+    
+    async def list_threads(self, graph_name: str) -> list[str]:
+        """
+        チェックポイントが保存されているスレッドIDのリストを取得
+        
+        Args:
+            graph_name: グラフ名
+        
+        Returns:
+            スレッドIDのリスト
+        """
+        checkpointer = self._get_checkpointer(graph_name)
+        storage = getattr(checkpointer, "storage", None)
+        if storage is not None:
+            # MemorySaverはストレージを直接参照する（全チェックポイントの復元を避ける）
+            return list(storage.keys())
+        thread_ids: Dict[str, None] = {}
+        async for checkpoint_tuple in checkpointer.alist(None):
+            thread_ids.setdefault(checkpoint_tuple.config["configurable"]["thread_id"], None)
+        return list(thread_ids)
+    
+    async def get_thread_state(self, graph_name: str, thread_id: str) -> Optional[Dict[str, Any]]:
+        """
+        スレッドの最新状態を取得
+        
+        Args:
+            graph_name: グラフ名
+            thread_id: スレッドID
+        
+        Returns:
+            スレッド状態（存在しない場合はNone）
+        """
+        self._get_checkpointer(graph_name)
+        graph = self.get(graph_name)
+        snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+        if snapshot.created_at is None:
+            return None
+        return {
+            "thread_id": thread_id,
+            "checkpoint_id": snapshot.config["configurable"].get("checkpoint_id"),
+            "created_at": snapshot.created_at,
+            "next": list(snapshot.next),
+            "values": snapshot.values,
+        }
+    
+    async def delete_thread(
+        self, graph_name: str, thread_id: str, blobs: Optional[BlobRepository] = None
+    ) -> bool:
+        """
+        スレッドの全チェックポイントを削除
+        
+        Args:
+            graph_name: グラフ名
+            thread_id: スレッドID
+            blobs: スレッドが参照しているブロブの保存先（参照を外し、参照されなくなったブロブを削除する）
+        
+        Returns:
+            削除した場合はTrue（存在しない場合はFalse）
+        """
+        checkpointer = self._get_checkpointer(graph_name)
+        latest = await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+        if latest is None:
+            return False
+        await checkpointer.adelete_thread(thread_id)
+        self._release(checkpointer, thread_id, blobs)
+        logger.info(f"Thread '{thread_id}' deleted from graph '{graph_name}'")
+        return True
+    
+    async def _namespaces(self, checkpointer: Any, thread_id: str) -> list[str]:
+        """スレッドのチェックポイント名前空間（"" がルートグラフ、それ以外はサブグラフ）"""
+        storage = getattr(checkpointer, "storage", None)
+        if storage is not None:
+            # MemorySaverはストレージを直接参照する（全チェックポイントの復元を避ける）
+            return sorted(storage.get(thread_id, {}).keys())
+        namespaces: Dict[str, None] = {}
+        async for checkpoint_tuple in checkpointer.alist({"configurable": {"thread_id": thread_id}}):
+            namespaces.setdefault(checkpoint_tuple.config["configurable"].get("checkpoint_ns", ""), None)
+        return sorted(namespaces)
+    
+    async def export_threads(
+        self,
+        graph_name: str,
+        thread_ids: Optional[Iterable[str]] = None,
+        drain: bool = False,
+        blobs: Optional[BlobRepository] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        スレッドの最新チェックポイントをエクスポート用レコードとして返す
+        
+        名前空間（ルートグラフとサブグラフ）ごとの最新のチェックポイントとその保留中の書き込みを、
+        チェックポインターのシリアライザ（msgpack）でバイナリ化し、base64でエンコードする。
+        履歴は含めない。チェックポイントが参照しているツールの出力（共有ストア）は tool_results に、
+        退避した入力は blobs（ブロブIDとbase64の対応）に含める。
+        
+        Args:
+            graph_name: グラフ名
+            thread_ids: 対象スレッドID（Noneの場合は全スレッド）
+            drain: Trueの場合、エクスポート後にスレッドを削除する
+            blobs: 退避した入力の保存先（Noneの場合は blobs を含めない）
+        
+        Yields:
+            エクスポートレコード
+        """
+        checkpointer = self._get_checkpointer(graph_name)
+        if thread_ids is None:
+            thread_ids = await self.list_threads(graph_name)
+        for thread_id in thread_ids:
+            snapshots: Dict[str, Dict[str, Any]] = {}
+            for namespace in await self._namespaces(checkpointer, thread_id):
+                checkpoint_tuple = await checkpointer.aget_tuple(
+                    {"configurable": {"thread_id": thread_id, "checkpoint_ns": namespace}}
+                )
+                if checkpoint_tuple is not None:
+                    snapshots[namespace] = {
+                        "checkpoint": checkpoint_tuple.checkpoint,
+                        "metadata": checkpoint_tuple.metadata,
+                        "writes": [list(write) for write in checkpoint_tuple.pending_writes or ()],
+                    }
+            root = snapshots.pop("", None)
+            if root is None:
+                continue
+            type_, data = checkpointer.serde.dumps_typed({**root, "subgraphs": snapshots})
+            record = {
+                "thread_id": thread_id,
+                "checkpoint_id": root["checkpoint"]["id"],
+                "type": type_,
+                "data": base64.b64encode(data).decode("ascii"),
+            }
+            # 参照はチェックポイントの状態と保留中の書き込みの両方から集める
+            states = []
+            for snapshot in (root, *snapshots.values()):
+                states.append(snapshot["checkpoint"].get("channel_values") or {})
+                states.extend({channel: value} for _, channel, value in snapshot["writes"])
+            refs = set().union(*(collect_refs(values) for values in states))
+            outputs = {key: self.tool_results.get(key) for key in sorted(refs)}
+            outputs = {key: output for key, output in outputs.items() if output is not None}
+            if outputs:
+                record["tool_results"] = outputs
+            if blobs is not None:
+                contents = {
+                    blob_id: blobs.get(blob_id)
+                    for values in states
+                    for blob_id in collect_blobs(values)
+                }
+                contents = {
+                    blob_id: base64.b64encode(data).decode("ascii")
+                    for blob_id, data in contents.items()
+                    if data is not None
+                }
+                if contents:
+                    record["blobs"] = contents
+            yield record
+            if drain:
+                await checkpointer.adelete_thread(thread_id)
+                self._release(checkpointer, thread_id, blobs)
+    
+    def _parse_record(self, checkpointer: Any, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        エクスポートレコードを復元して検証する
+        
+        Raises:
+            ValueError: レコードの形式が不正な場合
+        """
+        try:
+            payload = checkpointer.serde.loads_typed(
+                (record["type"], base64.b64decode(record["data"], validate=True))
+            )
+            snapshots = {"": payload, **(payload.get("subgraphs") or {})}
+            for namespace, snapshot in snapshots.items():
+                if not isinstance(namespace, str):
+                    raise ValueError("checkpoint namespace must be a string")
+                if not isinstance(snapshot["checkpoint"]["channel_versions"], dict):
+                    raise ValueError("checkpoint has no channel versions")
+                if not isinstance(snapshot["metadata"], dict):
+                    raise ValueError("checkpoint metadata must be a mapping")
+                for task_id, channel, _ in snapshot.get("writes") or ():
+                    if not isinstance(task_id, str) or not isinstance(channel, str):
+                        raise ValueError("pending write must be (task_id, channel, value)")
+            outputs = record.get("tool_results") or {}
+            if any(output_key(output)[0] != key for key, output in outputs.items()):
+                raise ValueError("tool result does not match its key")
+            contents = {
+                blob_id: base64.b64decode(data, validate=True)
+                for blob_id, data in (record.get("blobs") or {}).items()
+            }
+            if any(blob_id_of(data) != blob_id for blob_id, data in contents.items()):
+                raise ValueError("blob does not match its id")
+            return {
+                "thread_id": str(record["thread_id"]),
+                "snapshots": snapshots,
+                "tool_results": outputs,
+                "blobs": contents,
+            }
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"Invalid thread record: {e}") from e
+    
+    async def import_threads(
+        self,
+        graph_name: str,
+        records: AsyncIterable[Dict[str, Any]],
+        blobs: Optional[BlobRepository] = None,
+    ) -> int:
+        """
+        エクスポートレコードからスレッドを復元（同じスレッドIDの既存のスレッドは置き換える）
+        
+        すべてのレコードを復元・検証してから書き込むので、不正なレコードが1つでもあればどのスレッドも変更しない。
+        そのため records はすべてメモリに載る（HTTP では LIMITS_MAX_IMPORT_BYTES でボディの大きさを制限する）。
+        
+        Args:
+            graph_name: グラフ名
+            records: export_threads が出力したレコード
+            blobs: レコードの blobs を取り込む保存先（Noneの場合は取り込まない）
+        
+        Returns:
+            インポートしたスレッド数
+        
+        Raises:
+            ValueError: レコードの形式が不正な場合
+        """
+        checkpointer = self._get_checkpointer(graph_name)
+        parsed = [self._parse_record(checkpointer, record) async for record in records]
+        for thread in parsed:
+            thread_id = thread["thread_id"]
+            # 同じスレッドIDの既存のスレッドは置き換える（古いチェックポイントからの参照も外す）
+            owner = thread_owner(checkpointer, thread_id)
+            await checkpointer.adelete_thread(thread_id)
+            self._release(checkpointer, thread_id, blobs)
+            for output in thread["tool_results"].values():
+                self.tool_results.put(output, owner)
+            if blobs is not None:
+                for data in thread["blobs"].values():
+                    blobs.put(data, owner)
+            for namespace, snapshot in thread["snapshots"].items():
+                checkpoint = snapshot["checkpoint"]
+                saved = await checkpointer.aput(
+                    {"configurable": {"thread_id": thread_id, "checkpoint_ns": namespace}},
+                    checkpoint,
+                    snapshot["metadata"],
+                    checkpoint["channel_versions"],
+                )
+                # 保留中の書き込み（中断した実行のうち完了していたタスクの出力）はタスクごとに復元する
+                writes: Dict[str, list] = {}
+                for task_id, channel, value in snapshot.get("writes") or ():
+                    writes.setdefault(task_id, []).append((channel, value))
+                for task_id, task_writes in writes.items():
+                    await checkpointer.aput_writes(saved, task_writes, task_id)
+        logger.info(f"Imported {len(parsed)} threads into graph '{graph_name}'")
+        return len(parsed)
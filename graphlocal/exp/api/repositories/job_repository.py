@@ -0,0 +1,149 @@
+# api/repositories/job_repository.py
+# ---------------------------------------------------------
+# バックグラウンドジョブの保存先（メモリ、ディレクトリを指定した場合はファイルにも保存）
+# ---------------------------------------------------------
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobRepository:
+    """
+    ジョブのレコードとイベントログを保持するリポジトリ
+
+    ディレクトリを指定した場合は <directory>/<job_id>.json（レコード）と
+    <directory>/<job_id>.ndjson（イベントログ、1行1イベント）に書き出し、
+    プロセスを再起動しても load() で読み戻せる。
+    イベントはメモリにすぐ追加し、ファイルには write_events でまとめて書き出す
+    （イベントループの外のスレッドから呼べる）。
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            directory: 保存先ディレクトリ（Noneの場合はメモリのみ）
+        """
+        self.directory = Path(directory) if directory else None
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, List[str]] = {}
+        self._files: Dict[str, IO[str]] = {}
+        # ファイルに書き出していないイベント（write_events を呼ぶスレッドと共有する）
+        self._pending: Dict[str, List[str]] = {}
+        self._file_lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        ディレクトリに保存されたジョブを読み込む
+
+        Returns:
+            読み込んだレコード（作成日時順）
+        """
+        if self.directory is None:
+            return []
+        for path in self.directory.glob("*.json"):
+            try:
+                record = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skip unreadable job record {path}: {e}")
+                continue
+            job_id = record["id"]
+            self._records[job_id] = record
+            events_path = self._events_path(job_id)
+            if events_path.is_file():
+                with events_path.open(encoding="utf-8") as f:
+                    self._events[job_id] = [line.rstrip("\n") for line in f if line.strip()]
+            else:
+                self._events[job_id] = []
+        return sorted(self._records.values(), key=lambda record: record["created_at"])
+
+    def save(self, record: Dict[str, Any]) -> None:
+        """レコードを保存（ファイルは書き込み途中で読まれないよう置き換える）"""
+        job_id = record["id"]
+        self._records[job_id] = record
+        self._events.setdefault(job_id, [])
+        if self.directory is not None:
+            path = self.directory / f"{job_id}.json"
+            tmp = path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """レコードを取得（存在しない場合はNone）"""
+        return self._records.get(job_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """全レコード"""
+        return list(self._records.values())
+
+    def append_event(self, job_id: str, event: str) -> int:
+        """
+        イベント（JSON文字列）を追記（ファイルへの書き出しは write_events で行う）
+
+        Returns:
+            追記したイベントの番号（0始まり）
+        """
+        events = self._events.setdefault(job_id, [])
+        events.append(event)
+        if self.directory is not None:
+            with self._file_lock:
+                self._pending.setdefault(job_id, []).append(event)
+        return len(events) - 1
+
+    def write_events(self, job_id: str) -> int:
+        """
+        書き出していないイベントをまとめてファイルに追記する（ブロッキングI/O）
+
+        Returns:
+            書き出したイベント数
+        """
+        with self._file_lock:
+            lines = self._pending.pop(job_id, None)
+            if not lines:
+                return 0
+            f = self._files.get(job_id)
+            if f is None:
+                f = self._files[job_id] = self._events_path(job_id).open("a", encoding="utf-8")
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            return len(lines)
+
+    def events(self, job_id: str, after: int = -1) -> List[str]:
+        """番号が after より大きいイベント"""
+        return self._events.get(job_id, [])[after + 1:]
+
+    def event_count(self, job_id: str) -> int:
+        """イベント数"""
+        return len(self._events.get(job_id, []))
+
+    def close_events(self, job_id: str) -> None:
+        """書き出していないイベントを書き出して、イベントログのファイルを閉じる（ジョブの終了時）"""
+        self.write_events(job_id)
+        with self._file_lock:
+            f = self._files.pop(job_id, None)
+            if f is not None:
+                f.close()
+
+    def delete(self, job_id: str) -> bool:
+        """ジョブを削除（存在しない場合はFalse）"""
+        with self._file_lock:
+            self._pending.pop(job_id, None)
+        self.close_events(job_id)
+        self._events.pop(job_id, None)
+        if self._records.pop(job_id, None) is None:
+            return False
+        if self.directory is not None:
+            (self.directory / f"{job_id}.json").unlink(missing_ok=True)
+            self._events_path(job_id).unlink(missing_ok=True)
+        return True
+
+    def _events_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.ndjson"
@@ -2,40 +2,74 @@
 # ---------------------------------------------------------
 # FastAPIルーター定義
 # ---------------------------------------------------------
-from typing import Annotated
+import hmac
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket
+from fastapi.responses import PlainTextResponse
+from starlette.requests import HTTPConnection
 
-from api.models import ChatRequest
+from api.container import Container
+from api.models import ChatRequest, ProfileScope
+from api.controllers.admin_controller import AdminController
 from api.controllers.chat_controller import ChatController
-from api.services.chat_service import ChatService
-from api.repositories.graph_repository import GraphRepository
+from api.controllers.health_controller import HealthController
+from api.controllers.job_controller import JobController
+from api.controllers.thread_controller import ThreadController
+from api.services.rate_limiter import client_identity
+from utils.metrics import get_metrics
 
-# リポジトリとサービスをグローバルに保持（app.pyで設定される）
-_graph_repository: GraphRepository | None = None
-_chat_service: ChatService | None = None
 
+def get_container(connection: HTTPConnection) -> Container:
+    """依存性コンテナを取得する（create_app の lifespan で app.state.container に設定される）"""
+    container = getattr(connection.app.state, "container", None)
+    if container is None:
+        raise RuntimeError("Container is not initialized. Create the app with create_app() and run its lifespan.")
+    return container
 
-def set_graph_repository(repository: GraphRepository):
-    """グラフリポジトリを設定する（app.pyから呼び出される）"""
-    global _graph_repository
-    _graph_repository = repository
 
+def get_chat_controller(connection: HTTPConnection) -> ChatController:
+    """チャットコントローラーを取得する依存性関数"""
+    return get_container(connection).chat_controller
 
-def get_chat_service() -> ChatService:
-    """チャットサービスを取得する依存性関数"""
-    global _graph_repository, _chat_service
-    if _chat_service is None:
-        if _graph_repository is None:
-            raise RuntimeError("GraphRepository is not initialized. Call set_graph_repository() first.")
-        _chat_service = ChatService(_graph_repository)
-    return _chat_service
 
+def get_job_controller(connection: HTTPConnection) -> JobController:
+    """ジョブコントローラーを取得する依存性関数"""
+    return get_container(connection).job_controller
 
-def get_chat_controller() -> ChatController:
-    """チャットコントローラーを取得する依存性関数"""
-    chat_service = get_chat_service()
-    return ChatController(chat_service)
+
+def get_thread_controller(connection: HTTPConnection) -> ThreadController:
+    """スレッドコントローラーを取得する依存性関数"""
+    return get_container(connection).thread_controller
+
+
+def get_admin_controller(connection: HTTPConnection) -> AdminController:
+    """管理用コントローラーを取得する依存性関数"""
+    return get_container(connection).admin_controller
+
+
+def get_health_controller(connection: HTTPConnection) -> HealthController:
+    """ヘルスチェックコントローラーを取得する依存性関数"""
+    return get_container(connection).health_controller
+
+
+def request_client(connection: HTTPConnection, api_key: Optional[str]) -> str:
+    """レート制限のクライアントID（RATE_LIMIT_TRUSTED_PROXIES からの接続は X-Forwarded-For の接続元を使う）"""
+    return client_identity(
+        api_key,
+        connection.client.host if connection.client else None,
+        connection.headers.get("x-forwarded-for"),
+        get_container(connection).settings.rate_limit.trusted_proxy_set,
+    )
+
+
+def require_admin_token(connection: HTTPConnection, x_admin_token: Annotated[Optional[str], Header()] = None):
+    """管理用トークンを検証する依存性関数（ADMIN_TOKEN 未設定の場合は管理用エンドポイントを公開しない）"""
+    token = get_container(connection).settings.admin.token
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=401, detail="管理用トークンが不正です")
 
 
 # ========= Router =========
@@ -47,8 +81,11 @@ router = APIRouter(
 @router.post("/chat", response_model=None)
 async def chat(
     request: ChatRequest,
+    http_request: Request,
     controller: Annotated[ChatController, Depends(get_chat_controller)],
-    graph_name: str = "default"
+    graph_name: str = "default",
+    x_api_key: Annotated[Optional[str], Header()] = None,
+    accept_encoding: Annotated[Optional[str], Header()] = None
 ):
     """
     チャットエンドポイント（SSEストリーミング）
@@ -57,9 +94,255 @@ async def chat(
         request: チャットリクエスト
         controller: チャットコントローラー
         graph_name: 使用するグラフ名（デフォルト: "default"）
+        x_api_key: APIキー（bulk用のキーの場合は bulk レーンで実行）
+        accept_encoding: 対応する圧縮形式（gzip / br の場合はイベントを圧縮して送る）
+    
+    クライアント（APIキー、なければ接続元アドレス）ごと・スレッドごとにレート制限し、
+    超えた場合は429（Retry-After 付き）を返す。
     
     Body例:
-      {"input":"tool: LangGraph streaming"}      # thread_id 未指定OK（自動採番）
+      {"input":"tool: LangGraph streaming"}      # thread_id 未指定ならチェックポイントなしで実行
       {"input":"こんにちは","thread_id":"t2"}      # 指定も可
+      {"input":"評価用","priority":"bulk"}        # バッチ・評価用はbulkレーン
+      {"input":"保存する","stateless":false}       # thread_id 未指定でもスレッドを採番して保存
+    """
+    client = request_client(http_request, x_api_key)
+    return await controller.chat(
+        request,
+        graph_name=graph_name,
+        api_key=x_api_key,
+        accept_encoding=accept_encoding,
+        client=client,
+    )
+
+
+@router.websocket("/ws")
+async def chat_ws(
+    websocket: WebSocket,
+    controller: Annotated[ChatController, Depends(get_chat_controller)],
+    graph_name: str = "default",
+):
+    """
+    チャットエンドポイント（WebSocket）
+    
+    1接続で複数スレッドのターンを並行に実行し、イベントはスレッドID（"t"）付きで返す。
+    
+    フレーム例:
+      {"t":"t1","input":"tool: LangGraph streaming"}  ->  {"t":"t1","ch":"session",...} ... {"t":"t1","ch":"end"}
+    """
+    api_key = websocket.headers.get("x-api-key")
+    client = request_client(websocket, api_key)
+    await controller.chat_ws(websocket, graph_name=graph_name, api_key=api_key, client=client)
+
+
+@router.post("/jobs", response_model=None)
+async def submit_job(
+    request: ChatRequest,
+    http_request: Request,
+    controller: Annotated[JobController, Depends(get_job_controller)],
+    graph_name: str = "default",
+    x_api_key: Annotated[Optional[str], Header()] = None,
+):
+    """
+    グラフ実行をバックグラウンドジョブとして登録（ジョブIDをすぐに返す）
+    
+    Body は /chat と同じ。priority 未指定の場合は bulk レーンで実行する。
+    
+    例:
+      curl -X POST localhost:8000/jobs -d '{"input":"tool: deep research"}'  ->  202 {"id":"...","status":"queued",...}
+    """
+    client = request_client(http_request, x_api_key)
+    return await controller.submit(request, graph_name=graph_name, client=client)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    controller: Annotated[JobController, Depends(get_job_controller)],
+):
+    """ジョブの状態（status / result / error / 記録したイベント数）"""
+    return await controller.get_job(job_id)
+
+
+@router.get("/jobs/{job_id}/events", response_model=None)
+async def job_events(
+    job_id: str,
+    controller: Annotated[JobController, Depends(get_job_controller)],
+    after: Annotated[Optional[int], Query(ge=-1)] = None,
+    last_event_id: Annotated[Optional[str], Header()] = None,
+):
+    """
+    ジョブのイベントをSSEで取得（記録済みのイベントから始め、ジョブが終了するまで続ける）
+    
+    Args:
+        after: この番号より後のイベントから返す（未指定の場合は Last-Event-ID、なければ最初から）
+        last_event_id: 再接続時に EventSource が送る最後に受け取ったイベント番号
+    """
+    if after is None:
+        after = int(last_event_id) if last_event_id and last_event_id.isdigit() else -1
+    return await controller.events(job_id, after=after)
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(
+    job_id: str,
+    controller: Annotated[JobController, Depends(get_job_controller)],
+):
+    """実行中・待機中のジョブを中断"""
+    return await controller.cancel(job_id)
+
+
+@router.delete("/jobs/{job_id}")
+async def delete_job(
+    job_id: str,
+    controller: Annotated[JobController, Depends(get_job_controller)],
+):
+    """終了したジョブを削除"""
+    return await controller.delete(job_id)
+
+
+@router.get("/metrics")
+async def metrics():
+    """プロセス内メトリクス（レーン別の待ち時間・レイテンシなど）"""
+    return get_metrics().snapshot()
+
+
+@router.get("/healthz")
+async def healthz(controller: Annotated[HealthController, Depends(get_health_controller)]):
+    """ライブネス（プロセスが応答できるか）"""
+    return await controller.liveness()
+
+
+@router.get("/readyz", response_model=None)
+async def readyz(controller: Annotated[HealthController, Depends(get_health_controller)]):
     """
-    return await controller.chat(request, graph_name=graph_name)
+    レディネス（グラフのウォームアップが終わり、ドレイン中でも飽和してもいないか）
+
+    ready でない場合は503と理由を返す。
+    """
+    return await controller.readiness()
+
+
+@router.get("/saturation")
+async def saturation(controller: Annotated[HealthController, Depends(get_health_controller)]):
+    """飽和度（実行中のストリーム、スケジューラーの待ち数、イベントループの遅延、チェックポインターの大きさ）"""
+    return await controller.saturation()
+
+
+@router.get("/admin/memory", dependencies=[Depends(require_admin_token)])
+async def admin_memory(
+    controller: Annotated[AdminController, Depends(get_admin_controller)],
+    top: Annotated[int, Query(ge=1, le=1000)] = 10,
+    allocations: bool = False,
+):
+    """
+    メモリ使用状況（グラフ・スレッドごとのチェックポイント数と概算バイト数）
+    
+    allocations=true の場合は tracemalloc の前回の呼び出しからの差分を含める（初回はトレースを開始）。
+    """
+    return await controller.memory(top=top, allocations=allocations)
+
+
+@router.delete("/admin/memory/allocations", dependencies=[Depends(require_admin_token)])
+async def admin_stop_allocations(
+    controller: Annotated[AdminController, Depends(get_admin_controller)],
+):
+    """tracemalloc のトレースを停止"""
+    return await controller.stop_allocations()
+
+
+@router.get("/admin/loop", dependencies=[Depends(require_admin_token)])
+async def admin_loop(
+    controller: Annotated[AdminController, Depends(get_admin_controller)],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 20,
+):
+    """
+    イベントループの遅延と、ループをブロックした直近のコールバック（実行中だったコルーチンと実行位置）
+    
+    LOOP_MONITOR_DEBUG=true の場合はブロック中のスタックのサンプルを含める。
+    """
+    return await controller.loop(limit=limit)
+
+
+@router.get("/admin/profile", dependencies=[Depends(require_admin_token)], response_class=PlainTextResponse)
+async def admin_profile(
+    controller: Annotated[AdminController, Depends(get_admin_controller)],
+    seconds: Annotated[float, Query(gt=0, le=600)] = 10.0,
+    scope: ProfileScope = "graph",
+):
+    """
+    応答したワーカーを seconds 秒（PROFILER_MAX_SECONDS まで）サンプリングし、flamegraph の collapsed 形式で返す
+    
+    scope=graph の場合は stream_execution とノード関数を起点とするスタックのみ、all の場合はすべてのスレッド。
+    """
+    return await controller.profile(seconds=seconds, scope=scope)
+
+
+@router.get("/threads/export", dependencies=[Depends(require_admin_token)], response_model=None)
+async def export_threads(
+    controller: Annotated[ThreadController, Depends(get_thread_controller)],
+    graph_name: str = "default",
+    thread_id: Annotated[Optional[list[str]], Query()] = None,
+    drain: bool = False,
+    accept_encoding: Annotated[Optional[str], Header()] = None,
+):
+    """
+    スレッドの最新チェックポイントをNDJSONでエクスポート
+    
+    Args:
+        graph_name: 対象グラフ名
+        thread_id: 対象スレッドID（複数指定可、未指定の場合は全スレッド）
+        drain: Trueの場合、エクスポートしたスレッドを削除する（ワーカーの退避用）
+        accept_encoding: 対応する圧縮形式（gzip / br の場合は圧縮して送る）
+    """
+    return await controller.export_threads(graph_name, thread_id, drain=drain, accept_encoding=accept_encoding)
+
+
+@router.post("/threads/import", dependencies=[Depends(require_admin_token)])
+async def import_threads(
+    request: Request,
+    controller: Annotated[ThreadController, Depends(get_thread_controller)],
+    graph_name: str = "default",
+):
+    """
+    /threads/export の出力（NDJSON）をインポート
+    
+    例:
+      curl -s localhost:8000/threads/export | curl -X POST --data-binary @- localhost:8001/threads/import
+    """
+    return await controller.import_threads(request, graph_name)
+
+
+@router.get("/threads/{thread_id}", dependencies=[Depends(require_admin_token)])
+async def get_thread(
+    thread_id: str,
+    controller: Annotated[ThreadController, Depends(get_thread_controller)],
+    graph_name: str = "default",
+):
+    """スレッドの最新状態を取得"""
+    return await controller.get_thread(thread_id, graph_name)
+
+
+@router.get("/blobs/{blob_id}", dependencies=[Depends(require_admin_token)], response_model=None)
+async def get_blob(
+    blob_id: str,
+    controller: Annotated[ThreadController, Depends(get_thread_controller)],
+):
+    """
+    退避した入力の全文を取得
+    
+    LIMITS_INLINE_INPUT_CHARS より長い入力は、スレッドの状態には先頭のみを残し、
+    メッセージの "blob" にこのエンドポイントで取得する全文のIDを入れる。
+    ユーザーの入力そのものなので、スレッドの取得と同じく管理用トークンを必要とする。
+    """
+    return await controller.get_blob(blob_id)
+
+
+@router.delete("/threads/{thread_id}", dependencies=[Depends(require_admin_token)])
+async def delete_thread(
+    thread_id: str,
+    controller: Annotated[ThreadController, Depends(get_thread_controller)],
+    graph_name: str = "default",
+):
+    """スレッドの全チェックポイントを削除"""
+    return await controller.delete_thread(thread_id, graph_name)
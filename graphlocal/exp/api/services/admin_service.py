@@ -0,0 +1,92 @@
+# api/services/admin_service.py
+# ---------------------------------------------------------
+# 管理用サービス（メモリ使用状況・イベントループの診断）
+# ---------------------------------------------------------
+import logging
+import sys
+from typing import Any, Dict, Optional
+
+from api.repositories.graph_repository import GraphRepository
+from utils.loop_lag import LoopLagMonitor, SlowCallbackDetector
+from utils.memory import AllocationTracker
+
+logger = logging.getLogger(__name__)
+
+
+def _max_rss_bytes() -> Optional[int]:
+    """プロセスの最大常駐メモリ（取得できない場合はNone）"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux はKB、macOS はバイト単位
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class AdminService:
+    """メモリ使用状況・イベントループの診断を担当するサービス"""
+    
+    def __init__(
+        self,
+        graph_repository: GraphRepository,
+        allocations: AllocationTracker,
+        loop_monitor: Optional[LoopLagMonitor] = None,
+        slow_callbacks: Optional[SlowCallbackDetector] = None,
+    ):
+        """
+        初期化
+        
+        Args:
+            graph_repository: グラフリポジトリ
+            allocations: メモリ割り当てのトラッカー
+            loop_monitor: イベントループの遅延の計測
+            slow_callbacks: イベントループをブロックしたコールバックの検出
+        """
+        self.graph_repo = graph_repository
+        self.allocations = allocations
+        self.loop_monitor = loop_monitor
+        self.slow_callbacks = slow_callbacks
+    
+    def memory_report(self, top: int = 10, allocations: bool = False) -> Dict[str, Any]:
+        """
+        メモリ使用状況のレポートを作成
+        
+        Args:
+            top: 返す最大スレッド数・割り当て元の数
+            allocations: Trueの場合、tracemalloc の前回からの差分を含める（初回はトレースを開始）
+        
+        Returns:
+            グラフ・スレッドごとの集計、プロセスの最大常駐メモリ、割り当ての差分
+        """
+        report = self.graph_repo.memory_stats(top=top)
+        report["process"] = {"max_rss_bytes": _max_rss_bytes()}
+        if allocations:
+            report["allocations"] = self.allocations.diff(top=top)
+        return report
+    
+    def stop_allocation_tracking(self) -> Dict[str, Any]:
+        """tracemalloc のトレースを停止"""
+        was_tracing = self.allocations.tracing
+        self.allocations.stop()
+        return {"stopped": was_tracing}
+    
+    def loop_report(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        イベントループの遅延と、ループをブロックした直近のコールバック
+        
+        Args:
+            limit: 返す最大件数
+        
+        Returns:
+            {"lag", "max_lag", "threshold", "debug", "slow_callbacks": 新しい順}
+        """
+        report: Dict[str, Any] = {"lag": None, "max_lag": None, "threshold": None, "debug": False, "slow_callbacks": []}
+        if self.loop_monitor is not None:
+            report["lag"] = round(self.loop_monitor.lag, 6)
+            report["max_lag"] = round(self.loop_monitor.max_lag, 6)
+        if self.slow_callbacks is not None:
+            report["threshold"] = self.slow_callbacks.threshold
+            report["debug"] = self.slow_callbacks.debug
+            report["slow_callbacks"] = [slow.to_dict() for slow in self.slow_callbacks.recent(limit)]
+        return report
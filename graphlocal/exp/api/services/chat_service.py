@@ -2,15 +2,20 @@
 # ---------------------------------------------------------
 # チャットサービス（ビジネスロジック）
 # ---------------------------------------------------------
+import asyncio
 import logging
-from typing import AsyncIterator
+from contextlib import nullcontext
+from typing import AsyncIterator, Optional, Tuple
 from uuid import uuid4
 
-from langchain_core.messages import HumanMessage
-
+from graph.messages import BLOB_KEY
 from graph.state import StepType, GraphState
+from graph.resilience import DEADLINE_KEY, make_deadline
 from api.models import ChatRequest
+from api.repositories.blob_repository import BlobRepository
 from api.repositories.graph_repository import GraphRepository
+from api.services.lane_scheduler import Lane, LaneScheduler
+from api.services.stream_tracker import ServiceDraining, StreamTracker
 from utils.serializers import to_jsonable, dump_json
 
 logger = logging.getLogger(__name__)
@@ -19,27 +24,111 @@ logger = logging.getLogger(__name__)
 class ChatService:
     """チャット関連のビジネスロジックを担当するサービス"""
     
-    def __init__(self, graph_repository: GraphRepository):
+    def __init__(
+        self,
+        graph_repository: GraphRepository,
+        scheduler: Optional[LaneScheduler] = None,
+        tracker: Optional[StreamTracker] = None,
+        stateless_without_thread: bool = False,
+        blob_repository: Optional[BlobRepository] = None,
+        inline_input_chars: int = 0,
+    ):
         """
         初期化
         
         Args:
             graph_repository: グラフリポジトリ
+            scheduler: レーンスケジューラー（Noneの場合は同時実行数を制限しない）
+            tracker: 実行中ストリームの追跡（シャットダウン時のドレイン用）
+            stateless_without_thread: thread_id のないリクエストをチェックポイントなしで実行する
+            blob_repository: 大きな入力の退避先（Noneの場合は退避しない）
+            inline_input_chars: これより長い入力はブロブに退避し、状態には先頭のみを残す（0の場合は退避しない）
         """
         self.graph_repo = graph_repository
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self.stateless_without_thread = stateless_without_thread
+        self.blob_repo = blob_repository
+        self.inline_input_chars = inline_input_chars
+    
+    @property
+    def accepting(self) -> bool:
+        """新しいチャットを受け付けるか（シャットダウンのドレイン中はFalse）"""
+        return self.tracker is None or not self.tracker.draining
+    
+    def prepare_request(self, request: ChatRequest) -> ChatRequest:
+        """
+        実行モードとスレッドIDを確定したリクエストを返す
+        
+        ステートレスの場合は thread_id をそのまま（未指定ならNone）にし、
+        そうでない場合は未指定の thread_id を採番する。確定済みのリクエストはそのまま返す。
+        
+        Args:
+            request: チャットリクエスト
+        
+        Returns:
+            stateless が True / False に確定したリクエスト
+        """
+        stateless = request.stateless
+        if stateless is None:
+            stateless = request.thread_id is None and self.stateless_without_thread
+        if stateless:
+            return request if request.stateless else request.model_copy(update={"stateless": True})
+        if request.stateless is False and request.thread_id is not None:
+            return request
+        return request.model_copy(update={"stateless": False, "thread_id": request.thread_id or str(uuid4())})
+    
+    def offload_input(
+        self, input_text: str, graph_name: str = "default", thread_id: Optional[str] = None
+    ) -> Tuple[str, Optional[str]]:
+        """
+        inline_input_chars より長い入力の全文をブロブに退避する
+        
+        ブロブはスレッドから参照され、スレッドの削除（drain=true のエクスポートを含む）で参照が外れる。
+        スレッドがない場合（ステートレス）は参照する状態が残らないので退避しない。
+        
+        Args:
+            input_text: ユーザー入力テキスト
+            graph_name: グラフ名
+            thread_id: 入力を保存するスレッドID
+        
+        Returns:
+            (状態に残す入力, ブロブID（退避しない場合はNone）)
+        """
+        limit = self.inline_input_chars
+        if self.blob_repo is None or not 0 < limit < len(input_text):
+            return input_text, None
+        blob_id = None
+        if thread_id is not None:
+            try:
+                owner = self.graph_repo.thread_owner(graph_name, thread_id)
+            except ValueError:
+                # チェックポインターのないグラフ（状態が残らない）
+                owner = None
+            if owner is not None:
+                blob_id = self.blob_repo.put(input_text.encode("utf-8"), owner)
+        return input_text[:limit] + "…", blob_id
     
-    def _create_initial_state(self, input_text: str) -> GraphState:
+    def _create_initial_state(
+        self, input_text: str, graph_name: str = "default", thread_id: Optional[str] = None
+    ) -> GraphState:
         """
-        初期状態を作成
+        初期状態を作成（長い入力は先頭のみをノード・チェックポイントに渡し、全文はブロブから参照する）
         
         Args:
             input_text: ユーザー入力テキスト
+            graph_name: グラフ名
+            thread_id: スレッドID（ステートレスの場合はNone）
         
         Returns:
             初期状態
         """
+        from langchain_core.messages import HumanMessage
+        
+        content, blob_id = self.offload_input(input_text, graph_name, thread_id)
+        additional_kwargs = {BLOB_KEY: blob_id} if blob_id is not None else {}
         return {
-            "messages": [HumanMessage(content=input_text)],
+            "messages": [HumanMessage(content=content, additional_kwargs=additional_kwargs)],
             "step": StepType.IDLE
         }
     
@@ -60,59 +149,112 @@ class ChatService:
         else:
             return {"ch": "raw", "data": to_jsonable(event)}
     
-    async def process_chat_stream(
+    @staticmethod
+    def encode_event(event: dict) -> str:
+        """
+        クライアント向けイベントをJSON文字列に変換
+        
+        Args:
+            event: クライアント向けイベント（stream_events の出力）
+        
+        Returns:
+            JSON文字列（変換できない場合はエラーイベント）
+        """
+        try:
+            return dump_json(event)
+        except Exception as e:
+            logger.error(f"Error serializing event: {e}", exc_info=True)
+            return dump_json({
+                "ch": "error",
+                "data": {"message": f"シリアライゼーションエラー: {str(e)}"}
+            })
+    
+    async def stream_events(
         self,
         request: ChatRequest,
-        graph_name: str = "default"
-    ) -> AsyncIterator[bytes]:
+        graph_name: str = "default",
+        lane: str = Lane.INTERACTIVE
+    ) -> AsyncIterator[dict]:
         """
-        チャット処理をストリーミング形式で実行
+        チャット処理を実行し、クライアント向けイベントを順に返す（トランスポート非依存）
         
         Args:
             request: チャットリクエスト
             graph_name: 使用するグラフ名（デフォルト: "default"）
+            lane: 実行レーン（スケジューラーの待ち行列）
         
         Yields:
-            SSE形式のバイトデータ
+            {"ch": チャネル名, "data": データ} 形式のイベント
         """
-        thread_id = request.thread_id or str(uuid4())
-        initial_state = self._create_initial_state(request.input)
+        request = self.prepare_request(request)
+        thread_id = request.thread_id
+        initial_state = self._create_initial_state(
+            request.input, graph_name, thread_id if not request.stateless else None
+        )
+        config = {"thread_id": thread_id} if thread_id is not None else {}
+        deadline = make_deadline(request.timeout)
+        if deadline is not None:
+            # リクエストのデッドラインをグラフの各ノードに伝播
+            config[DEADLINE_KEY] = deadline
         
         # セッション情報を最初に通知
-        session_data = dump_json({"ch": "session", "data": {"thread_id": thread_id}})
-        yield f"data: {session_data}\n\n".encode()
+        yield {"ch": "session", "data": {"thread_id": thread_id, "stateless": request.stateless}}
         
+        handle = None
         try:
-            async for event in self.graph_repo.stream_execution(
-                graph_name=graph_name,
-                initial_state=initial_state,
-                config={"thread_id": thread_id}
-            ):
-                logger.debug(f"Graph event: {event}")
-                try:
-                    transformed = self._transform_event(event)
-                    event_data = dump_json(transformed)
-                    yield f"data: {event_data}\n\n".encode()
-                except Exception as e:
-                    logger.error(f"Error serializing event: {e}", exc_info=True)
-                    error_data = dump_json({
-                        "ch": "error",
-                        "data": {"message": f"シリアライゼーションエラー: {str(e)}"}
-                    })
-                    yield f"data: {error_data}\n\n".encode()
+            with self.tracker.track() if self.tracker else nullcontext() as handle:
+                slot = self.scheduler.slot(lane) if self.scheduler else nullcontext()
+                async with slot:
+                    async for event in self.graph_repo.stream_execution(
+                        graph_name=graph_name,
+                        initial_state=initial_state,
+                        config=config,
+                        stateless=request.stateless,
+                        event_filter=request.events
+                    ):
+                        logger.debug(f"Graph event: {event}")
+                        try:
+                            yield self._transform_event(event)
+                        except Exception as e:
+                            logger.error(f"Error serializing event: {e}", exc_info=True)
+                            yield {
+                                "ch": "error",
+                                "data": {"message": f"シリアライゼーションエラー: {str(e)}"}
+                            }
+        except asyncio.CancelledError:
+            if handle is None or not handle.killed:
+                raise
+            # ドレインの期限を過ぎて中断された場合は、クライアントに理由を通知して終了する
+            asyncio.current_task().uncancel()
+            logger.warning(f"Stream killed by shutdown: thread_id={thread_id}")
+            yield {"ch": "error", "data": {"message": "サーバーの停止により中断しました"}}
+        except ServiceDraining as e:
+            yield {"ch": "error", "data": {"message": f"サーバーを停止しています: {str(e)}"}}
         except ValueError as e:
             # グラフが見つからない場合
             logger.error(f"Graph execution error: {e}", exc_info=True)
-            error_data = dump_json({
-                "ch": "error",
-                "data": {"message": str(e)}
-            })
-            yield f"data: {error_data}\n\n".encode()
+            yield {"ch": "error", "data": {"message": str(e)}}
         except Exception as e:
             # その他のエラー
             logger.error(f"Streaming error: {e}", exc_info=True)
-            error_data = dump_json({
-                "ch": "error",
-                "data": {"message": f"ストリーミングエラー: {str(e)}"}
-            })
-            yield f"data: {error_data}\n\n".encode()
+            yield {"ch": "error", "data": {"message": f"ストリーミングエラー: {str(e)}"}}
+    
+    async def process_chat_stream(
+        self,
+        request: ChatRequest,
+        graph_name: str = "default",
+        lane: str = Lane.INTERACTIVE
+    ) -> AsyncIterator[bytes]:
+        """
+        チャット処理をストリーミング形式で実行
+        
+        Args:
+            request: チャットリクエスト
+            graph_name: 使用するグラフ名（デフォルト: "default"）
+            lane: 実行レーン（スケジューラーの待ち行列）
+        
+        Yields:
+            SSE形式のバイトデータ
+        """
+        async for event in self.stream_events(request, graph_name, lane=lane):
+            yield f"data: {self.encode_event(event)}\n\n".encode()
@@ -0,0 +1,236 @@
+# api/services/health_service.py
+# ---------------------------------------------------------
+# ヘルスサービス（ウォームアップ・レディネスの判定・飽和度）
+# ---------------------------------------------------------
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from api.repositories.graph_repository import GraphRepository
+from api.services.lane_scheduler import LaneScheduler
+from api.services.stream_tracker import StreamTracker
+from config import HealthConfig
+from graph.state import StepType
+from utils.loop_lag import LoopLagMonitor
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupStatus:
+    """ウォームアップの状態定数"""
+    PENDING = "pending"
+    WARM = "warm"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class GraphWarmup:
+    """グラフのウォームアップの結果"""
+    status: str
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+    # 実行した回数（やり直しを含む）
+    attempts: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換（未設定の項目は含めない）"""
+        data: Dict[str, Any] = {"status": self.status}
+        if self.seconds is not None:
+            data["seconds"] = round(self.seconds, 4)
+        if self.error is not None:
+            data["error"] = self.error
+        if self.attempts > 1:
+            data["attempts"] = self.attempts
+        return data
+
+
+class HealthService:
+    """
+    ワーカーが新しいリクエストを受けられるかを判定するサービス
+
+    起動時にバックグラウンドで各グラフを1回ステートレス実行し（初回の実行で読み込まれる
+    モジュールやノードの初期化を済ませる）、すべてのグラフが終わるまでは ready にしない。
+    失敗したグラフは待ち時間を延ばしながら HEALTH_WARMUP_RETRIES 回までやり直す。
+    ドレイン中、または実行中のストリーム数・待ち数・イベントループの遅延が上限を超えている間も
+    ready にしない。
+    """
+
+    def __init__(
+        self,
+        graph_repository: GraphRepository,
+        tracker: StreamTracker,
+        scheduler: LaneScheduler,
+        loop_monitor: LoopLagMonitor,
+        config: HealthConfig,
+    ):
+        """
+        初期化
+
+        Args:
+            graph_repository: グラフリポジトリ
+            tracker: 実行中ストリームの追跡
+            scheduler: レーンスケジューラー
+            loop_monitor: イベントループの遅延の計測
+            config: ヘルスチェックの設定
+        """
+        self.graph_repo = graph_repository
+        self.tracker = tracker
+        self.scheduler = scheduler
+        self.loop_monitor = loop_monitor
+        self.config = config
+        self._warmups: Dict[str, GraphWarmup] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        # /saturation のチェックポインターの大きさ（計算した時刻と結果）
+        self._checkpointer_stats: Optional[Dict[str, Any]] = None
+        self._checkpointer_stats_at = 0.0
+        self._started_at = time.monotonic()
+        get_metrics().set_gauge("streams.in_flight", lambda: self.tracker.active)
+
+    async def start(self) -> None:
+        """イベントループの遅延の計測と、グラフのウォームアップを始める（ウォームアップの完了は待たない）"""
+        self._started_at = time.monotonic()
+        self.loop_monitor.start()
+        if not self.config.warmup:
+            for name in self.graph_repo.list_graphs():
+                self._warmups[name] = GraphWarmup(WarmupStatus.SKIPPED)
+            return
+        for name in self.graph_repo.list_graphs():
+            self._warmups[name] = GraphWarmup(WarmupStatus.PENDING)
+        self._warmup_task = asyncio.ensure_future(self.warm_up())
+
+    async def stop(self) -> None:
+        """ウォームアップと計測を止める"""
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except asyncio.CancelledError:
+                pass
+        await self.loop_monitor.stop()
+
+    async def warm_up(self) -> Dict[str, GraphWarmup]:
+        """
+        登録されているグラフを順に1回ずつステートレス実行する（スレッドは残さない）
+
+        失敗したグラフは、すべてのグラフを1回ずつ実行した後に待ち時間を延ばしながらやり直す。
+
+        Returns:
+            グラフ名とウォームアップの結果の対応
+        """
+        pending = self.graph_repo.list_graphs()
+        delay = self.config.warmup_backoff
+        for attempt in range(1, self.config.warmup_retries + 2):
+            pending = [name for name in pending if not await self._warm_up_graph(name, attempt)]
+            if not pending or attempt > self.config.warmup_retries:
+                break
+            logger.info(f"Retrying warmup of {pending} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.config.warmup_max_backoff)
+        return dict(self._warmups)
+
+    async def _warm_up_graph(self, name: str, attempt: int) -> bool:
+        """グラフを1回ステートレス実行して結果を記録する（成功した場合はTrue）"""
+        from langchain_core.messages import HumanMessage
+
+        started = time.perf_counter()
+        initial_state = {"messages": [HumanMessage(content=self.config.warmup_input)], "step": StepType.IDLE}
+        try:
+            async with asyncio.timeout(self.config.warmup_timeout):
+                async for _ in self.graph_repo.stream_execution(name, initial_state, stateless=True):
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Warmup of graph '{name}' failed (attempt {attempt}): {e}", exc_info=True)
+            self._warmups[name] = GraphWarmup(
+                WarmupStatus.FAILED, time.perf_counter() - started, str(e) or type(e).__name__, attempt
+            )
+            return False
+        self._warmups[name] = GraphWarmup(WarmupStatus.WARM, time.perf_counter() - started, attempts=attempt)
+        logger.info(f"Graph '{name}' warmed up in {self._warmups[name].seconds:.3f}s")
+        return True
+
+    def liveness(self) -> Dict[str, Any]:
+        """プロセスが応答できること（イベントループが動いていること）を返す"""
+        return {"status": "ok", "uptime": round(time.monotonic() - self._started_at, 3)}
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        新しいリクエストを受けられるかを判定
+
+        Returns:
+            {"ready": 判定, "reasons": ready でない理由, "graphs": グラフごとのウォームアップの結果,
+             "in_flight": 実行中のストリーム数, "queued": 待ち数, "loop_lag": 直近の遅延の最大値}
+        """
+        reasons: List[str] = []
+        graphs = {}
+        for name in self.graph_repo.list_graphs():
+            warmup = self._warmups.get(name, GraphWarmup(WarmupStatus.PENDING))
+            graphs[name] = warmup.to_dict()
+            if warmup.status not in (WarmupStatus.WARM, WarmupStatus.SKIPPED):
+                reasons.append(f"graph '{name}' is {warmup.status}")
+        if self.tracker.draining:
+            reasons.append("draining")
+        in_flight = self.tracker.active
+        if 0 < self.config.max_in_flight <= in_flight:
+            reasons.append(f"in-flight streams {in_flight} >= {self.config.max_in_flight}")
+        queued = self._queued()
+        if 0 < self.config.max_queued <= queued:
+            reasons.append(f"queued executions {queued} >= {self.config.max_queued}")
+        loop_lag = self.loop_monitor.max_lag
+        if 0 < self.config.max_loop_lag < loop_lag:
+            reasons.append(f"event loop lag {loop_lag:.3f}s > {self.config.max_loop_lag}s")
+        return {
+            "ready": not reasons,
+            "reasons": reasons,
+            "graphs": graphs,
+            "in_flight": in_flight,
+            "queued": queued,
+            "loop_lag": round(loop_lag, 6),
+        }
+
+    def saturation(self) -> Dict[str, Any]:
+        """
+        オートスケーラー向けの飽和度
+
+        Returns:
+            実行中のストリーム、スケジューラーのスロットと待ち数、イベントループの遅延、
+            チェックポインターのスレッド数・バイト数（HEALTH_SATURATION_CACHE_SECONDS ごとに計算）
+        """
+        memory = self._memory_stats()
+        return {
+            "streams": {"in_flight": self.tracker.active, "draining": self.tracker.draining},
+            "scheduler": {
+                "active": self.scheduler.active,
+                "max_concurrency": self.scheduler.max_concurrency,
+                "utilization": round(self.scheduler.active / self.scheduler.max_concurrency, 4),
+                "queued": {lane: self.scheduler.queued(lane) for lane in self.scheduler.weights},
+            },
+            "loop": {"lag": round(self.loop_monitor.lag, 6), "max_lag": round(self.loop_monitor.max_lag, 6)},
+            "checkpointer": {
+                "graphs": memory["graphs"],
+                "total_bytes": memory["total_bytes"],
+                "tool_results": memory["tool_results"],
+            },
+        }
+
+    def _memory_stats(self) -> Dict[str, Any]:
+        """
+        チェックポインターの大きさ
+
+        全スレッドのチェックポイントを走査するので、認証なしで頻繁に呼ばれる /saturation では
+        HEALTH_SATURATION_CACHE_SECONDS の間は前回の結果を返す。
+        """
+        now = time.monotonic()
+        if self._checkpointer_stats is None or now - self._checkpointer_stats_at >= self.config.saturation_cache_seconds:
+            self._checkpointer_stats = self.graph_repo.memory_stats(top=0)
+            self._checkpointer_stats_at = now
+        return self._checkpointer_stats
+
+    def _queued(self) -> int:
+        """全レーンの待ち数"""
+        return sum(self.scheduler.queued(lane) for lane in self.scheduler.weights)
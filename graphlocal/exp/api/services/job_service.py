@@ -0,0 +1,354 @@
+# api/services/job_service.py
+# ---------------------------------------------------------
+# バックグラウンドジョブ（接続から切り離したグラフ実行と、イベントの再取得）
+# ---------------------------------------------------------
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from api.models import ChatRequest
+from api.repositories.job_repository import JobRepository
+from api.services.chat_service import ChatService
+from api.services.lane_scheduler import Lane
+from config import JobConfig
+from utils.metrics import MetricsRegistry, get_metrics
+from utils.serializers import to_jsonable
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    """ジョブの状態"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINISHED = frozenset({SUCCEEDED, FAILED, CANCELLED})
+
+
+class JobQueueFull(RuntimeError):
+    """待ち行列が上限に達している"""
+
+
+class JobService:
+    """
+    グラフ実行をバックグラウンドのワーカーで行うサービス
+
+    submit はジョブIDをすぐに返し、max_workers 個のワーカーが待ち行列から順に実行する。
+    イベントはリポジトリに番号付きで記録するので、クライアントは切断しても
+    events(after=最後に受け取った番号) で続きから受け取れる。
+    """
+
+    def __init__(
+        self,
+        chat_service: ChatService,
+        repository: JobRepository,
+        config: JobConfig,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            chat_service: チャットサービス（グラフの実行とイベントの変換）
+            repository: ジョブの保存先
+            config: ジョブ設定
+            metrics: ジョブ数の記録先（Noneの場合はデフォルトレジストリ）
+        """
+        self.chat_service = chat_service
+        self.repository = repository
+        self.config = config
+        self.metrics = metrics or get_metrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: Set[str] = set()
+        # ジョブごとの「イベントが増えた・終了した」通知（待つたびに作り直す）
+        self._changed: Dict[str, asyncio.Event] = {}
+        # ジョブごとのイベントログの書き出し（スレッドで実行中のもの）
+        self._writes: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.metrics.set_gauge("jobs.queued", lambda: self._queue.qsize() if self._queue else 0)
+        self.metrics.set_gauge("jobs.running", lambda: len(self._running))
+
+    async def start(self) -> None:
+        """
+        保存済みのジョブを読み込み、ワーカーを起動する
+
+        前回の停止時に待ち行列にあったジョブは実行し直し、実行中だったジョブは失敗として記録する
+        （同じ入力をもう一度スレッドに追加しないよう、途中から再実行はしない）。
+        """
+        for record in self.repository.load():
+            if record["status"] == JobStatus.RUNNING:
+                self._finish(record, JobStatus.FAILED, error="サーバーの再起動により中断しました")
+        self._ensure_workers()
+
+    async def stop(self) -> None:
+        """ワーカーを停止する（実行中のジョブは中断として記録する）"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _ensure_workers(self) -> None:
+        """現在のイベントループでワーカーを起動する（起動済みなら何もしない）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        # 別のイベントループで待っていたジョブ（テストクライアントの作り直しなど）を引き継ぐ
+        self._queue = asyncio.Queue()
+        for record in self.repository.list():
+            if record["status"] == JobStatus.QUEUED:
+                self._queue.put_nowait(record["id"])
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.config.max_workers)]
+
+    async def submit(self, request: ChatRequest, graph_name: str = "default", lane: str = Lane.BULK) -> Dict[str, Any]:
+        """
+        ジョブを登録する
+
+        Raises:
+            ValueError: グラフが見つからない場合
+            JobQueueFull: 待ち行列が上限に達している場合
+
+        Returns:
+            ジョブのレコード
+        """
+        if self.chat_service.graph_repo.get(graph_name) is None:
+            raise ValueError(f"Graph '{graph_name}' not found")
+        self._ensure_workers()
+        if self._queue.qsize() >= self.config.max_queued:
+            self.metrics.inc("jobs.rejected")
+            raise JobQueueFull(f"待ち行列が上限（{self.config.max_queued}）に達しています")
+        self.purge_expired()
+        # 結果はスレッドの状態から取り出すので、ジョブは常にチェックポイントを書いて実行する
+        request = request.model_copy(update={"thread_id": request.thread_id or str(uuid4()), "stateless": False})
+        # 長い入力はジョブのレコードにも先頭のみを残し、全文はスレッドから参照するブロブに退避する
+        input_text, input_blob = self.chat_service.offload_input(request.input, graph_name, request.thread_id)
+        request = request.model_copy(update={"input": input_text})
+        record = {
+            "id": uuid4().hex,
+            "status": JobStatus.QUEUED,
+            "graph_name": graph_name,
+            "lane": lane,
+            "thread_id": request.thread_id,
+            "request": request.model_dump(exclude_none=True),
+            "input_blob": input_blob,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None,
+        }
+        self.repository.save(record)
+        self._queue.put_nowait(record["id"])
+        self.metrics.inc("jobs.submitted")
+        return self.describe(record["id"])
+
+    def describe(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """ジョブの状態（イベント数を含む、存在しない場合はNone）"""
+        record = self.repository.get(job_id)
+        if record is None:
+            return None
+        return {**record, "events": self.repository.event_count(job_id)}
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ジョブを中断する（終了済みの場合は何もしない）
+
+        Returns:
+            中断後のジョブの状態（存在しない場合はNone）
+        """
+        record = self.repository.get(job_id)
+        if record is None:
+            return None
+        if record["status"] == JobStatus.QUEUED:
+            # ワーカーは取り出したときに状態を確認して読み飛ばす
+            self._finish(record, JobStatus.CANCELLED)
+        elif record["status"] == JobStatus.RUNNING:
+            task = self._running.get(job_id)
+            if task is not None:
+                self._cancel_requested.add(job_id)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        return self.describe(job_id)
+
+    def delete(self, job_id: str) -> bool:
+        """
+        終了したジョブを削除する
+
+        Raises:
+            ValueError: ジョブが終了していない場合
+        """
+        record = self.repository.get(job_id)
+        if record is None:
+            return False
+        if record["status"] not in JobStatus.FINISHED:
+            raise ValueError(f"Job '{job_id}' is {record['status']}")
+        self._changed.pop(job_id, None)
+        return self.repository.delete(job_id)
+
+    def purge_expired(self) -> int:
+        """保持期間を過ぎた終了済みのジョブを削除し、削除した数を返す"""
+        deadline = time.time() - self.config.retention_seconds
+        expired = [
+            record["id"] for record in self.repository.list()
+            if record["status"] in JobStatus.FINISHED and record["finished_at"] < deadline
+        ]
+        for job_id in expired:
+            self.delete(job_id)
+        return len(expired)
+
+    async def events(self, job_id: str, after: int = -1) -> AsyncIterator[Tuple[int, str]]:
+        """
+        ジョブのイベントを番号付きで返す（記録済みのものから始め、ジョブが終了するまで待つ）
+
+        Args:
+            job_id: ジョブID
+            after: この番号より後のイベントから返す（-1の場合は最初から）
+
+        Yields:
+            (イベント番号, JSON文字列)
+        """
+        while True:
+            changed = self._changed_event(job_id)
+            for event in self.repository.events(job_id, after):
+                after += 1
+                yield after, event
+            record = self.repository.get(job_id)
+            if record is None or record["status"] in JobStatus.FINISHED:
+                return
+            await changed.wait()
+
+    def _changed_event(self, job_id: str) -> asyncio.Event:
+        event = self._changed.get(job_id)
+        if event is None:
+            event = self._changed[job_id] = asyncio.Event()
+        return event
+
+    def _notify(self, job_id: str) -> None:
+        """イベントを待っているクライアントを起こす"""
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _finish(self, record: Dict[str, Any], status: str, error: Optional[str] = None, result: Any = None) -> None:
+        """ジョブを終了状態にして保存する（ファイルに書けなくてもメモリ上は終了にして、待っているクライアントを起こす）"""
+        record.update(status=status, finished_at=time.time(), error=error, result=result)
+        try:
+            self.repository.save(record)
+            self.repository.close_events(record["id"])
+        except OSError as e:
+            logger.error(f"Failed to persist job '{record['id']}': {e}", exc_info=True)
+        self.metrics.inc(f"jobs.{status}")
+        self._notify(record["id"])
+
+    async def _worker(self) -> None:
+        """待ち行列からジョブを取り出して1つずつ実行する"""
+        while True:
+            job_id = await self._queue.get()
+            record = self.repository.get(job_id)
+            if record is None or record["status"] != JobStatus.QUEUED:
+                continue
+            if not self.chat_service.accepting:
+                # ドレイン中は実行せず、待ち行列に残したまま次の起動に引き継ぐ
+                continue
+            # 同じIDが待ち行列に重複していても1回だけ実行されるよう、取り出した時点で実行中にする
+            record.update(status=JobStatus.RUNNING, started_at=time.time())
+            self.repository.save(record)
+            self._notify(job_id)
+            task = self._running[job_id] = asyncio.create_task(self._run(record))
+            try:
+                await asyncio.wait({task})
+            finally:
+                if not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                self._running.pop(job_id, None)
+
+    async def _run(self, record: Dict[str, Any]) -> None:
+        """ジョブを実行し、イベントを記録する（失敗した場合は原因を記録して終了する）"""
+        job_id = record["id"]
+        try:
+            request = self._request(record)
+            error = None
+            async for event in self.chat_service.stream_events(request, record["graph_name"], lane=record["lane"]):
+                if event.get("ch") == "error":
+                    error = event["data"].get("message")
+                self.repository.append_event(job_id, self.chat_service.encode_event(event))
+                self._write_events(job_id)
+                self._notify(job_id)
+            await self._flush_events(job_id)
+            if error is not None:
+                self._finish(record, JobStatus.FAILED, error=error)
+            else:
+                self._finish(record, JobStatus.SUCCEEDED, result=await self._result(record))
+        except asyncio.CancelledError:
+            self._writes.pop(job_id, None)
+            if job_id in self._cancel_requested:
+                self._cancel_requested.discard(job_id)
+                self._finish(record, JobStatus.CANCELLED)
+            else:
+                self._finish(record, JobStatus.FAILED, error="サーバーの停止により中断しました")
+            raise
+        except Exception as e:
+            logger.error(f"Job '{job_id}' failed: {e}", exc_info=True)
+            self._writes.pop(job_id, None)
+            self._finish(record, JobStatus.FAILED, error=str(e) or type(e).__name__)
+
+    def _write_events(self, job_id: str) -> None:
+        """
+        記録したイベントをスレッドでファイルに書き出す
+
+        書き出し中の場合は待たずに戻り、それまでに増えたイベントは次の書き出しでまとめて書く。
+        """
+        if self.repository.directory is None:
+            return
+        task = self._writes.get(job_id)
+        if task is None or task.done():
+            task = self._writes[job_id] = asyncio.ensure_future(asyncio.to_thread(self.repository.write_events, job_id))
+            task.add_done_callback(self._log_write_error)
+
+    async def _flush_events(self, job_id: str) -> None:
+        """書き出し中のイベントを待ち、残りを書き出す"""
+        task = self._writes.pop(job_id, None)
+        if task is not None:
+            await task
+        if self.repository.directory is not None:
+            await asyncio.to_thread(self.repository.write_events, job_id)
+
+    @staticmethod
+    def _log_write_error(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Failed to write job events: {task.exception()}")
+
+    def _request(self, record: Dict[str, Any]) -> ChatRequest:
+        """
+        記録したリクエスト（ブロブに退避した入力は全文に戻す）
+
+        Raises:
+            LookupError: 退避した入力が見つからない場合（スレッドが削除された場合など）
+        """
+        request = ChatRequest(**record["request"])
+        blob_id = record.get("input_blob")
+        if blob_id is None:
+            return request
+        blob_repo = self.chat_service.blob_repo
+        data = blob_repo.get(blob_id) if blob_repo is not None else None
+        if data is None:
+            raise LookupError(f"入力（ブロブ '{blob_id}'）が見つかりません")
+        return request.model_copy(update={"input": data.decode("utf-8")})
+
+    async def _result(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """ジョブの結果（スレッドの最後のメッセージ）"""
+        try:
+            state = await self.chat_service.graph_repo.get_thread_state(record["graph_name"], record["thread_id"])
+        except ValueError:
+            return None
+        if state is None:
+            return None
+        messages = to_jsonable(state).get("values", {}).get("messages") or []
+        return {"message": messages[-1]} if messages else None
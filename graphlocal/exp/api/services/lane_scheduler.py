@@ -0,0 +1,138 @@
+# api/services/lane_scheduler.py
+# ---------------------------------------------------------
+# 優先レーン（interactive / bulk）ごとの重み付き公平キューイング
+# ---------------------------------------------------------
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from utils.metrics import MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Lane:
+    """レーン名定数"""
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
+class LaneScheduler:
+    """
+    グラフ実行の同時実行数を制限し、空きスロットをレーンの重みに応じて割り当てるスケジューラー
+
+    待ち行列のあるレーンの中から仮想時刻が最小のレーンを選び（start-time fair queueing）、
+    選んだレーンの仮想時刻を 1/重み だけ進める。重み 8:1 なら、両レーンが詰まっているときに
+    interactive が 8 回に対して bulk が 1 回スロットを得る。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        weights: Dict[str, int],
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            max_concurrency: 同時に実行できるグラフ実行の数
+            weights: レーン名と重みの対応
+            metrics: レーン別メトリクスの記録先（Noneの場合はデフォルトレジストリ）
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.max_concurrency = max_concurrency
+        self.weights = dict(weights)
+        self.metrics = metrics or get_metrics()
+        self._queues: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in self.weights}
+        self._vtime: Dict[str, float] = {lane: 0.0 for lane in self.weights}
+        self._global_vtime = 0.0
+        self._active = 0
+        for lane in self.weights:
+            self.metrics.set_gauge(f"scheduler.{lane}.queued", lambda lane=lane: len(self._queues[lane]))
+        self.metrics.set_gauge("scheduler.active", lambda: self._active)
+
+    @property
+    def active(self) -> int:
+        """実行中のスロット数"""
+        return self._active
+
+    def queued(self, lane: str) -> int:
+        """レーンの待ち数"""
+        return len(self._queues[lane])
+
+    async def acquire(self, lane: str) -> None:
+        """
+        レーンのスロットを取得（空きがなければ順番が来るまで待つ）
+
+        Raises:
+            ValueError: 未知のレーンの場合
+        """
+        if lane not in self.weights:
+            raise ValueError(f"Unknown lane '{lane}'. Available lanes: {list(self.weights)}")
+        if self._active < self.max_concurrency and not any(self._queues.values()):
+            self._charge(lane)
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # スロットを割り当てられた直後にキャンセルされた場合は返却する
+                self.release()
+            else:
+                self._queues[lane].remove(waiter)
+            raise
+
+    def release(self) -> None:
+        """スロットを返却し、待っているレーンに割り当てる"""
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """空きスロットを仮想時刻が最小のレーンに割り当てる"""
+        while self._active < self.max_concurrency:
+            waiting = [lane for lane, queue in self._queues.items() if queue]
+            if not waiting:
+                return
+            lane = min(waiting, key=lambda name: self._vtime[name])
+            waiter = self._queues[lane].popleft()
+            if waiter.done():
+                continue
+            self._charge(lane)
+            self._active += 1
+            waiter.set_result(None)
+
+    def _charge(self, lane: str) -> None:
+        """レーンの仮想時刻を進める（アイドルだったレーンが溜めた分は持ち越さない）"""
+        start = max(self._vtime[lane], self._global_vtime)
+        self._global_vtime = start
+        self._vtime[lane] = start + 1.0 / self.weights[lane]
+
+    @asynccontextmanager
+    async def slot(self, lane: str) -> AsyncIterator[None]:
+        """
+        スロットを取得して保持するコンテキスト（待ち時間と保持時間をレーン別に記録）
+
+        Usage:
+            async with scheduler.slot(Lane.BULK):
+                ...
+        """
+        queued_at = time.monotonic()
+        await self.acquire(lane)
+        started_at = time.monotonic()
+        self.metrics.observe(f"scheduler.{lane}.queue_wait_seconds", started_at - queued_at)
+        try:
+            yield
+        finally:
+            self.release()
+            finished_at = time.monotonic()
+            self.metrics.observe(f"scheduler.{lane}.latency_seconds", finished_at - queued_at)
+            self.metrics.inc(f"scheduler.{lane}.completed")
@@ -0,0 +1,169 @@
+# api/services/profiler_service.py
+# ---------------------------------------------------------
+# プロファイラーサービス（稼働中のワーカーのサンプリングCPUプロファイル）
+# ---------------------------------------------------------
+import asyncio
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import CodeType
+from typing import Any, FrozenSet, Optional
+
+from api.models import ProfileScope
+from api.repositories.graph_repository import GraphRepository
+from config import ProfilerConfig
+from utils.profiler import Profile, SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+
+def profile_filename(profile: Profile) -> str:
+    """プロファイルのファイル名（profile-<PID>-<開始時刻>.collapsed）"""
+    started = time.strftime("%Y%m%d-%H%M%S", time.localtime(profile.started_at))
+    return f"profile-{os.getpid()}-{started}.collapsed"
+
+
+class ProfilerService:
+    """
+    稼働中のワーカーを再起動せずにプロファイルするサービス
+
+    /admin/profile またはシグナル（PROFILER_SIGNAL）で、指定した秒数だけ全スレッドのスタックを
+    サンプリングする。scope が graph の場合は stream_execution とノード関数を起点とするスタックだけを
+    記録する。同時に実行できるプロファイルは1つまで。
+    """
+
+    def __init__(self, graph_repository: GraphRepository, config: ProfilerConfig):
+        """
+        初期化
+
+        Args:
+            graph_repository: グラフリポジトリ（ノード関数の取得）
+            config: プロファイラーの設定
+        """
+        self.graph_repo = graph_repository
+        self.config = config
+        self._profiler: Optional[SamplingProfiler] = None
+        self._signal_task: Optional[asyncio.Task] = None
+        self._signal: Optional[int] = None
+        self._previous_handler: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        """プロファイル中か"""
+        return self._profiler is not None
+
+    def roots(self, scope: ProfileScope) -> FrozenSet[CodeType]:
+        """scope に応じた、記録するスタックの起点のコード（all の場合は空）"""
+        if scope == "all":
+            return frozenset()
+        codes = {GraphRepository.stream_execution.__code__}
+        for func in self.graph_repo.node_functions().values():
+            # デコレーター（functools.wraps）で包まれたノード関数は、包んだ側と元の関数の両方を起点にする
+            while func is not None:
+                code = getattr(func, "__code__", None)
+                if code is not None:
+                    codes.add(code)
+                func = getattr(func, "__wrapped__", None)
+        return frozenset(codes)
+
+    async def profile(self, seconds: float, scope: ProfileScope = "graph") -> Profile:
+        """
+        指定した秒数（PROFILER_MAX_SECONDS まで）サンプリングする
+
+        Args:
+            seconds: サンプリングする秒数
+            scope: graph の場合は stream_execution とノード関数のスタックのみ、all の場合はすべてのスレッド
+
+        Returns:
+            サンプリングの結果
+
+        Raises:
+            RuntimeError: すでにプロファイル中の場合
+        """
+        if self._profiler is not None:
+            raise RuntimeError("A profile is already running")
+        seconds = min(seconds, self.config.max_seconds)
+        profiler = SamplingProfiler(self.config.interval, roots=self.roots(scope))
+        self._profiler = profiler
+        try:
+            profiler.start()
+            await asyncio.sleep(seconds)
+        finally:
+            profile = profiler.stop()
+            self._profiler = None
+        logger.info(
+            f"CPU profile ({scope}) finished: {profile.total} samples in {profile.seconds:.1f}s, "
+            f"{len(profile.samples)} distinct stacks"
+        )
+        return profile
+
+    async def profile_to_file(self, seconds: float, scope: ProfileScope = "graph") -> Path:
+        """
+        プロファイルして collapsed 形式のファイルに書き出す
+
+        Returns:
+            書き出したファイルのパス（PROFILER_DIRECTORY、未設定の場合は一時ディレクトリ）
+        """
+        profile = await self.profile(seconds, scope)
+        directory = Path(self.config.directory or tempfile.gettempdir())
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / profile_filename(profile)
+        path.write_text(profile.to_collapsed(), encoding="utf-8")
+        logger.info(f"Wrote CPU profile to {path}")
+        return path
+
+    async def start(self) -> None:
+        """プロファイルを始めるシグナルのハンドラーを登録する（メインスレッドの場合のみ）"""
+        if not self.config.signal or threading.current_thread() is not threading.main_thread():
+            return
+        sig = getattr(signal, self.config.signal, None)
+        if not isinstance(sig, signal.Signals):
+            logger.warning(f"Unknown profiler signal '{self.config.signal}', not installing a handler")
+            return
+        self._loop = asyncio.get_running_loop()
+        self._signal = sig
+        self._previous_handler = signal.signal(sig, self._handle_signal)
+
+    async def stop(self) -> None:
+        """シグナルのハンドラーを元に戻し、シグナルで始めたプロファイルを止める"""
+        if self._signal is not None:
+            signal.signal(self._signal, self._previous_handler)
+            self._signal = None
+        if self._signal_task is not None and not self._signal_task.done():
+            self._signal_task.cancel()
+            try:
+                await self._signal_task
+            except asyncio.CancelledError:
+                pass
+
+    def _handle_signal(self, sig: int, frame: Any) -> None:
+        """シグナルハンドラー（イベントループでプロファイルを始める）"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.begin_signal_profile)
+
+    def begin_signal_profile(self) -> Optional[asyncio.Task]:
+        """
+        PROFILER_SIGNAL_SECONDS・PROFILER_SIGNAL_SCOPE でプロファイルを始め、終わったらファイルに書き出す
+
+        Returns:
+            プロファイルのタスク（すでにプロファイル中の場合はNone）
+        """
+        if self.running or (self._signal_task is not None and not self._signal_task.done()):
+            logger.warning("A profile is already running, ignoring the profiler signal")
+            return None
+        self._signal_task = asyncio.ensure_future(self._signal_profile())
+        return self._signal_task
+
+    async def _signal_profile(self) -> Optional[Path]:
+        try:
+            return await self.profile_to_file(self.config.signal_seconds, self.config.signal_scope)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"CPU profile failed: {e}", exc_info=True)
+            return None
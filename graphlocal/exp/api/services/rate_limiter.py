@@ -0,0 +1,211 @@
+# api/services/rate_limiter.py
+# ---------------------------------------------------------
+# クライアント・スレッドごとのトークンバケットによるレート制限
+# ---------------------------------------------------------
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from config import RateLimitConfig
+from utils.metrics import MetricsRegistry, get_metrics
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitDecision:
+    """バケットからトークンを取り出した結果"""
+    allowed: bool
+    scope: str
+    limit: int
+    remaining: int
+    # バケットが満杯に戻るまでの秒数
+    reset_after: float
+    # 拒否された場合、次のトークンが貯まるまでの秒数
+    retry_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        """レスポンスヘッダー（X-RateLimit-*、拒否された場合は Retry-After も含める）"""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+# バケットの指定（キー, 1秒あたりに補充するトークン数, バケットの容量）
+Bucket = Tuple[str, float, int]
+
+
+class RateLimitBackend(Protocol):
+    """
+    バケットの保存先
+
+    ワーカー間で共有する場合（Redis など）は、take を1回の往復でアトミックに実装する。
+    """
+
+    async def take(self, buckets: Sequence[Bucket], cost: float = 1.0) -> List[Tuple[bool, float, float]]:
+        """
+        すべてのバケットから取り出せる場合のみ、それぞれからトークンを取り出す
+
+        1つでも足りないバケットがあれば、どのバケットからも取り出さない（拒否されたリクエストで
+        他のバケットを減らさない）。
+
+        Args:
+            buckets: 取り出すバケット
+            cost: それぞれから取り出すトークン数
+
+        Returns:
+            バケットごとの (足りていたか, 判定後の残りトークン数, 足りない場合に次に取り出せるまでの秒数)
+        """
+        ...
+
+
+class InMemoryBackend:
+    """
+    プロセス内のバケット（ワーカーごとに独立）
+
+    大量のクライアントIDでメモリが膨らまないよう、キーが max_keys を超えたら最も長く
+    使われていないものから捨てる（捨てたバケットは次に使われたときに満杯から始まる）。
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        """
+        初期化
+
+        Args:
+            max_keys: 保持するバケットの最大数
+            clock: 現在時刻（秒、テスト用に差し替え可能）
+        """
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, buckets: Sequence[Bucket], cost: float = 1.0) -> List[Tuple[bool, float, float]]:
+        now = self.clock()
+        levels = []
+        for key, rate, burst in buckets:
+            tokens, updated = self._buckets.pop(key, (float(burst), now))
+            levels.append(min(float(burst), tokens + (now - updated) * rate))
+        allowed = all(tokens >= cost for tokens in levels)
+        results = []
+        for (key, rate, burst), tokens in zip(buckets, levels):
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            enough = allowed or tokens >= cost
+            results.append((enough, tokens, 0.0 if enough else (cost - tokens) / rate))
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return results
+
+
+def client_identity(
+    api_key: Optional[str],
+    host: Optional[str],
+    forwarded_for: Optional[str] = None,
+    trusted_proxies: Iterable[str] = (),
+) -> str:
+    """
+    レート制限のクライアントID（APIキーがあればキー、なければ接続元アドレス）
+
+    接続元が信頼するプロキシ（ロードバランサーなど）の場合は、X-Forwarded-For を右からたどって
+    最初の信頼しないアドレスを接続元とする（クライアントが付けた値は左側に残るので使わない）。
+    """
+    if api_key:
+        return f"key:{api_key}"
+    trusted = frozenset(trusted_proxies)
+    if host in trusted and forwarded_for:
+        for address in reversed([a.strip() for a in forwarded_for.split(",") if a.strip()]):
+            host = address
+            if address not in trusted:
+                break
+    return f"ip:{host or 'unknown'}"
+
+
+class RateLimiter:
+    """
+    クライアントごと・スレッドごとのトークンバケット
+
+    クライアントのバケットは新しいスレッドの大量作成を含むリクエスト全体を、
+    スレッドのバケットは1つのスレッドへの連続したターンを制限する。
+    ヘルスチェックやメトリクスなど、チェックを呼び出さないエンドポイントは対象外。
+    """
+
+    CLIENT = "client"
+    THREAD = "thread"
+
+    def __init__(
+        self,
+        config: RateLimitConfig,
+        backend: Optional[RateLimitBackend] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            config: レート制限設定
+            backend: バケットの保存先（Noneの場合はプロセス内）
+            metrics: 拒否数の記録先（Noneの場合はデフォルトレジストリ）
+        """
+        self.config = config
+        self.backend = backend if backend is not None else InMemoryBackend(max_keys=config.max_keys)
+        self.metrics = metrics or get_metrics()
+
+    def _decision(self, scope: str, burst: int, rate: float, result: Tuple[bool, float, float]) -> RateLimitDecision:
+        """バケットの判定をレスポンス用に変換"""
+        allowed, tokens, retry_after = result
+        if not allowed:
+            self.metrics.inc(f"rate_limit.{scope}.rejected")
+        return RateLimitDecision(
+            allowed=allowed,
+            scope=scope,
+            limit=burst,
+            remaining=max(0, int(tokens)),
+            reset_after=(burst - tokens) / rate,
+            retry_after=retry_after,
+        )
+
+    async def check(
+        self,
+        client: str,
+        thread_id: Optional[str] = None,
+        graph_name: str = "default",
+    ) -> Optional[RateLimitDecision]:
+        """
+        リクエストを受け付けるか判定
+
+        クライアントとスレッドの両方のバケットに残りがある場合のみ、両方から取り出す
+        （スレッドの上限で拒否されたリクエストでクライアントのバケットを減らさない）。
+
+        Args:
+            client: client_identity() で作ったクライアントID
+            thread_id: 既存スレッドへのターンの場合はスレッドID
+            graph_name: グラフ名（スレッドのバケットのキーに含める）
+
+        Returns:
+            クライアント・スレッドのうち残りが少ない方の判定（拒否された場合はその判定、
+            レート制限が無効な場合はNone）
+        """
+        config = self.config
+        if not config.enabled:
+            return None
+        scopes = [(self.CLIENT, client, config.client_rate, config.client_burst)]
+        if thread_id is not None:
+            scopes.append((self.THREAD, f"{graph_name}:{thread_id}", config.thread_rate, config.thread_burst))
+        results = await self.backend.take([(f"{scope}:{key}", rate, burst) for scope, key, rate, burst in scopes])
+        decisions = [
+            self._decision(scope, burst, rate, result)
+            for (scope, _, rate, burst), result in zip(scopes, results)
+        ]
+        rejected = [decision for decision in decisions if not decision.allowed]
+        if rejected:
+            return rejected[0]
+        return min(decisions, key=lambda decision: decision.remaining)
@@ -0,0 +1,110 @@
+# api/services/stream_tracker.py
+# ---------------------------------------------------------
+# 実行中ストリームの追跡とシャットダウン時のドレイン
+# ---------------------------------------------------------
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceDraining(RuntimeError):
+    """ドレイン中のため新しいストリームを受け付けない"""
+
+
+@dataclass(eq=False)
+class StreamHandle:
+    """実行中のストリーム"""
+    task: Optional[asyncio.Task]
+    killed: bool = False
+
+
+@dataclass
+class DrainResult:
+    """ドレインの結果"""
+    drained: int
+    killed: int
+
+
+class StreamTracker:
+    """
+    実行中のストリーム（/chat のSSE、/ws のターン）を追跡する
+
+    シャットダウン時は新しいストリームの受け付けを止め、実行中のストリームが終わるのを
+    期限まで待ち、期限を過ぎたストリームは中断する。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self._streams: Set[StreamHandle] = set()
+        self._draining = False
+
+    @property
+    def draining(self) -> bool:
+        """ドレイン中か（新しいストリームを受け付けない）"""
+        return self._draining
+
+    @property
+    def active(self) -> int:
+        """実行中のストリーム数"""
+        return len(self._streams)
+
+    def start_draining(self) -> None:
+        """新しいストリームの受け付けを止める"""
+        if not self._draining:
+            logger.info(f"Draining started: {self.active} stream(s) in flight")
+        self._draining = True
+
+    @contextmanager
+    def track(self) -> Iterator[StreamHandle]:
+        """
+        現在のタスクで実行するストリームを登録する
+
+        Raises:
+            ServiceDraining: ドレイン中の場合
+        """
+        if self._draining:
+            raise ServiceDraining("server is shutting down")
+        handle = StreamHandle(task=asyncio.current_task())
+        self._streams.add(handle)
+        try:
+            yield handle
+        finally:
+            self._streams.discard(handle)
+
+    async def drain(self, timeout: float, kill_grace: float = 1.0) -> DrainResult:
+        """
+        実行中のストリームが終わるのを待ち、期限を過ぎたものは中断する
+
+        Args:
+            timeout: 実行中のストリームを待つ秒数
+            kill_grace: 中断したストリームが後片付けを終えるのを待つ秒数
+
+        Returns:
+            期限内に終わったストリーム数と中断したストリーム数
+        """
+        self.start_draining()
+        in_flight = self.active
+        await self._wait_idle(timeout)
+
+        remaining = list(self._streams)
+        for handle in remaining:
+            handle.killed = True
+            if handle.task is not None:
+                handle.task.cancel()
+        if remaining and not await self._wait_idle(kill_grace):
+            logger.warning(f"{self.active} stream(s) did not stop after cancellation")
+        return DrainResult(drained=in_flight - len(remaining), killed=len(remaining))
+
+    async def _wait_idle(self, timeout: float, interval: float = 0.05) -> bool:
+        """実行中のストリームがなくなるまで待つ（期限内になくなった場合はTrue）"""
+        deadline = time.monotonic() + timeout
+        while self._streams:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+        return True
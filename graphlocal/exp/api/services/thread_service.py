@@ -0,0 +1,149 @@
+# api/services/thread_service.py
+# ---------------------------------------------------------
+# スレッドサービス（スレッド状態の参照・削除・移行）
+# ---------------------------------------------------------
+import json
+import logging
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional
+
+from api.repositories.blob_repository import BlobRepository
+from api.repositories.graph_repository import GraphRepository
+from utils.serializers import to_jsonable, dump_json
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadService:
+    """スレッド状態の参照・削除・エクスポート/インポートを担当するサービス"""
+    
+    def __init__(self, graph_repository: GraphRepository, blob_repository: Optional[BlobRepository] = None):
+        """
+        初期化
+        
+        Args:
+            graph_repository: グラフリポジトリ
+            blob_repository: 退避した入力の保存先（メッセージの blob から参照される）
+        """
+        self.graph_repo = graph_repository
+        self.blob_repo = blob_repository
+    
+    async def get_thread(self, thread_id: str, graph_name: str = "default") -> Optional[Dict[str, Any]]:
+        """
+        スレッドの最新状態をクライアント向け形式で取得
+        
+        Returns:
+            スレッド状態（存在しない場合はNone）
+        """
+        state = await self.graph_repo.get_thread_state(graph_name, thread_id)
+        return to_jsonable(state) if state is not None else None
+    
+    def get_blob(self, blob_id: str) -> Optional[bytes]:
+        """退避した入力の全文を取得（存在しない場合はNone）"""
+        if self.blob_repo is None:
+            return None
+        return self.blob_repo.get(blob_id)
+    
+    async def delete_thread(self, thread_id: str, graph_name: str = "default") -> bool:
+        """スレッドを削除（存在しない場合はFalse、参照されなくなった退避した入力も削除する）"""
+        return await self.graph_repo.delete_thread(graph_name, thread_id, blobs=self.blob_repo)
+    
+    async def export_threads(
+        self,
+        graph_name: str = "default",
+        thread_ids: Optional[list[str]] = None,
+        drain: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """
+        スレッドをNDJSON形式でエクスポート
+        
+        Yields:
+            1スレッド1行のNDJSONバイトデータ
+        """
+        async for record in self.graph_repo.export_threads(graph_name, thread_ids, drain=drain, blobs=self.blob_repo):
+            yield f"{dump_json(record)}\n".encode()
+    
+    async def import_threads(
+        self,
+        chunks: AsyncIterable[bytes],
+        graph_name: str = "default",
+    ) -> int:
+        """
+        NDJSON形式のストリームからスレッドをインポート
+        
+        Args:
+            chunks: リクエストボディのバイトチャンク
+            graph_name: インポート先のグラフ名
+        
+        Returns:
+            インポートしたスレッド数
+        """
+        return await self.graph_repo.import_threads(graph_name, self._iter_ndjson(chunks), blobs=self.blob_repo)
+    
+    async def save_snapshot(self, directory: str) -> Dict[str, int]:
+        """
+        全グラフのスレッドをNDJSONファイル（<directory>/<グラフ名>.ndjson）に書き出す
+        
+        Returns:
+            グラフ名と書き出したスレッド数の対応（チェックポインターのないグラフは含めない）
+        """
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        saved = {}
+        for graph_name in self.graph_repo.list_graphs():
+            path = Path(directory) / f"{graph_name}.ndjson"
+            count = 0
+            try:
+                with path.open("wb") as f:
+                    async for line in self.export_threads(graph_name):
+                        f.write(line)
+                        count += 1
+            except ValueError as e:
+                logger.debug(f"Skip snapshot of graph '{graph_name}': {e}")
+                path.unlink(missing_ok=True)
+                continue
+            saved[graph_name] = count
+        return saved
+    
+    async def restore_snapshot(self, directory: str) -> Dict[str, int]:
+        """
+        save_snapshot で書き出したファイルからスレッドをインポートし、読み込んだファイルを削除する
+        
+        Returns:
+            グラフ名とインポートしたスレッド数の対応
+        """
+        restored = {}
+        for graph_name in self.graph_repo.list_graphs():
+            path = Path(directory) / f"{graph_name}.ndjson"
+            if not path.is_file():
+                continue
+            restored[graph_name] = await self.import_threads(self._read_file(path), graph_name)
+            path.unlink()
+        return restored
+    
+    @staticmethod
+    async def _read_file(path: Path, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """ファイルをチャンク単位で読み込む"""
+        with path.open("rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    
+    @staticmethod
+    async def _iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Dict[str, Any]]:
+        """バイトチャンクを行単位に分割してJSONとして読み込む（ボディ全体をバッファしない）"""
+        buffer = b""
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield ThreadService._parse_line(line)
+        if buffer.strip():
+            yield ThreadService._parse_line(buffer)
+    
+    @staticmethod
+    def _parse_line(line: bytes) -> Dict[str, Any]:
+        """NDJSONの1行を読み込む"""
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid NDJSON line: {e}") from e
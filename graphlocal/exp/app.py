@@ -1,16 +1,19 @@
 # app.py
 # ---------------------------------------------------------
 # uv pip install fastapi uvicorn langchain-core langgraph pydantic pydantic-settings python-dotenv
-# uv run uvicorn app:app --reload
+# uv run python main.py serve（ENVIRONMENT=production で本番プロファイル、server.py）
 # ---------------------------------------------------------
 import logging
+from contextlib import asynccontextmanager
 from functools import lru_cache
+from typing import Any, Optional
 
 from fastapi import FastAPI
 
-from config import GraphConfig, AppSettings
+from config import GraphConfig, AppSettings, get_default_settings
 from graph.builder import create_graph
-from api import router, set_graph_repository
+from api import Container, router
+from api.middleware import BodySizeLimitMiddleware
 from api.repositories.graph_repository import GraphRepository
 
 # ========= Logging =========
@@ -25,11 +28,12 @@ logging.basicConfig(
 def get_settings() -> AppSettings:
     """
     アプリケーション設定を取得する（lru_cacheで一度だけ読み込む）
+    グラフノードなどが参照する config.get_default_settings() と同じインスタンスを返す
     
     Returns:
         AppSettings: アプリケーション設定オブジェクト
     """
-    return AppSettings()
+    return get_default_settings()
 
 
 @lru_cache
@@ -56,7 +60,7 @@ if settings.grafana.url:
     logger.info(f"Grafana URL is configured: {settings.grafana.url}")
 
 # グラフを作成
-default_graph = create_graph(config=config)
+default_graph = create_graph(config=config, speculative=config.speculative_respond)
 
 # ========= Graph Repository Setup =========
 graph_repository = GraphRepository()
@@ -69,15 +73,55 @@ graph_repository.register("default", default_graph)
 # graph_repository.register("test_graph", test_graph)
 
 # ========= FastAPI Application =========
-app = FastAPI()
+def create_app(
+    repository: Optional[GraphRepository] = None,
+    app_settings: Optional[AppSettings] = None,
+    **overrides: Any
+) -> FastAPI:
+    """
+    FastAPIアプリケーションを作成する
+    
+    lifespan の起動時に依存性コンテナ（api.container.Container）を作成して app.state.container に保持し、
+    停止時にストリームのドレイン・スレッドの書き出し・ジョブのワーカーの停止を行う。
+    
+    Args:
+        repository: グラフリポジトリ（Noneの場合はこのモジュールの graph_repository）
+        app_settings: アプリケーション設定（Noneの場合は get_settings()）
+        **overrides: Container に渡す差し替え（scheduler / tracker / rate_limiter / job_repository）
+    
+    Returns:
+        FastAPIアプリケーション
+    """
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        container = Container(
+            repository if repository is not None else graph_repository,
+            app_settings if app_settings is not None else get_settings(),
+            **overrides,
+        )
+        app.state.container = container
+        await container.start()
+        yield
+        await container.stop()
+    
+    application = FastAPI(lifespan=lifespan)
+    # 大きなボディはバッファする前に413で断る（インポートは検証のためにすべて読み込むので別の上限）
+    limits = (app_settings if app_settings is not None else get_settings()).limits
+    application.add_middleware(
+        BodySizeLimitMiddleware,
+        max_bytes=limits.max_body_bytes,
+        path_limits={"/threads/import": limits.max_import_bytes},
+    )
+    application.include_router(router)
+    return application
+
 
-# グラフリポジトリをルーターに設定
-set_graph_repository(graph_repository)
+app = create_app()
 
-# ========= Register Router =========
-app.include_router(router)
 
 # ローカル直接起動用
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    # ENVIRONMENT に応じたプロファイル（development は reload、production は uvloop・複数ワーカー）
+    from server import run
+    run(settings)
\ No newline at end of file
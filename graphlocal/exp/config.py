@@ -2,27 +2,151 @@
 # ---------------------------------------------------------
 # アプリケーション設定定義（Pydantic Settings使用）
 # ---------------------------------------------------------
-from typing import Optional
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Literal, Mapping, Optional, Tuple
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from dotenv import dotenv_values
+from pydantic.fields import FieldInfo
+from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
 
+# 全設定クラスで共有する .env ファイル
+ENV_FILE = ".env"
+ENV_FILE_ENCODING = "utf-8"
 
-class GraphConfig(BaseSettings):
+
+@lru_cache(maxsize=8)
+def _read_env_file_cached(path: str, mtime_ns: int, encoding: Optional[str]) -> Mapping[str, Optional[str]]:
+    """.envファイルを読み込む（パス・更新時刻・エンコーディングが同じなら再利用）"""
+    return {key.lower(): value for key, value in dotenv_values(path, encoding=encoding).items()}
+
+
+def read_env_file(
+    file_path: str | Path = ENV_FILE,
+    encoding: Optional[str] = ENV_FILE_ENCODING,
+) -> Mapping[str, Optional[str]]:
+    """
+    .envファイルの内容を取得（プロセス内で1回だけパースする）
+    
+    Returns:
+        変数名（小文字）と値のマッピング（ファイルがない場合は空）
+    """
+    path = Path(file_path).expanduser().resolve()
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    return _read_env_file_cached(str(path), mtime_ns, encoding)
+
+
+class SharedDotEnvSettingsSource(PydanticBaseSettingsSource):
+    """
+    パース結果を設定クラス間で共有する .env ソース
+    
+    変数名は大文字・小文字を区別せず、設定クラスの env_prefix とフィールド名
+    （エイリアスがある場合はエイリアス）で探す。リストなどの複合型の値はJSONとしてデコードする。
+    """
+    
+    def __init__(
+        self,
+        settings_cls: type[BaseSettings],
+        env_file: str | Path = ENV_FILE,
+        env_file_encoding: Optional[str] = ENV_FILE_ENCODING,
+    ):
+        super().__init__(settings_cls)
+        self.env_prefix = (self.config.get("env_prefix") or "").lower()
+        self.env_values = read_env_file(env_file, env_file_encoding)
+    
+    def get_field_value(self, field: FieldInfo, field_name: str) -> Tuple[Any, str, bool]:
+        key = (field.alias or f"{self.env_prefix}{field_name}").lower()
+        return self.env_values.get(key), key, self.field_is_complex(field)
+    
+    def __call__(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for field_name, field in self.settings_cls.model_fields.items():
+            value, _, value_is_complex = self.get_field_value(field, field_name)
+            if value is None or (value == "" and self.config.get("env_ignore_empty")):
+                continue
+            data[field.alias or field_name] = self.prepare_field_value(field_name, field, value, value_is_complex)
+        return data
+
+
+class EnvSettings(BaseSettings):
+    """
+    設定クラスの基底クラス
+    
+    各設定クラスが個別に .env を読み直さないよう、既定の .env ソースの代わりに
+    SharedDotEnvSettingsSource を使う（優先順位: 初期化引数 > 環境変数 > .env）。
+    """
+    model_config = SettingsConfigDict(
+        env_file=None,
+        case_sensitive=False,
+        extra="ignore",
+    )
+    
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls,
+        init_settings,
+        env_settings,
+        dotenv_settings,
+        file_secret_settings,
+    ):
+        shared_dotenv_settings = SharedDotEnvSettingsSource(
+            settings_cls,
+            env_file=ENV_FILE,
+            env_file_encoding=ENV_FILE_ENCODING,
+        )
+        return init_settings, env_settings, shared_dotenv_settings, file_secret_settings
+
+
+class GraphConfig(EnvSettings):
     """グラフ設定クラス（Pydantic Settingsを使用）"""
     tool_prefix: str = "tool:"
     tool_processing_delay: float = 0.3
     response_delay: float = 0.2
     fake_tool_name: str = "fake_search"
+    # ツールの部分結果をストリーミングし、応答ノードが最初の結果から応答を始める
+    tool_streaming: bool = False
+    # プランナーと並行に応答を投機的に生成する（create_graph(speculative=...) に渡す）
+    speculative_respond: bool = False
+    # thread_id のないリクエストをチェックポイントなしで実行する（Falseの場合はスレッドIDを採番して保存）
+    stateless_without_thread: bool = True
+    # ツールの出力を共有ストア（graph.result_store）に移し、スレッドの状態には参照だけを保持する
+    shared_tool_results: bool = True
 
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=False,
-        extra="ignore",
-    )
+    # スタブノードの擬似レイテンシ（graph.latency の仕様文字列、未設定の場合は上の固定値）
+    tool_latency: Optional[str] = None
+    response_latency: Optional[str] = None
+    # 応答のトークン生成速度（トークン/秒、Noneの場合は最初のトークンと同時に全文）
+    response_tokens_per_second: Optional[float] = None
+    # エラー注入の確率（0〜1）
+    tool_error_rate: float = 0.0
+    response_error_rate: float = 0.0
+    latency_seed: Optional[int] = None
+
+    # 応答をトークン単位で messages ストリームに流す（Falseの場合は完成した応答を1回で返す）
+    response_streaming: bool = True
+    # ストリーミング時に何トークンずつ・最大何秒溜めてまとめて送るか
+    response_chunk_tokens: int = 1
+    response_chunk_max_delay: Optional[float] = None
+
+    # ノード単位のタイムアウト（秒、Noneの場合は無制限）
+    planner_timeout: Optional[float] = 5.0
+    tool_timeout: Optional[float] = 10.0
+    respond_timeout: Optional[float] = 30.0
 
+    # ツール呼び出しのサーキットブレーカー
+    circuit_failure_threshold: float = 0.5
+    circuit_latency_threshold: Optional[float] = None
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 5
+    circuit_reset_timeout: float = 30.0
 
-class OpenAIConfig(BaseSettings):
+
+class OpenAIConfig(EnvSettings):
     """OpenAI設定クラス"""
     api_key: Optional[str] = None
     base_url: Optional[str] = None
@@ -31,15 +155,11 @@ class OpenAIConfig(BaseSettings):
     max_tokens: Optional[int] = None
 
     model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=False,
-        extra="ignore",
         env_prefix="OPENAI_",  # OPENAI_API_KEY, OPENAI_BASE_URL など
     )
 
 
-class GrafanaConfig(BaseSettings):
+class GrafanaConfig(EnvSettings):
     """Grafana設定クラス"""
     url: Optional[str] = None
     api_key: Optional[str] = None
@@ -48,14 +168,216 @@ class GrafanaConfig(BaseSettings):
     org_id: Optional[int] = None
 
     model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=False,
-        extra="ignore",
         env_prefix="GRAFANA_",  # GRAFANA_URL, GRAFANA_API_KEY など
     )
 
 
+class SchedulerConfig(EnvSettings):
+    """優先レーン（interactive / bulk）のスケジューラー設定"""
+    max_concurrency: int = 64
+    interactive_weight: int = 8
+    bulk_weight: int = 1
+    # カンマ区切り。このAPIキー（X-API-Key ヘッダー）のリクエストは bulk レーンで実行する
+    bulk_api_keys: str = ""
+
+    model_config = SettingsConfigDict(
+        env_prefix="SCHEDULER_",  # SCHEDULER_MAX_CONCURRENCY, SCHEDULER_BULK_API_KEYS など
+    )
+
+    @property
+    def bulk_api_key_set(self) -> frozenset[str]:
+        """bulk レーンに割り当てるAPIキーの集合"""
+        return frozenset(key.strip() for key in self.bulk_api_keys.split(",") if key.strip())
+
+
+class ShutdownConfig(EnvSettings):
+    """グレースフルシャットダウンの設定"""
+    # 実行中のストリームの終了を待つ秒数（超えたストリームは中断する）
+    drain_timeout: float = 25.0
+    # 中断したストリームの後片付けを待つ秒数
+    kill_grace: float = 1.0
+    # 指定した場合、停止時にスレッドをこのディレクトリに書き出し、次の起動時に読み込む
+    checkpoint_dir: Optional[str] = None
+
+    model_config = SettingsConfigDict(
+        env_prefix="SHUTDOWN_",  # SHUTDOWN_DRAIN_TIMEOUT, SHUTDOWN_CHECKPOINT_DIR など
+    )
+
+
+class AdminConfig(EnvSettings):
+    """管理用エンドポイント（/admin/*）の設定"""
+    # X-Admin-Token ヘッダーで指定するトークン（未設定の場合は管理用エンドポイントを無効化）
+    token: Optional[str] = None
+
+    model_config = SettingsConfigDict(
+        env_prefix="ADMIN_",  # ADMIN_TOKEN
+    )
+
+
+class CompressionConfig(EnvSettings):
+    """ストリーミングレスポンス（SSE・エクスポート）の圧縮設定"""
+    enabled: bool = True
+    # サーバー側の優先順（カンマ区切り、br は brotli がインストールされている場合のみ）
+    encodings: str = "br,gzip"
+    # これより小さいイベントは溜めてまとめて圧縮・フラッシュする（バイト）
+    min_size: int = 512
+    # 小さいイベントを溜める最大秒数
+    max_delay: float = 0.05
+    # エクスポート（NDJSON）をまとめて圧縮する単位（バイト）
+    batch_size: int = 65536
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+    model_config = SettingsConfigDict(
+        env_prefix="COMPRESSION_",  # COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE など
+    )
+
+    @property
+    def encoding_list(self) -> list[str]:
+        """優先順のエンコーディング名"""
+        return [name.strip().lower() for name in self.encodings.split(",") if name.strip()]
+
+
+class RateLimitConfig(EnvSettings):
+    """クライアント・スレッドごとのレート制限（トークンバケット）の設定"""
+    # 既定では無効（ロードバランサーの背後では、RATE_LIMIT_TRUSTED_PROXIES を設定しないと全員が同じ接続元になる）
+    enabled: bool = False
+    # クライアント（APIキー、なければ接続元アドレス）ごとの1秒あたりのリクエスト数と瞬間的な上限
+    client_rate: float = 5.0
+    client_burst: int = 20
+    # スレッドごとの1秒あたりのターン数と瞬間的な上限
+    thread_rate: float = 1.0
+    thread_burst: int = 5
+    # プロセス内で保持するバケットの最大数
+    max_keys: int = 100_000
+    # X-Forwarded-For を信頼する接続元（ロードバランサー・プロキシのアドレス、カンマ区切り）
+    trusted_proxies: str = ""
+
+    model_config = SettingsConfigDict(
+        env_prefix="RATE_LIMIT_",  # RATE_LIMIT_CLIENT_RATE, RATE_LIMIT_TRUSTED_PROXIES など
+    )
+
+    @property
+    def trusted_proxy_set(self) -> frozenset[str]:
+        """X-Forwarded-For を信頼する接続元アドレスの集合"""
+        return frozenset(address.strip() for address in self.trusted_proxies.split(",") if address.strip())
+
+
+class JobConfig(EnvSettings):
+    """バックグラウンドジョブ（/jobs）の設定"""
+    # 同時に実行するジョブ数（ワーカー数）
+    max_workers: int = 4
+    # 待ち行列の上限（超えた場合は503）
+    max_queued: int = 100
+    # ジョブとイベントを保存するディレクトリ（Noneの場合はメモリのみ、再起動で消える）
+    directory: Optional[str] = None
+    # 終了したジョブを保持する秒数
+    retention_seconds: float = 86400.0
+
+    model_config = SettingsConfigDict(
+        env_prefix="JOBS_",  # JOBS_MAX_WORKERS, JOBS_DIRECTORY など
+    )
+
+
+class LimitsConfig(EnvSettings):
+    """リクエストの大きさの上限と、大きな入力の退避"""
+    # リクエストボディの上限（バイト、超えた場合は413。0の場合は制限しない）
+    max_body_bytes: int = 1_048_576
+    # /threads/import のボディの上限（バイト、すべての行を検証してから書き込むのでメモリに載る大きさ。0の場合は制限しない）
+    max_import_bytes: int = 268_435_456
+    # これより長い入力はブロブストアに退避し、状態には先頭のみを残す（文字数、0の場合は退避しない）
+    inline_input_chars: int = 8192
+    # ブロブを保存するディレクトリ（Noneの場合はメモリ）
+    blob_directory: Optional[str] = None
+
+    model_config = SettingsConfigDict(
+        env_prefix="LIMITS_",  # LIMITS_MAX_BODY_BYTES, LIMITS_INLINE_INPUT_CHARS など
+    )
+
+
+class HealthConfig(EnvSettings):
+    """ヘルスチェック・レディネスの判定"""
+    # 起動時に各グラフを1回実行してから ready にする（Falseの場合は起動直後から ready）
+    warmup: bool = True
+    # ウォームアップで実行する入力と、グラフごとの期限（秒）
+    warmup_input: str = "hello"
+    warmup_timeout: float = 30.0
+    # 失敗したグラフのウォームアップをやり直す回数と、最初の待ち時間（秒、やり直すごとに2倍・上限あり）
+    warmup_retries: int = 5
+    warmup_backoff: float = 1.0
+    warmup_max_backoff: float = 30.0
+    # 実行中のストリーム数・スケジューラーの待ち数がこの値以上の場合は ready にしない（0の場合は判定しない）
+    max_in_flight: int = 0
+    max_queued: int = 0
+    # 直近のイベントループの遅延がこの秒数を超えた場合は ready にしない（0の場合は判定しない）
+    max_loop_lag: float = 0.5
+    # イベントループの遅延の計測間隔（秒）
+    loop_lag_interval: float = 0.25
+    # /saturation のチェックポインターの大きさ（全スレッドを走査する）を使い回す秒数（0の場合は毎回計算）
+    saturation_cache_seconds: float = 5.0
+
+    model_config = SettingsConfigDict(
+        env_prefix="HEALTH_",  # HEALTH_WARMUP, HEALTH_MAX_IN_FLIGHT など
+    )
+
+
+class LoopMonitorConfig(EnvSettings):
+    """イベントループをブロックしたコールバックの検出"""
+    # ループがこの秒数以上止まった場合に、実行中のコルーチンを記録する（0の場合は検出しない）
+    slow_callback_threshold: float = 0.1
+    # 止まっている間のスタックをサンプリングしてログに出す
+    debug: bool = False
+    # /admin/loop で返す直近の件数
+    history: int = 100
+
+    model_config = SettingsConfigDict(
+        env_prefix="LOOP_MONITOR_",  # LOOP_MONITOR_SLOW_CALLBACK_THRESHOLD, LOOP_MONITOR_DEBUG など
+    )
+
+
+class ProfilerConfig(EnvSettings):
+    """稼働中のワーカーのサンプリングCPUプロファイル（/admin/profile とシグナル）"""
+    # サンプリング間隔（秒）
+    interval: float = 0.01
+    # 1回のプロファイルの最大秒数
+    max_seconds: float = 60.0
+    # プロファイルを始めるシグナル（空の場合は登録しない）と、シグナルで始めた場合の秒数・対象
+    # （graph: stream_execution とノード関数のスタックのみ、all: すべてのスレッド）
+    signal: str = "SIGUSR1"
+    signal_seconds: float = 10.0
+    signal_scope: Literal["graph", "all"] = "graph"
+    # シグナルで始めたプロファイルの書き出し先（Noneの場合は一時ディレクトリ）
+    directory: Optional[str] = None
+
+    model_config = SettingsConfigDict(
+        env_prefix="PROFILER_",  # PROFILER_SIGNAL, PROFILER_DIRECTORY など
+    )
+
+
+class ServerConfig(EnvSettings):
+    """
+    uvicorn の起動設定（server.uvicorn_options で ENVIRONMENT に応じたプロファイルに展開）
+
+    未設定（None）の項目はプロファイルの値を使う。
+    """
+    host: str = "127.0.0.1"
+    port: int = 8000
+    # ワーカープロセス数（未設定の場合は1。スレッド・ジョブはワーカーごとに独立するので、
+    # 複数にする場合は外部のチェックポインター・ジョブの保存先を使うこと）
+    workers: Optional[int] = None
+    # イベントループ（auto / asyncio / uvloop）とHTTPパーサー（auto / h11 / httptools）
+    loop: Optional[str] = None
+    http: Optional[str] = None
+    # Keep-Alive の待ち秒数（ロードバランサーのアイドルタイムアウトより長くする）
+    keep_alive: Optional[int] = None
+    # listen() のバックログ（接続の急増時にカーネルで待たせる数）
+    backlog: Optional[int] = None
+
+    model_config = SettingsConfigDict(
+        env_prefix="SERVER_",  # SERVER_HOST, SERVER_WORKERS, SERVER_KEEP_ALIVE など
+    )
+
+
 class AppSettings:
     """アプリケーション全体の設定クラス（通常のクラスとして実装）"""
     
@@ -65,6 +387,17 @@ class AppSettings:
         self.graph = GraphConfig()
         self.openai = OpenAIConfig()
         self.grafana = GrafanaConfig()
+        self.scheduler = SchedulerConfig()
+        self.shutdown = ShutdownConfig()
+        self.admin = AdminConfig()
+        self.compression = CompressionConfig()
+        self.rate_limit = RateLimitConfig()
+        self.jobs = JobConfig()
+        self.server = ServerConfig()
+        self.limits = LimitsConfig()
+        self.health = HealthConfig()
+        self.loop_monitor = LoopMonitorConfig()
+        self.profiler = ProfilerConfig()
         
         # アプリケーション設定（環境変数から読み込み）
         self.debug: bool = self._get_env_bool("DEBUG", False)
@@ -73,15 +406,16 @@ class AppSettings:
     
     @staticmethod
     def _get_env_str(key: str, default: str) -> str:
-        """環境変数から文字列を取得"""
-        import os
-        return os.getenv(key, default)
+        """環境変数（未設定の場合は .env）から文字列を取得"""
+        value = os.getenv(key)
+        if value is None:
+            value = read_env_file().get(key.lower())
+        return default if value is None else value
     
     @staticmethod
     def _get_env_bool(key: str, default: bool) -> bool:
-        """環境変数からブール値を取得"""
-        import os
-        value = os.getenv(key, str(default)).lower()
+        """環境変数（未設定の場合は .env）からブール値を取得"""
+        value = AppSettings._get_env_str(key, str(default)).lower()
         return value in ("true", "1", "yes", "on")
 
 
@@ -91,10 +425,10 @@ _default_graph_config: GraphConfig | None = None
 _default_settings: AppSettings | None = None
 
 def get_default_graph_config() -> GraphConfig:
-    """デフォルトグラフ設定を取得（遅延評価）"""
+    """デフォルトグラフ設定を取得（遅延評価、get_default_settings().graph を共有）"""
     global _default_graph_config
     if _default_graph_config is None:
-        _default_graph_config = GraphConfig()
+        _default_graph_config = get_default_settings().graph
     return _default_graph_config
 
 def get_default_settings() -> AppSettings:
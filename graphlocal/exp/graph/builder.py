@@ -2,32 +2,61 @@
 # ---------------------------------------------------------
 # グラフ構築ロジック
 # ---------------------------------------------------------
-from typing import Optional
-
-from langgraph.graph import START, END, StateGraph
-from langgraph.checkpoint.memory import MemorySaver
+from typing import Any, Optional
 
 from config import GraphConfig
+from graph.messages import CHECKPOINT_TYPES
 from graph.state import GraphState, StepType
-from graph.nodes import create_planner, create_call_tool, create_respond, router, NodeName
+from graph.nodes import create_planner, create_call_tool, create_composer, create_respond, router, NodeName
+
+
+def create_serializer():
+    """
+    グラフ状態のコンパクト表現（graph.messages）のデシリアライズを許可したシリアライザを作成
+    
+    Returns:
+        JsonPlusSerializer（msgpack）
+    """
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    
+    return JsonPlusSerializer(
+        allowed_msgpack_modules=[(cls.__module__, cls.__name__) for cls in CHECKPOINT_TYPES]
+    )
 
 
-def create_graph(config: Optional[GraphConfig] = None, checkpointer=None):
+def create_checkpointer():
+    """
+    グラフ状態のコンパクト表現（graph.messages）のデシリアライズを許可した MemorySaver を作成
+    
+    Returns:
+        チェックポインター
+    """
+    from langgraph.checkpoint.memory import MemorySaver
+    
+    return MemorySaver(serde=create_serializer())
+
+
+def create_graph(config: Optional[GraphConfig] = None, checkpointer=None, speculative: bool = False):
     """
     グラフを構築して返す
     
     Args:
         config: グラフ設定（Noneの場合はデフォルト設定を使用）
-        checkpointer: チェックポインター（Noneの場合はMemorySaverを使用）
+        checkpointer: チェックポインター（Noneの場合は create_checkpointer() の MemorySaver を使用）
+        speculative: Trueの場合、プランナーと並行に応答を投機的に生成し、プランナーの判定で
+            ツール経路・応答経路に分岐する（ツール経路になった場合は投機結果を破棄）
     
     Returns:
         コンパイルされたグラフ
     """
+    # langgraph の読み込みは重いため、グラフを構築するときまで遅延させる
+    from langgraph.graph import START, END, StateGraph
+    
     if checkpointer is None:
-        checkpointer = MemorySaver()
+        checkpointer = create_checkpointer()
     
     # 設定に基づいてノード関数を作成
-    planner_node = create_planner(config)
+    planner_node = create_planner(config, speculate=create_composer(config) if speculative else None)
     tool_node = create_call_tool(config)
     respond_node = create_respond(config)
     
@@ -44,7 +73,14 @@ def create_graph(config: Optional[GraphConfig] = None, checkpointer=None):
             NodeName.RESPOND: NodeName.RESPOND
         }
     )
-    builder.add_edge(NodeName.PLANNER, NodeName.TOOL)
+    if speculative:
+        builder.add_conditional_edges(
+            NodeName.PLANNER,
+            router,
+            {NodeName.TOOL: NodeName.TOOL, NodeName.RESPOND: NodeName.RESPOND}
+        )
+    else:
+        builder.add_edge(NodeName.PLANNER, NodeName.TOOL)
     builder.add_edge(NodeName.TOOL, NodeName.RESPOND)
     builder.add_edge(NodeName.RESPOND, END)
     
@@ -52,4 +88,14 @@ def create_graph(config: Optional[GraphConfig] = None, checkpointer=None):
 
 
 # デフォルトグラフインスタンス（後方互換性のため）
-graph = create_graph()
+# インポート時にグラフを構築しないよう、初回アクセス時に作成する
+_graph: Any = None
+
+
+def __getattr__(name: str) -> Any:
+    global _graph
+    if name == "graph":
+        if _graph is None:
+            _graph = create_graph()
+        return _graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
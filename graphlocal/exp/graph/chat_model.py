@@ -0,0 +1,140 @@
+# graph/chat_model.py
+# ---------------------------------------------------------
+# 応答ノードのチャットモデル（スタブと、トークンをまとめて送るラッパー）
+# ---------------------------------------------------------
+import asyncio
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from config import GraphConfig
+from graph.latency import SimulatedLatency, TokenRate, response_latency, split_tokens
+
+
+class StubChatModel(BaseChatModel):
+    """
+    エコー応答を1トークンずつ生成するスタブモデル
+
+    システムメッセージ（あれば）と "Echo: <最後のユーザー入力>" を連結して返す。
+    最初のトークンまでの時間は latency、以降はトークン単位の生成速度 rate に従う。
+    """
+    latency: SimulatedLatency
+    rate: TokenRate
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-echo"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        system = "".join(m.content for m in messages if m.type == "system")
+        human = next((m.content for m in reversed(messages) if m.type == "human"), "")
+        return system + f"Echo: {human}"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        self.latency.wait("respond")
+        time.sleep(self.rate.delay(len(split_tokens(text))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        text = self._reply(messages)
+        await self.latency("respond")
+        await asyncio.sleep(self.rate.delay(len(split_tokens(text))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await self.latency("respond")
+        for index, token in enumerate(split_tokens(self._reply(messages))):
+            if index:
+                await asyncio.sleep(self.rate.delay(1))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class CoalescingChatModel(BaseChatModel):
+    """
+    内側のモデルのストリーミング出力を、chunk_tokens 個または max_delay 秒ごとにまとめて返すラッパー
+
+    1トークンごとのSSEイベントはヘッダー・JSONのオーバーヘッドが大きいため、まとめて送る。
+    内側のモデルはコールバックなしで呼び出し、トークンのコールバックは BaseChatModel が
+    _astream の返すチャンクごとに呼ぶので、ストリームにはまとめた後のチャンクだけが流れる。
+    """
+    inner: BaseChatModel
+    chunk_tokens: int = 1
+    max_delay: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"coalescing-{self.inner._llm_type}"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return self.inner._generate(messages, stop=stop, **kwargs)
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        return await self.inner._agenerate(messages, stop=stop, **kwargs)
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        chunks = aiter(self.inner._astream(messages, stop=stop, **kwargs))
+        pending: Optional[ChatGenerationChunk] = None
+        count = 0
+        held_since = 0.0
+        next_chunk: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(anext(chunks))
+                timeout = None
+                if pending is not None and self.max_delay is not None:
+                    timeout = max(0.0, held_since + self.max_delay - time.monotonic())
+                done, _ = await asyncio.wait({next_chunk}, timeout=timeout)
+                if not done:
+                    # 次のトークンが max_delay 以内に来なければ、溜まった分を送る
+                    yield pending
+                    pending, count = None, 0
+                    continue
+                task, next_chunk = next_chunk, None
+                try:
+                    chunk = task.result()
+                except StopAsyncIteration:
+                    break
+                if pending is None:
+                    pending, held_since = chunk, time.monotonic()
+                else:
+                    pending = pending + chunk
+                count += 1
+                if count >= self.chunk_tokens:
+                    yield pending
+                    pending, count = None, 0
+            if pending is not None:
+                yield pending
+        finally:
+            # 読みかけの anext を中断してから、内側のストリームを閉じる（途中で打ち切られた場合も後始末させる）
+            if next_chunk is not None:
+                next_chunk.cancel()
+                await asyncio.gather(next_chunk, return_exceptions=True)
+            await chunks.aclose()
+
+
+def create_chat_model(config: GraphConfig) -> BaseChatModel:
+    """設定から応答ノードのチャットモデル（スタブ）を作成"""
+    model: BaseChatModel = StubChatModel(
+        latency=response_latency(config),
+        rate=TokenRate(config.response_tokens_per_second),
+    )
+    if config.response_chunk_tokens > 1 or config.response_chunk_max_delay is not None:
+        model = CoalescingChatModel(
+            inner=model,
+            chunk_tokens=config.response_chunk_tokens,
+            max_delay=config.response_chunk_max_delay,
+        )
+    return model
@@ -0,0 +1,231 @@
+# graph/latency.py
+# ---------------------------------------------------------
+# スタブノード（ダミーツール・応答）の擬似レイテンシモデル
+#
+# 仕様文字列:
+#   "0.3" / "fixed:0.3"                     固定値（秒）
+#   "lognormal:median=0.3,sigma=0.6"       対数正規分布（max=... で上限）
+#   "histogram:traces/tool.json"           本番トレースの記録を再生
+# ---------------------------------------------------------
+import abc
+import asyncio
+import bisect
+import json
+import math
+import random
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from config import GraphConfig
+
+# 応答テキストのトークン（空白区切り、末尾の空白を含む）
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class InjectedError(RuntimeError):
+    """エラー注入で発生させたエラー"""
+
+
+class LatencyModel(abc.ABC):
+    """レイテンシ（秒）の分布"""
+
+    @abc.abstractmethod
+    def sample(self) -> float:
+        """レイテンシを1つサンプリング"""
+
+
+class FixedLatency(LatencyModel):
+    """固定レイテンシ"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def sample(self) -> float:
+        return self.seconds
+
+
+class LogNormalLatency(LatencyModel):
+    """対数正規分布のレイテンシ（中央値と対数の標準偏差で指定）"""
+
+    def __init__(
+        self,
+        median: float,
+        sigma: float,
+        max_seconds: Optional[float] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        if median <= 0:
+            raise ValueError("lognormal median must be > 0")
+        self.mu = math.log(median)
+        self.sigma = sigma
+        self.max_seconds = max_seconds
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        value = self.rng.lognormvariate(self.mu, self.sigma)
+        return value if self.max_seconds is None else min(value, self.max_seconds)
+
+
+class HistogramLatency(LatencyModel):
+    """
+    記録されたレイテンシを再生する分布
+
+    サンプル列（そのまま一様に再生）か、累積でないバケット [(上限, 件数), ...]
+    （件数で重み付けしてバケットを選び、バケット内は一様）のどちらかで作成する。
+    """
+
+    def __init__(
+        self,
+        samples: Optional[Sequence[float]] = None,
+        buckets: Optional[Sequence[Tuple[float, int]]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        if not samples and not buckets:
+            raise ValueError("histogram requires samples or buckets")
+        self.samples = list(samples or [])
+        self.bounds: List[Tuple[float, float]] = []
+        self.cumulative: List[int] = []
+        lower, total = 0.0, 0
+        for upper, count in sorted(buckets or []):
+            if count > 0:
+                total += count
+                self.bounds.append((lower, upper))
+                self.cumulative.append(total)
+            lower = upper
+        if buckets and not self.cumulative:
+            raise ValueError("histogram buckets are empty")
+        self.rng = rng or random.Random()
+
+    @classmethod
+    def from_file(cls, path: str, rng: Optional[random.Random] = None) -> "HistogramLatency":
+        """
+        記録ファイルから作成
+
+        JSON のサンプル配列、{"buckets": [[上限, 件数], ...]}、または1行1サンプルのテキストを読み込む。
+        """
+        text = Path(path).read_text(encoding="utf-8")
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return cls(samples=[float(line) for line in text.split() if line], rng=rng)
+        if isinstance(data, dict):
+            return cls(buckets=[(float(upper), int(count)) for upper, count in data["buckets"]], rng=rng)
+        return cls(samples=[float(value) for value in data], rng=rng)
+
+    def sample(self) -> float:
+        if self.samples:
+            return self.rng.choice(self.samples)
+        index = bisect.bisect_left(self.cumulative, self.rng.randrange(self.cumulative[-1]) + 1)
+        lower, upper = self.bounds[index]
+        return self.rng.uniform(lower, upper)
+
+
+def parse_latency_model(spec: str, rng: Optional[random.Random] = None) -> LatencyModel:
+    """
+    仕様文字列からレイテンシモデルを作成
+
+    Raises:
+        ValueError: 仕様文字列が不正な場合
+    """
+    kind, _, args = spec.strip().partition(":")
+    if not args:
+        try:
+            return FixedLatency(float(kind))
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec!r}") from None
+    if kind == "fixed":
+        return FixedLatency(float(args))
+    if kind == "histogram":
+        return HistogramLatency.from_file(args, rng=rng)
+    if kind == "lognormal":
+        params = dict(part.split("=", 1) for part in args.split(",") if part)
+        max_seconds = params.get("max")
+        return LogNormalLatency(
+            median=float(params["median"]),
+            sigma=float(params.get("sigma", 0.5)),
+            max_seconds=float(max_seconds) if max_seconds is not None else None,
+            rng=rng,
+        )
+    raise ValueError(f"Unknown latency model {kind!r}. Available: fixed, lognormal, histogram")
+
+
+class SimulatedLatency:
+    """スタブノードの処理時間（レイテンシモデルとエラー注入）"""
+
+    def __init__(self, model: LatencyModel, error_rate: float = 0.0, rng: Optional[random.Random] = None):
+        """
+        初期化
+
+        Args:
+            model: レイテンシモデル
+            error_rate: InjectedError を発生させる確率（0〜1）
+            rng: エラー注入に使う乱数生成器
+        """
+        self.model = model
+        self.error_rate = error_rate
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        """処理時間をサンプリング"""
+        return self.model.sample()
+
+    def maybe_fail(self, what: str) -> None:
+        """
+        エラー注入の確率でエラーを発生させる
+
+        Raises:
+            InjectedError: エラーを注入した場合
+        """
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise InjectedError(f"injected {what} error")
+
+    async def __call__(self, what: str) -> None:
+        """処理時間だけ待ってから、エラー注入の確率でエラーを発生させる"""
+        await asyncio.sleep(self.sample())
+        self.maybe_fail(what)
+
+    def wait(self, what: str) -> None:
+        """__call__ の同期版（スレッドをブロックして待つ）"""
+        time.sleep(self.sample())
+        self.maybe_fail(what)
+
+
+class TokenRate:
+    """トークン単位の生成速度"""
+
+    def __init__(self, tokens_per_second: Optional[float]):
+        self.tokens_per_second = tokens_per_second
+
+    def delay(self, tokens: int) -> float:
+        """tokens 個のトークンの生成にかかる秒数（速度が未設定の場合は0）"""
+        if not self.tokens_per_second:
+            return 0.0
+        return tokens / self.tokens_per_second
+
+
+def split_tokens(text: str) -> List[str]:
+    """応答テキストをトークンに分割（連結すると元のテキストに戻る）"""
+    return TOKEN_PATTERN.findall(text)
+
+
+def _rng(cfg: GraphConfig, stream: str) -> random.Random:
+    """設定のシードから、用途ごとに独立した乱数生成器を作成"""
+    return random.Random(None if cfg.latency_seed is None else f"{cfg.latency_seed}:{stream}")
+
+
+def tool_latency(cfg: GraphConfig) -> SimulatedLatency:
+    """ダミーツールの処理時間（tool_latency が未設定の場合は tool_processing_delay の固定値）"""
+    rng = _rng(cfg, "tool")
+    model = parse_latency_model(cfg.tool_latency, rng) if cfg.tool_latency else FixedLatency(cfg.tool_processing_delay)
+    return SimulatedLatency(model, cfg.tool_error_rate, rng)
+
+
+def response_latency(cfg: GraphConfig) -> SimulatedLatency:
+    """応答の最初のトークンまでの時間（response_latency が未設定の場合は response_delay の固定値）"""
+    rng = _rng(cfg, "response")
+    model = (
+        parse_latency_model(cfg.response_latency, rng) if cfg.response_latency else FixedLatency(cfg.response_delay)
+    )
+    return SimulatedLatency(model, cfg.response_error_rate, rng)
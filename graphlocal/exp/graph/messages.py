@@ -0,0 +1,145 @@
+# graph/messages.py
+# ---------------------------------------------------------
+# グラフ状態で保持するコンパクトなメッセージ・ツール結果の表現
+# ---------------------------------------------------------
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+# メッセージタイプとLangChainのクラス名・ロールの対応
+MESSAGE_CLASS_NAMES = {
+    "human": "HumanMessage",
+    "ai": "AIMessage",
+    "tool": "ToolMessage",
+    "system": "SystemMessage",
+}
+MESSAGE_ROLES = {
+    "human": "user",
+    "ai": "assistant",
+    "tool": "tool",
+    "system": "system",
+}
+# 退避した全文のブロブIDを入れる additional_kwargs のキー
+BLOB_KEY = "blob"
+# チャンク型（AIMessageChunk など）の type を通常のメッセージタイプに正規化
+_CHUNK_TYPES = {f"{name}Chunk": type_ for type_, name in MESSAGE_CLASS_NAMES.items()}
+
+
+@dataclass(slots=True)
+class ToolResult:
+    """
+    ツール呼び出し結果
+
+    ref は出力を共有ストア（graph.result_store）に移した場合のキーで、その場合 output は空。
+    """
+    id: str
+    name: str
+    input: Dict[str, Any]
+    output: Dict[str, Any]
+    error: Optional[str] = None
+    degraded: bool = False
+    ref: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolResult":
+        """辞書形式のツール結果から作成"""
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            input=data.get("input", {}),
+            output=data.get("output", {}),
+            error=data.get("error"),
+            degraded=data.get("degraded", False),
+            ref=data.get("ref"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換（未設定の error / degraded / ref は含めない）"""
+        data = {"id": self.id, "name": self.name, "input": self.input, "output": self.output}
+        if self.error is not None:
+            data["error"] = self.error
+        if self.degraded:
+            data["degraded"] = True
+        if self.ref is not None:
+            data["ref"] = self.ref
+        return data
+
+
+@dataclass(slots=True)
+class CompactMessage:
+    """
+    グラフ状態で保持するメッセージ
+
+    ノードが参照するのは type と content だけなので、LangChainのメッセージが持つ
+    id・メタデータ・additional_kwargs などは保持しない。
+    ツールメッセージの content はJSON文字列ではなく ToolResult として保持する。
+    blob は大きな入力をブロブストアに退避した場合の全文のブロブID（content は先頭のみ）。
+    """
+    type: str
+    content: Any
+    tool_call_id: Optional[str] = None
+    blob: Optional[str] = None
+
+
+def to_compact_message(message: Any) -> CompactMessage:
+    """LangChainのメッセージ（またはCompactMessage）をCompactMessageに変換"""
+    if isinstance(message, CompactMessage):
+        return message
+    type_ = _CHUNK_TYPES.get(message.type, message.type)
+    content = message.content
+    if type_ == "tool":
+        content = _parse_tool_content(content)
+    additional_kwargs = getattr(message, "additional_kwargs", None) or {}
+    return CompactMessage(
+        type=type_,
+        content=content,
+        tool_call_id=getattr(message, "tool_call_id", None),
+        blob=additional_kwargs.get(BLOB_KEY),
+    )
+
+
+def _parse_tool_content(content: Any) -> Any:
+    """ツール結果のJSON文字列をToolResultに戻す（ツール結果の形式でなければそのまま返す）"""
+    if not isinstance(content, str) or not content.startswith("{"):
+        return content
+    try:
+        data = json.loads(content)
+        result = ToolResult.from_dict(data)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return content
+    # 往復で内容が変わる場合（未知のキーを含む場合など）は元の文字列を保持する
+    return result if result.to_dict() == data else content
+
+
+def collect_blobs(values: Dict[str, Any]) -> List[str]:
+    """グラフ状態（チャネルの値）の messages が参照しているブロブID"""
+    blobs = []
+    for message in values.get("messages") or ():
+        if isinstance(message, CompactMessage):
+            blob = message.blob
+        else:
+            blob = (getattr(message, "additional_kwargs", None) or {}).get(BLOB_KEY)
+        if blob is not None and blob not in blobs:
+            blobs.append(blob)
+    return blobs
+
+
+def to_tool_result(result: Any) -> ToolResult:
+    """辞書形式のツール結果（またはToolResult）をToolResultに変換"""
+    if isinstance(result, ToolResult):
+        return result
+    return ToolResult.from_dict(result)
+
+
+def compact_messages(_: List[CompactMessage], new: Iterable[Any]) -> List[CompactMessage]:
+    """messages チャネルのリデューサー（書き込まれた値で置き換え、コンパクト化する）"""
+    return [to_compact_message(m) for m in new]
+
+
+def compact_tool_results(_: List[ToolResult], new: Iterable[Any]) -> List[ToolResult]:
+    """tool_results チャネルのリデューサー（書き込まれた値で置き換え、コンパクト化する）"""
+    return [to_tool_result(r) for r in new]
+
+
+# チェックポイントのデシリアライズを許可する型
+CHECKPOINT_TYPES = (CompactMessage, ToolResult)
@@ -6,12 +6,26 @@ import asyncio
 import json
 import logging
 from uuid import uuid4
-from typing import Any, Callable, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
 
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 
 from config import GraphConfig
+from graph.latency import InjectedError, SimulatedLatency, TokenRate, response_latency, split_tokens, tool_latency
+from graph.messages import ToolResult
+from graph.result_store import checkpoint_owner, get_tool_result_store
 from graph.state import GraphState, StepType
+from graph.speculation import discard_speculation, start_speculation, take_speculation
+from graph.run_scope import get_run_scope
+from graph.tool_stream import ToolStream, pop_tool_stream, register_tool_stream
+from graph.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    get_deadline,
+    run_with_timeout,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -42,33 +56,153 @@ def get_config() -> GraphConfig:
     return _config
 
 
-def create_planner(config: Optional[GraphConfig] = None) -> Callable:
-    """プランナーノード関数を作成（設定注入版）"""
+def _user_text(messages: list) -> str:
+    """最後のメッセージがユーザー入力ならそのテキストを返す"""
+    last = messages[-1]
+    return (last.content or "").strip() if last.type == "human" else ""
+
+
+def create_planner(
+    config: Optional[GraphConfig] = None,
+    speculate: Optional[Callable[[GraphState], Awaitable[str]]] = None,
+) -> Callable:
+    """
+    プランナーノード関数を作成（設定注入版）
+    
+    Args:
+        config: グラフ設定
+        speculate: 指定した場合、計画と並行に応答を投機的に生成する（create_composer の戻り値）
+    """
     cfg = config or get_config()
     
-    async def planner(state: GraphState) -> Dict[str, Any]:
+    async def plan(messages: list) -> str:
+        """最後のユーザー入力から次のステップを決定"""
+        last = messages[-1]
+        text = (last.content or "").strip().lower() if last.type == "human" else ""
+        return StepType.TOOLING if text.startswith(cfg.tool_prefix) else StepType.RESPONDING
+    
+    async def decide(state: GraphState, config: RunnableConfig) -> str:
         """入力を見て、'tool:' で始まればツールノードへ。それ以外は応答へ。"""
         try:
             messages = state.get("messages", [])
             if not messages:
                 logger.warning("planner: messages is empty")
-                return {"step": StepType.RESPONDING}
+                return StepType.RESPONDING
             
-            last = messages[-1]
-            text = (last.content or "").strip().lower() if isinstance(last, HumanMessage) else ""
-            step = StepType.TOOLING if text.startswith(cfg.tool_prefix) else StepType.RESPONDING
-            return {"step": step}
+            return await run_with_timeout(plan(messages), cfg.planner_timeout, get_deadline(config))
+        except DeadlineExceeded as e:
+            logger.warning(f"planner timed out: {e}")
+            return StepType.RESPONDING  # タイムアウト時は応答へ
         except Exception as e:
             logger.error(f"planner error: {e}", exc_info=True)
-            return {"step": StepType.RESPONDING}  # エラー時は応答へ
+            return StepType.RESPONDING  # エラー時は応答へ
+    
+    async def planner(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+        """次のステップを決定（投機実行時は応答経路ならば投機結果を応答ノードに渡し、ツール経路ならば破棄）"""
+        if speculate is None or not state.get("messages"):
+            return {"step": await decide(state, config)}
+        
+        speculation_id = start_speculation(speculate(state), get_run_scope(config))
+        try:
+            step = await decide(state, config)
+        except BaseException:
+            discard_speculation(speculation_id)
+            raise
+        if step == StepType.RESPONDING:
+            return {"step": step, "speculation": speculation_id}
+        discard_speculation(speculation_id)
+        return {"step": step}
     return planner
 
 
+def _search_items(query: str) -> list:
+    """ダミー検索の結果"""
+    return [f"{query} - A", f"{query} - B", f"{query} - C"]
+
+
+def _search_output(query: str, items: list) -> Dict[str, Any]:
+    """ダミー検索ツールの出力形式"""
+    return {"top": f"Top result for '{query}'", "items": items}
+
+
+async def fake_search(query: str, latency: SimulatedLatency) -> Dict[str, Any]:
+    """ダミー検索ツール（検索っぽい結果を返す）"""
+    await latency("tool")
+    return _search_output(query, _search_items(query))
+
+
+async def fake_search_stream(query: str, latency: SimulatedLatency) -> AsyncIterator[str]:
+    """ダミー検索ツール（ストリーミング版、結果を1件ずつ返す）"""
+    items = _search_items(query)
+    total = latency.sample()
+    for item in items:
+        await asyncio.sleep(total / len(items))
+        latency.maybe_fail("tool")
+        yield item
+
+
+def _degrade(result: ToolResult, error: Exception, items: Optional[list] = None) -> None:
+    """縮退結果を設定（ストリーミングの場合は届いた分の部分結果を残す）"""
+    result.output = {"top": None, "items": list(items or [])}
+    result.error = str(error)
+    result.degraded = True
+
+
+def _share_output(result: ToolResult, cfg: GraphConfig, config: RunnableConfig) -> ToolResult:
+    """チェックポイントに残る実行では、出力を共有ストアに移して状態には参照だけを残す"""
+    owner = checkpoint_owner(config) if cfg.shared_tool_results else None
+    if owner is None:
+        return result
+    return get_tool_result_store().share(result, owner)
+
+
+def _tool_message(result: ToolResult) -> ToolMessage:
+    """ツール呼び出し結果のツールメッセージ"""
+    return ToolMessage(tool_call_id=result.id, content=json.dumps(result.to_dict(), ensure_ascii=False))
+
+
+def _get_stream_writer() -> Callable[[Any], None]:
+    """custom ストリームへの書き込み関数を取得（グラフ外から呼ばれた場合は何もしない）"""
+    from langgraph.config import get_stream_writer
+    
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _: None
+
+
 def create_call_tool(config: Optional[GraphConfig] = None) -> Callable:
     """ツール呼び出しノード関数を作成（設定注入版）"""
     cfg = config or get_config()
+    latency = tool_latency(cfg)
+    breaker = CircuitBreaker(
+        cfg.fake_tool_name,
+        failure_threshold=cfg.circuit_failure_threshold,
+        latency_threshold=cfg.circuit_latency_threshold,
+        window_size=cfg.circuit_window_size,
+        min_calls=cfg.circuit_min_calls,
+        reset_timeout=cfg.circuit_reset_timeout,
+    )
+    
+    async def run_stream(stream: ToolStream, query: str, deadline: Optional[float]) -> None:
+        """ストリーミングツールを実行し、部分結果を stream に書き込む"""
+        async def consume():
+            async for item in fake_search_stream(query, latency):
+                stream.append(item)
+        
+        try:
+            await breaker.call(consume(), cfg.tool_timeout, deadline)
+            stream.result.output = _search_output(query, stream.items)
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            logger.warning(f"call_tool degraded: {e}")
+            _degrade(stream.result, e, stream.items)
+        except Exception as e:
+            logger.error(f"call_tool stream error: {e}", exc_info=True)
+            _degrade(stream.result, e, stream.items)
+        finally:
+            stream.finish()
     
-    async def call_tool(state: GraphState) -> Dict[str, Any]:
+    async def call_tool(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
         """ダミーツール（検索っぽい結果を返す）。messages と updates 両方に出す。"""
         try:
             messages = state.get("messages", [])
@@ -77,63 +211,206 @@ def create_call_tool(config: Optional[GraphConfig] = None) -> Callable:
                 return {"step": StepType.RESPONDING}
             
             last = messages[-1]
-            user_text = (last.content or "").strip() if isinstance(last, HumanMessage) else ""
+            user_text = (last.content or "").strip() if last.type == "human" else ""
             query = user_text.split(":", 1)[1].strip() if ":" in user_text else user_text
 
-            await asyncio.sleep(cfg.tool_processing_delay)
-
             tool_call_id = f"tool-{uuid4().hex[:8]}"
-            result = {
-                "id": tool_call_id,
-                "name": cfg.fake_tool_name,
-                "input": {"q": query},
-                "output": {
-                    "top": f"Top result for '{query}'",
-                    "items": [f"{query} - A", f"{query} - B", f"{query} - C"],
-                },
-            }
-
-            tool_msg = ToolMessage(tool_call_id=tool_call_id, content=json.dumps(result, ensure_ascii=False))
-            return {"messages": [tool_msg], "tool_results": [result], "step": StepType.RESPONDING}
+            result = ToolResult(id=tool_call_id, name=cfg.fake_tool_name, input={"q": query}, output={})
+            if cfg.tool_streaming:
+                # 完了を待たずに応答ノードへ進み、部分結果は応答ノードが受け取る
+                stream = ToolStream(result)
+                stream.start(run_stream(stream, query, get_deadline(config)))
+                stream_id = register_tool_stream(stream, get_run_scope(config))
+                return {"tool_stream": stream_id, "step": StepType.RESPONDING}
+            try:
+                result.output = await breaker.call(
+                    fake_search(query, latency), cfg.tool_timeout, get_deadline(config)
+                )
+            except (CircuitOpenError, DeadlineExceeded, InjectedError) as e:
+                # 縮退応答: ツールを待たずに空の結果で応答へ進む
+                logger.warning(f"call_tool degraded: {e}")
+                _degrade(result, e)
+            except Exception as e:
+                # ツールの想定外のエラーも縮退結果として記録する（ストリーミングの場合と同じ）
+                logger.error(f"call_tool error: {e}", exc_info=True)
+                _degrade(result, e)
+
+            result = _share_output(result, cfg, config)
+            return {"messages": [_tool_message(result)], "tool_results": [result], "step": StepType.RESPONDING}
         except Exception as e:
             logger.error(f"call_tool error: {e}", exc_info=True)
             return {"step": StepType.RESPONDING}  # エラー時は応答へ
     return call_tool
 
 
-def create_respond(config: Optional[GraphConfig] = None) -> Callable:
-    """応答ノード関数を作成（設定注入版）"""
+def _tool_prefix(tool_results: list) -> str:
+    """ツールの利用状況に応じた応答の前置き"""
+    if tool_results and tool_results[-1].degraded:
+        return "（ツールが利用できませんでした）\n"
+    elif tool_results:
+        return "（ツールを使いました）\n"
+    return ""
+
+
+def create_composer(config: Optional[GraphConfig] = None) -> Callable[[GraphState], Awaitable[str]]:
+    """応答テキストの生成関数を作成（応答ノードとプランナーの投機実行で共有）"""
+    cfg = config or get_config()
+    generate = create_generator(cfg)
+    
+    async def compose(state: GraphState) -> str:
+        """応答テキストを生成"""
+        user_text = _user_text(state.get("messages") or [])
+        return await generate(_tool_prefix(state.get("tool_results") or []) + f"Echo: {user_text}")
+    return compose
+
+
+def create_generator(config: Optional[GraphConfig] = None) -> Callable[[str], Awaitable[str]]:
+    """
+    スタブの応答生成関数を作成
+    
+    最初のトークンまでの時間（response_latency）と、トークン単位の生成速度
+    （response_tokens_per_second）の分だけ待ってからテキストを返す。
+    """
     cfg = config or get_config()
+    latency = response_latency(cfg)
+    rate = TokenRate(cfg.response_tokens_per_second)
     
-    async def respond(state: GraphState) -> Dict[str, Any]:
+    async def generate(text: str) -> str:
+        await latency("respond")
+        await asyncio.sleep(rate.delay(len(split_tokens(text))))
+        return text
+    return generate
+
+
+def create_respond(config: Optional[GraphConfig] = None, model: Any = None) -> Callable:
+    """
+    応答ノード関数を作成（設定注入版）
+    
+    Args:
+        config: グラフ設定
+        model: 応答を生成するチャットモデル（Noneの場合、response_streaming が有効ならスタブモデル）
+    """
+    cfg = config or get_config()
+    compose = create_composer(cfg)
+    generate = create_generator(cfg)
+    if model is None and cfg.response_streaming:
+        from graph.chat_model import create_chat_model
+        model = create_chat_model(cfg)
+    
+    async def stream_reply(state: GraphState, config: RunnableConfig) -> AIMessage:
+        """チャットモデルで応答を生成（トークンはノードのコールバック経由で messages ストリームに流れる）"""
+        prompt = []
+        prefix = _tool_prefix(state.get("tool_results") or [])
+        if prefix:
+            prompt.append(SystemMessage(content=prefix))
+        prompt.append(HumanMessage(content=_user_text(state["messages"])))
+        merged = None
+        async for chunk in model.astream(prompt, config):
+            merged = chunk if merged is None else merged + chunk
+        # ストリーム済みのチャンクと同じIDにして、完成したメッセージが再送されないようにする
+        return AIMessage(content=merged.content if merged else "", id=merged.id if merged else None)
+    
+    async def compose_streamed(stream: ToolStream, user_text: str) -> str:
+        """ツールの部分結果を custom ストリームに流しつつ、最初の結果から応答テキストを生成"""
+        writer = _get_stream_writer()
+        
+        async def relay():
+            async for item in stream:
+                writer({"tool": stream.result.name, "id": stream.id, "item": item})
+        
+        relaying = asyncio.create_task(relay())
+        try:
+            # 最初の結果が届いた時点から応答の生成を始める
+            await stream.first()
+            generating = asyncio.create_task(generate(f"Echo: {user_text}"))
+            try:
+                await relaying
+                result = await stream.wait()
+                return _tool_prefix([result]) + await generating
+            finally:
+                generating.cancel()
+        finally:
+            relaying.cancel()
+    
+    def with_tool_result(
+        update: Dict[str, Any], state: GraphState, stream: Optional[ToolStream], error: Optional[Exception],
+        config: RunnableConfig,
+    ) -> Dict[str, Any]:
+        """
+        ストリーミングツールを受け取った場合、応答の前にツールメッセージとツール呼び出し結果を加えて
+        tool_stream を空にする（ツールが完了していなければ中断し、届いた分の部分結果で縮退する）
+        """
+        if state.get("tool_stream") is None:
+            return update
+        update = {**update, "tool_stream": None}
+        if stream is None:
+            return update
+        if not stream.done:
+            stream.cancel()
+            _degrade(stream.result, error or RuntimeError("tool stream was not completed"), stream.items)
+        result = _share_output(stream.result, cfg, config)
+        update["messages"] = [_tool_message(result), *update["messages"]]
+        update["tool_results"] = [result]
+        return update
+    
+    async def respond(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
         """最終応答（簡易エコー）"""
+        stream = pop_tool_stream(state.get("tool_stream"), get_run_scope(config))
+        speculation = take_speculation(state.get("speculation"), get_run_scope(config))
         try:
             messages = state.get("messages", [])
             if not messages:
                 logger.warning("respond: messages is empty")
-                return {"messages": [AIMessage(content="エラー: メッセージが見つかりません")]}
+                update = {"messages": [AIMessage(content="エラー: メッセージが見つかりません")]}
+                return with_tool_result(update, state, stream, None, config)
             
-            last = messages[-1]
-            user_text = (last.content or "").strip() if isinstance(last, HumanMessage) else ""
-            await asyncio.sleep(cfg.response_delay)
-            used_tool = bool(state.get("tool_results"))
-            content = ("（ツールを使いました）\n" if used_tool else "") + f"Echo: {user_text}"
+            if stream is not None:
+                content = await run_with_timeout(
+                    compose_streamed(stream, _user_text(messages)), cfg.respond_timeout, get_deadline(config)
+                )
+                return with_tool_result({"messages": [AIMessage(content=content)]}, state, stream, None, config)
+            if speculation is not None:
+                # プランナーと並行に生成を始めていた応答を採用する
+                content = await run_with_timeout(speculation.task, cfg.respond_timeout, get_deadline(config))
+                return {"messages": [AIMessage(content=content)], "speculation": None}
+            if model is not None:
+                message = await run_with_timeout(stream_reply(state, config), cfg.respond_timeout, get_deadline(config))
+                return {"messages": [message]}
+            content = await run_with_timeout(compose(state), cfg.respond_timeout, get_deadline(config))
             return {"messages": [AIMessage(content=content)]}
+        except DeadlineExceeded as e:
+            logger.warning(f"respond timed out: {e}")
+            update = {"messages": [AIMessage(content="エラー: 応答がタイムアウトしました")]}
+            return with_tool_result(update, state, stream, e, config)
         except Exception as e:
             logger.error(f"respond error: {e}", exc_info=True)
-            return {"messages": [AIMessage(content=f"エラーが発生しました: {str(e)}")]}
+            update = {"messages": [AIMessage(content=f"エラーが発生しました: {str(e)}")]}
+            return with_tool_result(update, state, stream, e, config)
+        finally:
+            if stream is not None:
+                stream.cancel()
+            if speculation is not None:
+                speculation.task.cancel()
     return respond
 
 
 # 後方互換性のため、デフォルト設定で作成された関数をエクスポート
-_planner = create_planner()
-_call_tool = create_call_tool()
-_respond = create_respond()
-
-# エクスポート（後方互換性のため）
-planner = _planner
-call_tool = _call_tool
-respond = _respond
+# インポート時に設定を読み込まないよう、初回アクセス時に作成する
+_DEFAULT_NODE_FACTORIES = {
+    "planner": create_planner,
+    "call_tool": create_call_tool,
+    "respond": create_respond,
+}
+_default_nodes: Dict[str, Callable] = {}
+
+
+def __getattr__(name: str) -> Any:
+    factory = _DEFAULT_NODE_FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name not in _default_nodes:
+        _default_nodes[name] = factory()
+    return _default_nodes[name]
 
 
 def router(state: GraphState) -> str:
@@ -0,0 +1,253 @@
+# graph/recording.py
+# ---------------------------------------------------------
+# グラフ実行の記録と再生（実際の実行のイベント列をフィクスチャにし、テスト・ベンチマークで再生）
+# ---------------------------------------------------------
+import asyncio
+import base64
+import gzip
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+
+from graph.builder import create_serializer
+from graph.state import STREAM_MODES, StepType
+
+# フィクスチャファイルの形式のバージョン
+RECORDING_VERSION = 1
+
+
+@dataclass(slots=True)
+class RecordedEvent:
+    """記録した1イベント"""
+    # 実行開始からの秒数
+    offset: float
+    namespace: Tuple[str, ...]
+    mode: str
+    data: Any
+
+
+@dataclass
+class Recording:
+    """
+    1回のグラフ実行で astream が返したイベント列とそのタイミング
+
+    ファイルは NDJSON（1行目がヘッダー、以降が1行1イベント）で、拡張子が .gz の場合は gzip で圧縮する。
+    イベントのデータはチェックポインターと同じシリアライザ（msgpack）でバイナリ化し、base64でエンコードする。
+    """
+    input: str
+    events: List[RecordedEvent] = field(default_factory=list)
+    graph: str = "default"
+    duration: float = 0.0
+    recorded_at: float = 0.0
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        ファイルに書き出す
+
+        Returns:
+            書き出したパス
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        serde = create_serializer()
+        lines = [json.dumps({
+            "version": RECORDING_VERSION,
+            "graph": self.graph,
+            "input": self.input,
+            "recorded_at": self.recorded_at,
+            "duration": round(self.duration, 6),
+            "events": len(self.events),
+        }, ensure_ascii=False)]
+        for event in self.events:
+            type_, data = serde.dumps_typed(event.data)
+            lines.append(json.dumps({
+                "t": round(event.offset, 6),
+                "ns": list(event.namespace),
+                "mode": event.mode,
+                "type": type_,
+                "data": base64.b64encode(data).decode("ascii"),
+            }, ensure_ascii=False))
+        text = "\n".join(lines) + "\n"
+        if path.suffix == ".gz":
+            path.write_bytes(gzip.compress(text.encode("utf-8")))
+        else:
+            path.write_text(text, encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Recording":
+        """
+        ファイルから読み込む
+
+        Raises:
+            ValueError: 形式が不正な場合
+        """
+        path = Path(path)
+        raw = path.read_bytes()
+        if path.suffix == ".gz":
+            raw = gzip.decompress(raw)
+        lines = [line for line in raw.decode("utf-8").splitlines() if line.strip()]
+        serde = create_serializer()
+        try:
+            header = json.loads(lines[0])
+            if header.get("version") != RECORDING_VERSION:
+                raise ValueError(f"unsupported version {header.get('version')!r}")
+            events = []
+            for line in lines[1:]:
+                record = json.loads(line)
+                data = serde.loads_typed((record["type"], base64.b64decode(record["data"])))
+                if record["mode"] == "messages":
+                    # msgpack はタプルをリストにするので (チャンク, メタデータ) に戻す
+                    data = tuple(data)
+                events.append(RecordedEvent(record["t"], tuple(record["ns"]), record["mode"], data))
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid recording {path}: {e}") from e
+        return cls(
+            input=header["input"],
+            events=events,
+            graph=header.get("graph", "default"),
+            duration=header.get("duration", 0.0),
+            recorded_at=header.get("recorded_at", 0.0),
+        )
+
+
+def load_recordings(directory: Union[str, Path]) -> List[Recording]:
+    """ディレクトリ内の記録（*.ndjson、*.ndjson.gz）をファイル名順に読み込む"""
+    directory = Path(directory)
+    paths = sorted(itertools.chain(directory.glob("*.ndjson"), directory.glob("*.ndjson.gz")))
+    return [Recording.load(path) for path in paths]
+
+
+def input_text(state: Dict[str, Any]) -> str:
+    """初期状態の最後のメッセージの本文（記録・再生の対応付けに使う）"""
+    messages = state.get("messages") or []
+    if not messages:
+        return ""
+    last = messages[-1]
+    content = last.get("content") if isinstance(last, dict) else getattr(last, "content", "")
+    return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+
+async def record(
+    graph: Any,
+    text: str,
+    graph_name: str = "default",
+    thread_id: Optional[str] = None,
+) -> Recording:
+    """
+    グラフを実行し、イベント列を記録する
+
+    GraphRepository.stream_execution と同じく全ストリームモード・サブグラフのイベントを記録するので、
+    再生時はどの絞り込みにも応じられる。
+
+    Args:
+        graph: コンパイル済みのグラフ
+        text: ユーザーの入力
+        graph_name: ヘッダーに記録するグラフ名
+        thread_id: スレッドID（指定した場合はそのスレッドの続きとして実行する。ツールの出力は
+            共有ストアの参照として記録され、記録したプロセスの中でしか出力に戻せない）
+
+    Returns:
+        記録
+    """
+    from langchain_core.messages import HumanMessage
+
+    config = None
+    if getattr(graph, "checkpointer", None) is not None:
+        if thread_id is not None:
+            config = {"configurable": {"thread_id": thread_id}}
+        else:
+            # 新しいスレッドはステートレス実行と同じイベント列になるので、チェックポインターを外して
+            # ツールの出力を共有ストア（graph.result_store）の参照ではなく記録そのものに残す
+            graph = graph.copy(update={"checkpointer": None})
+    recording = Recording(input=text, graph=graph_name, recorded_at=time.time())
+    started = time.perf_counter()
+    async for namespace, mode, data in graph.astream(
+        {"messages": [HumanMessage(content=text)], "step": StepType.IDLE},
+        stream_mode=list(STREAM_MODES),
+        subgraphs=True,
+        config=config,
+    ):
+        recording.events.append(RecordedEvent(time.perf_counter() - started, tuple(namespace), mode, data))
+    recording.duration = time.perf_counter() - started
+    return recording
+
+
+class ReplayGraph:
+    """
+    記録したイベント列を再生するグラフ（astream のみを持つ）
+
+    入力の本文が一致する記録を再生し、一致するものがない場合は記録を順番に使う。
+    speed は再生速度の倍率で、2.0 なら記録の半分の時間で、0 なら待たずにすべてのイベントを返す。
+    チェックポインターを持たないので、スレッドの状態の取得や再開には使えない。
+    再生するデータは記録ごとに共有するので、受け取った側で変更しないこと。
+    """
+
+    checkpointer = None
+
+    def __init__(self, recordings: Sequence[Recording], speed: float = 1.0):
+        """
+        初期化
+
+        Args:
+            recordings: 再生する記録
+            speed: 再生速度の倍率（0の場合は待たない）
+
+        Raises:
+            ValueError: 記録が空の場合
+        """
+        if not recordings:
+            raise ValueError("ReplayGraph requires at least one recording")
+        self.recordings = list(recordings)
+        self.speed = speed
+        self._by_input = {recording.input: recording for recording in self.recordings}
+        self._next = itertools.cycle(self.recordings)
+
+    @classmethod
+    def from_directory(cls, directory: Union[str, Path], speed: float = 1.0) -> "ReplayGraph":
+        """ディレクトリ内の記録を再生するグラフを作成"""
+        return cls(load_recordings(directory), speed=speed)
+
+    def select(self, state: Dict[str, Any]) -> Recording:
+        """入力に対応する記録を選ぶ"""
+        recording = self._by_input.get(input_text(state))
+        return recording if recording is not None else next(self._next)
+
+    def copy(self, update: Optional[Dict[str, Any]] = None) -> "ReplayGraph":
+        """チェックポインターを持たないので自身を返す（GraphRepository.get_stateless 用）"""
+        return self
+
+    async def astream(
+        self,
+        input: Dict[str, Any],
+        config: Optional[Dict[str, Any]] = None,
+        *,
+        stream_mode: Union[str, Sequence[str]] = "updates",
+        subgraphs: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """
+        記録したイベントを CompiledStateGraph.astream と同じ形で返す
+
+        stream_mode が文字列の場合はデータのみ、リストの場合は (モード, データ) を返し、
+        subgraphs=True の場合は先頭に名前空間を付ける（False の場合はサブグラフのイベントを返さない）。
+        """
+        single = isinstance(stream_mode, str)
+        modes = {stream_mode} if single else set(stream_mode)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for event in self.select(input).events:
+            if event.mode not in modes or (event.namespace and not subgraphs):
+                continue
+            if self.speed > 0:
+                delay = started + event.offset / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            item = (event.data,) if single else (event.mode, event.data)
+            if subgraphs:
+                yield (event.namespace, *item)
+            else:
+                yield item[0] if single else item
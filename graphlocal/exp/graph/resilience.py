@@ -0,0 +1,220 @@
+# graph/resilience.py
+# ---------------------------------------------------------
+# ノード実行の耐障害性（デッドライン・タイムアウト・サーキットブレーカー）
+# ---------------------------------------------------------
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# configurable に格納するデッドラインのキー
+# "__" で始まるキーはチェックポイントのメタデータやストリームに出力されない
+DEADLINE_KEY = "__deadline"
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """リクエストのデッドラインまたはノードのタイムアウトを超過した"""
+
+
+class CircuitOpenError(RuntimeError):
+    """サーキットブレーカーが開いているため呼び出しを拒否した"""
+
+
+def make_deadline(timeout: Optional[float]) -> Optional[float]:
+    """
+    タイムアウト秒数からデッドライン（time.monotonic基準）を作成
+
+    Args:
+        timeout: タイムアウト秒数（Noneの場合はデッドラインなし）
+
+    Returns:
+        デッドライン時刻（Noneの場合はデッドラインなし）
+    """
+    if timeout is None:
+        return None
+    return time.monotonic() + timeout
+
+
+def get_deadline(config: Optional[Dict[str, Any]]) -> Optional[float]:
+    """実行設定（RunnableConfig）からデッドラインを取得"""
+    if not config:
+        return None
+    return (config.get("configurable") or {}).get(DEADLINE_KEY)
+
+
+def remaining_time(
+    node_timeout: Optional[float],
+    deadline: Optional[float] = None,
+) -> Optional[float]:
+    """
+    ノードのタイムアウトとリクエストのデッドラインから残り時間を算出
+
+    Args:
+        node_timeout: ノード単位のタイムアウト秒数
+        deadline: リクエストのデッドライン時刻
+
+    Returns:
+        残り秒数（どちらも未設定の場合はNone、超過済みの場合は0）
+    """
+    budgets = []
+    if node_timeout is not None:
+        budgets.append(node_timeout)
+    if deadline is not None:
+        budgets.append(max(0.0, deadline - time.monotonic()))
+    return min(budgets) if budgets else None
+
+
+async def run_with_timeout(
+    aw: Awaitable[T],
+    node_timeout: Optional[float],
+    deadline: Optional[float] = None,
+) -> T:
+    """
+    タイムアウトとデッドラインを適用してawaitableを実行
+
+    Raises:
+        DeadlineExceeded: 残り時間内に完了しなかった場合
+    """
+    timeout = remaining_time(node_timeout, deadline)
+    if timeout is None:
+        return await aw
+    try:
+        return await asyncio.wait_for(aw, timeout=timeout)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded(f"timed out after {timeout:.3f}s") from e
+
+
+class CircuitState:
+    """サーキットブレーカーの状態定数"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    直近の呼び出し結果に基づいて失敗の多いツールを遮断するサーキットブレーカー
+
+    直近 window_size 件のうち失敗（例外・タイムアウト・latency_threshold超過）の割合が
+    failure_threshold 以上になると OPEN になり、reset_timeout 秒の間は即座に失敗させる。
+    その後 HALF_OPEN で1件だけ試行し、成功すれば CLOSED に戻る。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: float = 0.5,
+        latency_threshold: Optional[float] = None,
+        window_size: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        """
+        初期化
+
+        Args:
+            name: 対象名（ログ用、例: ツール名）
+            failure_threshold: OPEN にする失敗率（0.0〜1.0）
+            latency_threshold: 失敗とみなす応答時間（秒、Noneの場合は判定しない）
+            window_size: 失敗率を計算する直近の呼び出し件数
+            min_calls: 失敗率を評価する最小呼び出し件数
+            reset_timeout: OPEN から HALF_OPEN に移るまでの秒数
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._results: Deque[bool] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """現在の状態（OPEN の期限切れは HALF_OPEN として返す）"""
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """呼び出しを許可するかどうか（HALF_OPEN では試行を1件だけ許可）"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and not self._trial_in_flight:
+            self._state = CircuitState.HALF_OPEN
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        """
+        呼び出し結果を記録
+
+        Args:
+            success: 例外なく完了したかどうか
+            latency: 応答時間（秒）
+        """
+        if success and latency is not None and self.latency_threshold is not None:
+            success = latency <= self.latency_threshold
+
+        if self._state == CircuitState.HALF_OPEN:
+            self._trial_in_flight = False
+            if success:
+                logger.info(f"Circuit '{self.name}' closed after successful trial")
+                self._state = CircuitState.CLOSED
+                self._results.clear()
+            else:
+                self._open()
+            return
+
+        self._results.append(success)
+        if self._state == CircuitState.CLOSED and len(self._results) >= self.min_calls:
+            failures = self._results.count(False)
+            if failures / len(self._results) >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        """OPEN 状態に遷移"""
+        logger.warning(f"Circuit '{self.name}' opened")
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self._results.clear()
+
+    async def call(
+        self,
+        aw: Awaitable[T],
+        node_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """
+        サーキットブレーカー越しにawaitableを実行
+
+        Raises:
+            CircuitOpenError: OPEN 状態で呼び出しを拒否した場合
+            DeadlineExceeded: タイムアウトした場合
+        """
+        if not self.allow():
+            if asyncio.iscoroutine(aw):
+                aw.close()
+            raise CircuitOpenError(f"circuit '{self.name}' is open")
+
+        started = time.monotonic()
+        try:
+            result = await run_with_timeout(aw, node_timeout, deadline)
+        except asyncio.CancelledError:
+            if self._state == CircuitState.HALF_OPEN:
+                self._trial_in_flight = False
+            raise
+        except Exception:
+            self.record(False)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
@@ -0,0 +1,198 @@
+# graph/result_store.py
+# ---------------------------------------------------------
+# ツール出力の共有ストア（内容のハッシュをキーにして、スレッド間で重複を1つにまとめる）
+# ---------------------------------------------------------
+import dataclasses
+import hashlib
+import itertools
+import json
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set
+
+from graph.messages import CompactMessage, ToolResult
+from utils.metrics import get_metrics
+
+
+def output_key(output: Dict[str, Any]) -> tuple[str, bytes]:
+    """
+    ツール出力のキー（正規化したJSONのSHA-256）を求める
+
+    Returns:
+        (キー, 正規化したJSONのバイト列)
+
+    Raises:
+        TypeError: JSONに変換できない出力の場合
+    """
+    data = json.dumps(output, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(data).hexdigest(), data
+
+
+@dataclass(slots=True)
+class _Entry:
+    """共有しているツール出力と、参照しているスレッド"""
+    output: Dict[str, Any]
+    size: int
+    owners: Set[str] = field(default_factory=set)
+
+
+class ToolResultStore:
+    """
+    ツール出力の共有ストア
+
+    スレッドの状態（チェックポイント）には ToolResult.ref（キー）だけを保持し、出力はここで
+    1つにまとめて保持する。参照カウントはスレッド単位（thread_owner()、チェックポインターと
+    スレッドIDの組）で、スレッドの削除（release）でどのスレッドからも参照されなくなった出力を削除する。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self._entries: Dict[str, _Entry] = {}
+        self._refs: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, output: Dict[str, Any], owner: str) -> str:
+        """
+        出力を保存し、owner（thread_owner() の値）からの参照を追加
+
+        Returns:
+            キー
+
+        Raises:
+            TypeError: JSONに変換できない出力の場合
+        """
+        key, data = output_key(output)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(output=output, size=len(data))
+        elif owner not in entry.owners:
+            get_metrics().inc("tool_results.shared")
+        entry.owners.add(owner)
+        self._refs.setdefault(owner, set()).add(key)
+        return key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """出力を取得（存在しない場合はNone）"""
+        entry = self._entries.get(key)
+        return entry.output if entry is not None else None
+
+    def refcount(self, key: str) -> int:
+        """出力を参照しているスレッドの数"""
+        entry = self._entries.get(key)
+        return len(entry.owners) if entry is not None else 0
+
+    def release(self, owner: str) -> int:
+        """
+        owner（thread_owner() の値）からの参照をすべて外し、参照されなくなった出力を削除
+
+        Returns:
+            削除した出力の数
+        """
+        evicted = 0
+        for key in self._refs.pop(owner, ()):
+            entry = self._entries[key]
+            entry.owners.discard(owner)
+            if not entry.owners:
+                del self._entries[key]
+                evicted += 1
+        if evicted:
+            get_metrics().inc("tool_results.evicted", evicted)
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        """
+        保持している出力の集計
+
+        Returns:
+            {"entries": 出力の数, "references": 参照の数, "bytes": 出力の合計バイト数,
+             "saved_bytes": スレッドごとに保持した場合と比べて減らしたバイト数}
+        """
+        entries = self._entries.values()
+        return {
+            "entries": len(self._entries),
+            "references": sum(len(entry.owners) for entry in entries),
+            "bytes": sum(entry.size for entry in entries),
+            "saved_bytes": sum(entry.size * (len(entry.owners) - 1) for entry in entries),
+        }
+
+    def share(self, result: ToolResult, owner: str) -> ToolResult:
+        """
+        ツール呼び出し結果の出力をストアに移し、参照だけを持つ ToolResult を返す
+
+        JSONに変換できない出力の場合はそのまま返す。
+        """
+        if result.ref is not None:
+            return result
+        try:
+            key = self.put(result.output, owner)
+        except (TypeError, ValueError):
+            return result
+        return dataclasses.replace(result, output={}, ref=key)
+
+    def resolve(self, result: ToolResult) -> ToolResult:
+        """
+        参照を出力に戻した ToolResult を返す（参照先が存在しない場合はそのまま返す）
+        """
+        if result.ref is None:
+            return result
+        output = self.get(result.ref)
+        if output is None:
+            return result
+        return dataclasses.replace(result, output=output, ref=None)
+
+
+def collect_refs(values: Dict[str, Any]) -> Set[str]:
+    """グラフ状態（チャネルの値）の messages / tool_results が参照しているキー"""
+    candidates = [
+        *(values.get("tool_results") or ()),
+        *(m.content for m in values.get("messages") or () if isinstance(m, CompactMessage)),
+    ]
+    return {r.ref for r in candidates if isinstance(r, ToolResult) and r.ref is not None}
+
+
+# チェックポインターごとの識別子（スレッドIDはチェックポインターの中でのみ一意）
+_checkpointer_scopes: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+_scope_ids = itertools.count(1)
+
+
+def thread_owner(checkpointer: Any, thread_id: str) -> str:
+    """
+    参照カウントの単位（チェックポインターとスレッドIDの組）
+
+    別のグラフ（チェックポインター）にある同じスレッドIDのスレッドとは区別する。
+    """
+    try:
+        scope = _checkpointer_scopes.get(checkpointer)
+        if scope is None:
+            scope = _checkpointer_scopes[checkpointer] = f"cp{next(_scope_ids)}"
+    except TypeError:
+        # 弱参照を作れないチェックポインター
+        scope = f"id{id(checkpointer)}"
+    return f"{scope}:{thread_id}"
+
+
+def checkpoint_owner(config: Dict[str, Any]) -> Optional[str]:
+    """
+    チェックポイントを書き込む実行であれば参照カウントの単位（thread_owner()）を返す
+
+    ステートレス実行（チェックポインターなし）では状態が残らず、参照を外す契機もないのでNone。
+    """
+    from langgraph.constants import CONFIG_KEY_CHECKPOINTER
+
+    configurable = (config or {}).get("configurable") or {}
+    checkpointer = configurable.get(CONFIG_KEY_CHECKPOINTER)
+    thread_id = configurable.get("thread_id")
+    if checkpointer is None or thread_id is None:
+        return None
+    return thread_owner(checkpointer, thread_id)
+
+
+# プロセス全体で共有するデフォルトのストア（グラフのノードとAPIの境界の両方から参照する）
+_default_store = ToolResultStore()
+
+
+def get_tool_result_store() -> ToolResultStore:
+    """デフォルトのツール出力ストアを取得"""
+    return _default_store
@@ -0,0 +1,56 @@
+# graph/run_scope.py
+# ---------------------------------------------------------
+# 1回のグラフ実行の後始末（ノード間で受け渡す実行中のタスクを、実行の終了時に破棄する）
+# ---------------------------------------------------------
+from typing import Any, Callable, Dict, Mapping, Optional
+
+# ノードの config["configurable"] で RunScope を渡すキー（"__" で始まるキーはチェックポイントのメタデータに入らない）
+CONFIG_KEY_RUN_SCOPE = "__run_scope"
+
+
+class RunScope:
+    """
+    1回のグラフ実行の間だけ有効な受け渡しの登録
+
+    ツールノードのストリームやプランナーの投機のように、あるノードが始めて後続のノードが受け取る
+    タスクは、実行が途中で中断・失敗すると受け取られずに残る。受け渡す側は後始末を add で登録し、
+    受け取った側は discard で外す。close（with ブロックの終了）で残っている後始末をすべて実行する。
+    """
+
+    def __init__(self):
+        self._cleanups: Dict[str, Callable[[], None]] = {}
+        self._closed = False
+
+    def add(self, key: str, cleanup: Callable[[], None]) -> None:
+        """後始末を登録する（すでに閉じている場合はすぐに実行する）"""
+        if self._closed:
+            cleanup()
+            return
+        self._cleanups[key] = cleanup
+
+    def discard(self, key: str) -> None:
+        """受け取った受け渡しの後始末を外す"""
+        self._cleanups.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._cleanups)
+
+    def close(self) -> None:
+        """残っている後始末をすべて実行する"""
+        self._closed = True
+        cleanups, self._cleanups = self._cleanups, {}
+        for cleanup in cleanups.values():
+            cleanup()
+
+    def __enter__(self) -> "RunScope":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def get_run_scope(config: Optional[Mapping[str, Any]]) -> Optional[RunScope]:
+    """ノードの config から実行の RunScope を取り出す（GraphRepository 以外から実行した場合はNone）"""
+    if not config:
+        return None
+    return (config.get("configurable") or {}).get(CONFIG_KEY_RUN_SCOPE)
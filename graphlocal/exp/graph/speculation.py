@@ -0,0 +1,82 @@
+# graph/speculation.py
+# ---------------------------------------------------------
+# 応答ノードの投機実行（プランナーと並行に応答を生成し、ツール経路になれば破棄する）
+# ---------------------------------------------------------
+import asyncio
+import time
+from typing import Awaitable, Dict, Optional
+from uuid import uuid4
+
+from graph.run_scope import RunScope
+from utils.metrics import get_metrics
+
+
+class Speculation:
+    """投機的に開始した応答生成"""
+
+    def __init__(self, aw: Awaitable[str]):
+        """
+        初期化
+
+        Args:
+            aw: 応答テキストを返すawaitable
+        """
+        self.id = f"spec-{uuid4().hex[:8]}"
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.task = asyncio.ensure_future(aw)
+        self.task.add_done_callback(self._on_done)
+
+    def _on_done(self, _: asyncio.Future) -> None:
+        self.finished_at = time.monotonic()
+
+    def elapsed(self) -> float:
+        """開始から完了（未完了の場合は現在）までの秒数"""
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+# 実行中の投機（ID -> Speculation）。グラフ状態にはIDだけを保持する
+_in_flight: Dict[str, Speculation] = {}
+
+
+def start_speculation(aw: Awaitable[str], scope: Optional[RunScope] = None) -> str:
+    """
+    投機実行を開始してIDを返す
+
+    scope を指定した場合、応答ノードが採用する前に実行が終了（中断・失敗）すると投機を破棄する。
+    """
+    speculation = Speculation(aw)
+    _in_flight[speculation.id] = speculation
+    if scope is not None:
+        scope.add(speculation.id, lambda: discard_speculation(speculation.id))
+    get_metrics().inc("speculation.started")
+    return speculation.id
+
+
+def take_speculation(speculation_id: Optional[str], scope: Optional[RunScope] = None) -> Optional[Speculation]:
+    """
+    投機実行の結果を採用する（見つからない場合はNone）
+
+    応答ノードの開始時点までに投機が進んでいた時間を短縮できたレイテンシとして記録する。
+    """
+    if speculation_id is None:
+        return None
+    if scope is not None:
+        scope.discard(speculation_id)
+    speculation = _in_flight.pop(speculation_id, None)
+    if speculation is not None:
+        metrics = get_metrics()
+        metrics.inc("speculation.hit")
+        metrics.observe("speculation.saved_seconds", speculation.elapsed())
+    return speculation
+
+
+def discard_speculation(speculation_id: Optional[str]) -> None:
+    """投機実行を中断して破棄する（実行していた時間を無駄になった処理時間として記録）"""
+    speculation = _in_flight.pop(speculation_id, None) if speculation_id is not None else None
+    if speculation is None:
+        return
+    speculation.task.cancel()
+    metrics = get_metrics()
+    metrics.inc("speculation.miss")
+    metrics.observe("speculation.wasted_seconds", speculation.elapsed())
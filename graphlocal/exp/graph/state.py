@@ -2,9 +2,13 @@
 # ---------------------------------------------------------
 # グラフステート定義
 # ---------------------------------------------------------
-from typing import Any, Dict, List, Literal, TypedDict
+from typing import Annotated, List, Literal, Optional, TypedDict
 
-from langchain_core.messages import BaseMessage
+from graph.messages import CompactMessage, ToolResult, compact_messages, compact_tool_results
+
+
+# グラフから受け取るストリームモード（api.repositories.graph_repository、graph.recording）
+STREAM_MODES = ("messages", "updates", "custom")
 
 
 class StepType:
@@ -15,7 +19,16 @@ class StepType:
 
 
 class GraphState(TypedDict, total=False):
-    """グラフの状態を定義するTypedDict"""
-    messages: List[BaseMessage]
-    tool_results: List[Dict[str, Any]]
+    """
+    グラフの状態を定義するTypedDict
+    
+    messages / tool_results はノードや入力から LangChain のメッセージ・辞書を受け取り、
+    リデューサーでコンパクトな表現（CompactMessage / ToolResult）に変換して保持する。
+    tool_stream はストリーミングツールの実行中の出力（graph.tool_stream）のIDで、応答ノードが受け取る。
+    speculation はプランナーが投機的に開始した応答生成（graph.speculation）のIDで、応答ノードが受け取る。
+    """
+    messages: Annotated[List[CompactMessage], compact_messages]
+    tool_results: Annotated[List[ToolResult], compact_tool_results]
     step: Literal["idle", "tooling", "responding"]
+    tool_stream: Optional[str]
+    speculation: Optional[str]
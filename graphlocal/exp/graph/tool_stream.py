@@ -0,0 +1,115 @@
+# graph/tool_stream.py
+# ---------------------------------------------------------
+# ストリーミングツールの実行中の出力（ツールノードから応答ノードへの受け渡し）
+# ---------------------------------------------------------
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
+
+from graph.messages import ToolResult
+from graph.run_scope import RunScope
+
+
+class ToolStream:
+    """
+    ストリーミングツール（非同期ジェネレーター）の実行中の出力
+
+    ツールノードはツールをバックグラウンドで実行して ToolStream を登録し、完了を待たずに
+    応答ノードへ進む。応答ノードは届いた順に結果を受け取り、最初の結果から応答の生成を始める。
+    """
+
+    def __init__(self, result: ToolResult):
+        """
+        初期化
+
+        Args:
+            result: ツール呼び出し結果（完了時に output / error が設定される）
+        """
+        self.id = result.id
+        self.result = result
+        self.items: List[Any] = []
+        self._changed = asyncio.Event()
+        self._done = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        """ツールが完了したか"""
+        return self._done
+
+    def start(self, aw: Awaitable[None]) -> None:
+        """ツールの実行をバックグラウンドで開始（aw は append / finish で結果を書き込む）"""
+        self._task = asyncio.ensure_future(aw)
+
+    def append(self, item: Any) -> None:
+        """部分結果を追加"""
+        self.items.append(item)
+        self._notify()
+
+    def finish(self) -> None:
+        """ツールの完了を通知"""
+        self._done = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        """部分結果を届いた順に返す（完了まで）"""
+        index = 0
+        while True:
+            while index < len(self.items):
+                yield self.items[index]
+                index += 1
+            if self._done:
+                return
+            await self._changed.wait()
+
+    async def first(self) -> None:
+        """最初の部分結果（または完了）を待つ"""
+        while not self.items and not self._done:
+            await self._changed.wait()
+
+    async def wait(self) -> ToolResult:
+        """ツールの完了を待ち、ツール呼び出し結果を返す"""
+        if self._task is not None:
+            await self._task
+        return self.result
+
+    def cancel(self) -> None:
+        """ツールの実行を中断"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+# 実行中のストリーム（ID -> ToolStream）。グラフ状態にはIDだけを保持する
+_in_flight: Dict[str, ToolStream] = {}
+
+
+def register_tool_stream(stream: ToolStream, scope: Optional[RunScope] = None) -> str:
+    """
+    ストリームを登録してIDを返す
+
+    scope を指定した場合、応答ノードが受け取る前に実行が終了（中断・失敗）するとストリームを中断して
+    登録から外す。
+    """
+    _in_flight[stream.id] = stream
+    if scope is not None:
+        scope.add(stream.id, lambda: discard_tool_stream(stream.id))
+    return stream.id
+
+
+def pop_tool_stream(stream_id: Optional[str], scope: Optional[RunScope] = None) -> Optional[ToolStream]:
+    """ストリームを登録から外して返す（見つからない場合はNone）"""
+    if stream_id is None:
+        return None
+    if scope is not None:
+        scope.discard(stream_id)
+    return _in_flight.pop(stream_id, None)
+
+
+def discard_tool_stream(stream_id: Optional[str]) -> None:
+    """受け取られなかったストリームを中断して登録から外す"""
+    stream = pop_tool_stream(stream_id)
+    if stream is not None:
+        stream.cancel()
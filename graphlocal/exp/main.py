@@ -1,6 +1,149 @@
-def main():
-    print("Hello from exp!")
+# main.py
+# ---------------------------------------------------------
+# コマンドラインツール
+#
+#   uv run python main.py serve
+#   ENVIRONMENT=production uv run python main.py serve --host 0.0.0.0 --dry-run
+#   uv run python main.py memory --top 20
+#   uv run python main.py memory --allocations --url http://127.0.0.1:8001
+# ---------------------------------------------------------
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+
+
+def _format_bytes(size: int) -> str:
+    """バイト数を読みやすい単位に変換"""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _admin_get(url: str, path: str, token: str | None, params: dict) -> dict:
+    """管理用エンドポイントにGETリクエストを送る"""
+    query = urllib.parse.urlencode(params)
+    request = urllib.request.Request(f"{url.rstrip('/')}{path}?{query}")
+    if token:
+        request.add_header("X-Admin-Token", token)
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.load(response)
+
+
+def print_memory_report(report: dict) -> None:
+    """メモリ使用状況のレポートを表示"""
+    print("== Graphs ==")
+    for name, stats in report["graphs"].items():
+        if not stats.get("supported"):
+            print(f"{name:<20} (checkpointer does not expose storage)")
+            continue
+        print(
+            f"{name:<20} threads={stats['threads']:<6} checkpoints={stats['checkpoints']:<8} "
+            f"bytes={_format_bytes(stats['bytes'])}"
+        )
+    print(f"total: {_format_bytes(report['total_bytes'])}")
+    max_rss = report.get("process", {}).get("max_rss_bytes")
+    if max_rss is not None:
+        print(f"process max RSS: {_format_bytes(max_rss)}")
+    tool_results = report.get("tool_results")
+    if tool_results is not None:
+        print(
+            f"shared tool results: entries={tool_results['entries']} references={tool_results['references']} "
+            f"bytes={_format_bytes(tool_results['bytes'])} saved={_format_bytes(tool_results['saved_bytes'])}"
+        )
+
+    print("\n== Largest threads ==")
+    for entry in report["largest_threads"]:
+        print(
+            f"{_format_bytes(entry['bytes']):>12}  checkpoints={entry['checkpoints']:<6} "
+            f"{entry['graph']}/{entry['thread_id']}"
+        )
+
+    allocations = report.get("allocations")
+    if allocations is not None:
+        print(
+            f"\n== Allocations (traced {_format_bytes(allocations['traced_bytes'])}, "
+            f"peak {_format_bytes(allocations['peak_bytes'])}) =="
+        )
+        if allocations["started"]:
+            print("tracemalloc started; run again to see the diff")
+        for stat in allocations["top"]:
+            print(f"{_format_bytes(stat['size_diff']):>12}  ({stat['count_diff']:+d} blocks)  {stat['location']}")
+
+
+def memory_command(args: argparse.Namespace) -> int:
+    """memory サブコマンド: /admin/memory を問い合わせて表示"""
+    token = args.token
+    if token is None:
+        from config import get_default_settings
+        token = get_default_settings().admin.token
+    params = {"top": args.top}
+    if args.allocations:
+        params["allocations"] = "true"
+    try:
+        report = _admin_get(args.url, "/admin/memory", token, params)
+    except urllib.error.HTTPError as e:
+        print(f"error: {e.code} {e.read().decode(errors='replace')}", file=sys.stderr)
+        return 1
+    except urllib.error.URLError as e:
+        print(f"error: {e.reason}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_memory_report(report)
+    return 0
+
+
+def serve_command(args: argparse.Namespace) -> int:
+    """serve サブコマンド: ENVIRONMENT に応じたプロファイルで uvicorn を起動"""
+    from config import get_default_settings
+    from server import run, uvicorn_options
+
+    settings = get_default_settings()
+    if args.environment is not None:
+        settings.environment = args.environment
+    overrides = {
+        key: value
+        for key, value in (("host", args.host), ("port", args.port), ("workers", args.workers))
+        if value is not None
+    }
+    if args.dry_run:
+        print(json.dumps({**uvicorn_options(settings), **overrides}, indent=2))
+        return 0
+    run(settings, **overrides)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="graphserver のコマンドラインツール")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="サーバーを起動（ENVIRONMENT=production で本番プロファイル）")
+    serve.add_argument("--host", help="待ち受けるアドレス（未指定の場合は SERVER_HOST）")
+    serve.add_argument("--port", type=int, help="待ち受けるポート（未指定の場合は SERVER_PORT）")
+    serve.add_argument("--workers", type=int, help="ワーカープロセス数（未指定の場合はプロファイルの値）")
+    serve.add_argument("--environment", help="ENVIRONMENT を上書き（development / production）")
+    serve.add_argument("--dry-run", action="store_true", help="起動せずに uvicorn の設定を表示")
+    serve.set_defaults(handler=serve_command)
+
+    memory = subparsers.add_parser("memory", help="メモリ使用状況を表示（/admin/memory）")
+    memory.add_argument("--url", default=DEFAULT_URL, help=f"サーバーのURL（デフォルト: {DEFAULT_URL}）")
+    memory.add_argument("--token", help="管理用トークン（未指定の場合は ADMIN_TOKEN）")
+    memory.add_argument("--top", type=int, default=10, help="表示するスレッド・割り当て元の数")
+    memory.add_argument("--allocations", action="store_true", help="tracemalloc の前回からの差分を表示")
+    memory.add_argument("--json", action="store_true", help="JSONのまま表示")
+    memory.set_defaults(handler=memory_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1 +1 @@
-uv run uvicorn app:app --reload
\ No newline at end of file
+uv run python main.py serve "$@"
\ No newline at end of file
@@ -0,0 +1,109 @@
+# scripts/bench_compression.py
+# ---------------------------------------------------------
+# 圧縮ベンチマーク（実際のSSEイベント列を各設定で圧縮し、転送量とCPU時間を比較）
+#
+#   uv run python scripts/bench_compression.py --turns 50
+#   uv run python scripts/bench_compression.py --min-size 0,256,512,2048 --gzip-levels 1,6,9
+# ---------------------------------------------------------
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.compression import BrotliEncoder, GzipEncoder, brotli  # noqa: E402
+from api.models import ChatRequest  # noqa: E402
+from api.repositories.graph_repository import GraphRepository  # noqa: E402
+from api.services.chat_service import ChatService  # noqa: E402
+from config import GraphConfig  # noqa: E402
+from graph.builder import create_graph  # noqa: E402
+
+
+async def collect_turns(turns: int, tool_ratio: float, words: int) -> list[list[bytes]]:
+    """擬似レイテンシなしでグラフを実行し、ターンごとのSSEイベント列を集める"""
+    config = GraphConfig(tool_processing_delay=0.0, response_delay=0.0)
+    repository = GraphRepository()
+    repository.register("default", create_graph(config))
+    service = ChatService(repository)
+    text = " ".join(f"word{i}" for i in range(words))
+    sessions = []
+    for index in range(turns):
+        prefix = "tool: " if index < turns * tool_ratio else ""
+        request = ChatRequest(input=f"{prefix}{text}", thread_id=f"bench-{index}")
+        sessions.append([chunk async for chunk in service.process_chat_stream(request)])
+    return sessions
+
+
+def group_events(events: list[bytes], min_size: int) -> list[bytes]:
+    """StreamCompression と同じく min_size バイトまで溜めてまとめる（max_delay はないものとする）"""
+    groups, buffer, size = [], [], 0
+    for event in events:
+        buffer.append(event)
+        size += len(event)
+        if size >= min_size:
+            groups.append(b"".join(buffer))
+            buffer, size = [], 0
+    if buffer:
+        groups.append(b"".join(buffer))
+    return groups
+
+
+def measure(sessions: list[list[bytes]], make_encoder, min_size: int) -> tuple[int, int, float]:
+    """
+    全ターンを圧縮
+
+    Returns:
+        (圧縮後のバイト数, フラッシュ回数, CPU秒)
+    """
+    total = flushes = 0
+    started = time.process_time()
+    for events in sessions:
+        encoder = make_encoder()
+        for group in group_events(events, min_size):
+            total += len(encoder.encode(group))
+            flushes += 1
+        total += len(encoder.finish())
+    return total, flushes, time.process_time() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SSE圧縮のベンチマーク（転送量とCPU時間）")
+    parser.add_argument("--turns", type=int, default=50, help="実行するターン数")
+    parser.add_argument("--tool-ratio", type=float, default=0.5, help="tool: で始まる入力の割合")
+    parser.add_argument("--words", type=int, default=40, help="入力の単語数（応答のトークン数に比例）")
+    parser.add_argument("--min-size", default="0,512,2048", help="まとめる単位（バイト、カンマ区切り）")
+    parser.add_argument("--gzip-levels", default="1,6,9", help="gzip の圧縮レベル（カンマ区切り）")
+    parser.add_argument("--brotli-qualities", default="1,4,9", help="brotli の品質（カンマ区切り）")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    sessions = asyncio.run(collect_turns(args.turns, args.tool_ratio, args.words))
+    raw = sum(len(event) for events in sessions for event in events)
+    count = sum(len(events) for events in sessions)
+    print(f"turns={args.turns} events={count} raw={raw} bytes ({raw / count:.0f} bytes/event)")
+
+    candidates = [(f"gzip-{level}", lambda level=int(level): GzipEncoder(level)) for level in args.gzip_levels.split(",")]
+    if brotli is not None:
+        candidates += [
+            (f"br-{quality}", lambda quality=int(quality): BrotliEncoder(quality))
+            for quality in args.brotli_qualities.split(",")
+        ]
+    else:
+        print("brotli is not installed; skipping br (uv pip install -e \".[brotli]\")")
+
+    print(f"{'encoding':<10} {'min_size':>8} {'bytes':>10} {'ratio':>6} {'flushes':>8} {'cpu ms':>8} {'us/KiB':>7}")
+    for name, make_encoder in candidates:
+        for min_size in (int(value) for value in args.min_size.split(",")):
+            size, flushes, cpu = measure(sessions, make_encoder, min_size)
+            print(
+                f"{name:<10} {min_size:>8} {size:>10} {size / raw:>6.2f} {flushes:>8} "
+                f"{cpu * 1000:>8.1f} {cpu * 1e6 / (raw / 1024):>7.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
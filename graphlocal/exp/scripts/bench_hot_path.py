@@ -0,0 +1,130 @@
+# scripts/bench_hot_path.py
+# ---------------------------------------------------------
+# /chat のホットパスのベンチマーク（コンテナのシングルトンと、リクエストごとのコントローラー作成を比較）
+#
+#   uv run python scripts/bench_hot_path.py --requests 2000 --concurrency 50
+# ---------------------------------------------------------
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from starlette.requests import HTTPConnection  # noqa: E402
+
+from api.compression import StreamCompression  # noqa: E402
+from api.controllers.chat_controller import ChatController  # noqa: E402
+from api.repositories.graph_repository import GraphRepository  # noqa: E402
+from api.router import get_chat_controller, get_container  # noqa: E402
+from api.services.rate_limiter import RateLimiter  # noqa: E402
+from app import create_app  # noqa: E402
+from config import RateLimitConfig  # noqa: E402
+from graph.recording import ReplayGraph  # noqa: E402
+from utils.metrics import LatencyHistogram  # noqa: E402
+
+
+def per_request_controller(connection: HTTPConnection) -> ChatController:
+    """比較用: 以前の依存性関数と同じく、リクエストごとにコントローラーと圧縮設定を作る"""
+    container = get_container(connection)
+    settings = container.settings
+    return ChatController(
+        container.chat_service,
+        bulk_api_keys=settings.scheduler.bulk_api_key_set,
+        compression=StreamCompression(settings.compression),
+        rate_limiter=container.rate_limiter,
+    )
+
+
+def measure_dependency(app, factory, calls: int) -> tuple[float, float]:
+    """
+    依存性関数だけを呼び出す
+
+    Returns:
+        (1回あたりのマイクロ秒, 1回あたりに確保して保持したバイト数)
+    """
+    connection = SimpleNamespace(app=app)
+    started = time.perf_counter()
+    for _ in range(calls):
+        factory(connection)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = [factory(connection) for _ in range(calls)]
+    allocated = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del kept
+    return elapsed * 1e6 / calls, allocated / calls
+
+
+async def measure_requests(app, args: argparse.Namespace) -> tuple[float, dict]:
+    """
+    ASGIアプリに直接 /chat を送る（ネットワークを含めない）
+
+    Returns:
+        (1秒あたりのリクエスト数, レイテンシ分布)
+    """
+    histogram = LatencyHistogram(max_samples=args.requests)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(index: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/chat",
+                    json={"input": "hello", "stateless": True},
+                    headers={"Accept-Encoding": "identity"},
+                )
+                await response.aread()
+                histogram.observe(time.perf_counter() - started)
+
+        await asyncio.gather(*(one(i) for i in range(args.concurrency)))
+        histogram = LatencyHistogram(max_samples=args.requests)
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    return args.requests / elapsed, histogram.snapshot()
+
+
+async def run(args: argparse.Namespace) -> int:
+    # ノードの処理時間を除くため、記録したイベント列を待たずに再生する
+    repository = GraphRepository()
+    repository.register("default", ReplayGraph.from_directory(args.replay, speed=0))
+    # レート制限のバケットで計測が止まらないよう無効にする
+    app = create_app(repository, rate_limiter=RateLimiter(RateLimitConfig(enabled=False)))
+    async with app.router.lifespan_context(app):
+        print(f"{'mode':<12} {'dep us':>7} {'dep B':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode, factory in (("per-request", per_request_controller), ("singleton", get_chat_controller)):
+            dep_us, dep_bytes = measure_dependency(app, factory, args.calls)
+            app.dependency_overrides[get_chat_controller] = factory
+            throughput, latency = await measure_requests(app, args)
+            app.dependency_overrides.clear()
+            print(
+                f"{mode:<12} {dep_us:>7.2f} {dep_bytes:>7.0f} {throughput:>8.1f} "
+                f"{latency['p50'] * 1000:>8.2f} {latency['p99'] * 1000:>8.2f}"
+            )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="/chat のホットパス（依存性の解決）のベンチマーク")
+    parser.add_argument("--requests", type=int, default=1000, help="モードごとのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時実行数")
+    parser.add_argument("--replay", default=str(ROOT / "tests" / "fixtures" / "recordings"), help="再生する記録のディレクトリ")
+    parser.add_argument("--calls", type=int, default=20000, help="依存性関数だけを呼び出す回数")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR, force=True)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
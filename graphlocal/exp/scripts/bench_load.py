@@ -0,0 +1,144 @@
+# scripts/bench_load.py
+# ---------------------------------------------------------
+# 負荷ベンチマーク（擬似レイテンシモデルでグラフを並行実行し、レイテンシ分布を計測）
+#
+#   uv run python scripts/bench_load.py --requests 500 --concurrency 50
+#   uv run python scripts/bench_load.py --tool-latency "lognormal:median=0.3,sigma=0.8" \
+#       --response-latency histogram:traces/respond.json --tool-error-rate 0.02 --slo 2.0
+#   uv run python scripts/bench_load.py --replay tests/fixtures/recordings --replay-speed 2.0
+# ---------------------------------------------------------
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from config import GraphConfig  # noqa: E402
+from graph.builder import create_graph  # noqa: E402
+from graph.messages import to_compact_message, to_tool_result  # noqa: E402
+from graph.recording import ReplayGraph  # noqa: E402
+from utils.metrics import LatencyHistogram  # noqa: E402
+
+
+async def run_turn(graph, text: str, thread_id: str) -> tuple[dict, float | None]:
+    """
+    1ターンを実行
+
+    最終状態は updates を畳み込んで作る（messages / tool_results のリデューサーは置き換えなので、
+    最後に書き込まれた値が最終状態になる）。記録の再生（ReplayGraph）でも同じように計測できる。
+
+    Returns:
+        (最終状態, 最初の応答トークンまでの秒数。トークンが流れなかった場合はNone)
+    """
+    started = time.perf_counter()
+    ttft = None
+    state: dict = {}
+    config = {"configurable": {"thread_id": thread_id}} if graph.checkpointer is not None else None
+    async for mode, data in graph.astream(
+        {"messages": [HumanMessage(content=text)], "step": "idle"},
+        stream_mode=["messages", "updates"],
+        config=config,
+    ):
+        if mode == "updates":
+            for update in data.values():
+                if isinstance(update, dict):
+                    state.update(update)
+        elif ttft is None and data[0].type == "AIMessageChunk" and data[0].content:
+            ttft = time.perf_counter() - started
+    state["messages"] = [to_compact_message(m) for m in state.get("messages") or []]
+    state["tool_results"] = [to_tool_result(r) for r in state.get("tool_results") or []]
+    return state, ttft
+
+
+async def run(args: argparse.Namespace) -> int:
+    config = GraphConfig(
+        tool_latency=args.tool_latency,
+        response_latency=args.response_latency,
+        response_tokens_per_second=args.tokens_per_second,
+        response_chunk_tokens=args.chunk_tokens,
+        response_chunk_max_delay=args.chunk_max_delay,
+        tool_error_rate=args.tool_error_rate,
+        response_error_rate=args.response_error_rate,
+        latency_seed=args.seed,
+        tool_timeout=args.tool_timeout,
+    )
+    if args.replay:
+        # ノードを実行せず、記録したイベント列を記録したタイミング（の倍率）で流す
+        graph = ReplayGraph.from_directory(args.replay, speed=args.replay_speed)
+    else:
+        graph = create_graph(config, speculative=args.speculative)
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    histogram = LatencyHistogram(max_samples=args.requests)
+    ttft_histogram = LatencyHistogram(max_samples=args.requests)
+    outcomes = {"ok": 0, "degraded": 0, "error": 0}
+
+    async def one(index: int):
+        text = "tool: benchmark" if rng.random() < args.tool_ratio else "hello"
+        async with semaphore:
+            started = time.perf_counter()
+            state, ttft = await run_turn(graph, text, f"bench-{index}")
+            histogram.observe(time.perf_counter() - started)
+        if ttft is not None:
+            ttft_histogram.observe(ttft)
+        results = state.get("tool_results") or []
+        content = state["messages"][-1].content
+        if content.startswith("エラー"):
+            outcomes["error"] += 1
+        elif results and results[-1].degraded:
+            outcomes["degraded"] += 1
+        else:
+            outcomes["ok"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    snapshot = histogram.snapshot()
+    print(f"requests={args.requests} concurrency={args.concurrency} elapsed={elapsed:.2f}s "
+          f"throughput={args.requests / elapsed:.1f} req/s")
+    print("latency: " + "  ".join(f"{key}={snapshot[key] * 1000:.1f}ms" for key in ("mean", "p50", "p95", "p99", "max")))
+    ttft = ttft_histogram.snapshot()
+    print(f"ttft ({ttft['count']} streamed): " + "  ".join(
+        f"{key}={ttft[key] * 1000:.1f}ms" for key in ("mean", "p50", "p95", "p99", "max")
+    ))
+    print("outcomes: " + "  ".join(f"{key}={value}" for key, value in outcomes.items()))
+
+    if args.slo is not None and snapshot["p99"] > args.slo:
+        print(f"p99 {snapshot['p99']:.3f}s exceeds SLO {args.slo:.3f}s")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="負荷ベンチマーク（擬似レイテンシ）")
+    parser.add_argument("--requests", type=int, default=200, help="実行するターン数")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時実行数")
+    parser.add_argument("--tool-ratio", type=float, default=0.5, help="tool: で始まる入力の割合")
+    parser.add_argument("--tool-latency", help="ツールのレイテンシモデル（例: lognormal:median=0.3,sigma=0.8）")
+    parser.add_argument("--response-latency", help="応答の最初のトークンまでのレイテンシモデル")
+    parser.add_argument("--tokens-per-second", type=float, help="応答のトークン生成速度")
+    parser.add_argument("--chunk-tokens", type=int, default=1, help="何トークンずつまとめて送るか")
+    parser.add_argument("--chunk-max-delay", type=float, help="トークンを溜める最大秒数")
+    parser.add_argument("--tool-error-rate", type=float, default=0.0, help="ツールのエラー注入率")
+    parser.add_argument("--response-error-rate", type=float, default=0.0, help="応答のエラー注入率")
+    parser.add_argument("--tool-timeout", type=float, default=10.0, help="ツールのタイムアウト（秒）")
+    parser.add_argument("--speculative", action="store_true", help="応答ノードを投機実行する")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--replay", help="グラフの代わりに再生する記録のディレクトリ（scripts/record_fixtures.py）")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="再生速度の倍率（0の場合は待たない）")
+    parser.add_argument("--slo", type=float, help="p99の目標（秒）。超えた場合は終了コード1")
+    args = parser.parse_args()
+    # 縮退・エラー注入のログは集計結果に含めるため表示しない
+    logging.basicConfig(level=logging.ERROR)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# scripts/bench_server.py
+# ---------------------------------------------------------
+# サーバープロファイルのベンチマーク（イベントループ・HTTPパーサーごとに uvicorn を起動し、/chat のSSEスループットを比較）
+#
+#   uv pip install -e ".[server]"   # uvloop / httptools（未インストールの組み合わせは読み飛ばす）
+#   uv run python scripts/bench_server.py --requests 500 --concurrency 50
+#   uv run python scripts/bench_server.py --profiles asyncio/h11,uvloop/httptools --words 200
+# ---------------------------------------------------------
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from server import is_available  # noqa: E402
+from utils.metrics import LatencyHistogram  # noqa: E402
+
+DEFAULT_PROFILES = "asyncio/h11,asyncio/httptools,uvloop/h11,uvloop/httptools"
+
+
+def free_port() -> int:
+    """空いているポート"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(loop: str, http: str, port: int) -> subprocess.Popen:
+    """擬似レイテンシなし・レート制限なしで uvicorn を1ワーカーで起動"""
+    env = {
+        **os.environ,
+        "TOOL_PROCESSING_DELAY": "0",
+        "RESPONSE_DELAY": "0",
+        "RATE_LIMIT_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app:app",
+            "--port", str(port), "--loop", loop, "--http", http,
+            "--no-access-log", "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    """サーバーが応答するまで待つ"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/metrics")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not start")
+        await asyncio.sleep(0.1)
+
+
+async def measure(port: int, args: argparse.Namespace) -> dict:
+    """
+    /chat に並行してリクエストし、SSEを最後まで読む
+
+    Returns:
+        リクエスト数・イベント数・バイト数・経過秒数・レイテンシ分布
+    """
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    # 圧縮のCPU時間を含めないよう identity を要求する
+    headers = {"Accept-Encoding": "identity"}
+    text = " ".join(f"word{i}" for i in range(args.words))
+    histogram = LatencyHistogram(max_samples=args.requests)
+    totals = {"events": 0, "bytes": 0}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60.0) as client:
+        await wait_ready(client)
+
+        async def one(index: int):
+            payload = {"input": f"tool: {text}" if index % 2 else text, "stateless": True}
+            async with semaphore:
+                started = time.perf_counter()
+                async with client.stream("POST", "/chat", json=payload, headers=headers) as response:
+                    async for chunk in response.aiter_bytes():
+                        totals["bytes"] += len(chunk)
+                        totals["events"] += chunk.count(b"\n\n")
+                histogram.observe(time.perf_counter() - started)
+
+        # 接続の確立とグラフの初回実行を計測から除く
+        await asyncio.gather(*(one(i) for i in range(args.concurrency)))
+        totals = {"events": 0, "bytes": 0}
+        histogram = LatencyHistogram(max_samples=args.requests)
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    return {**totals, "elapsed": elapsed, "latency": histogram.snapshot()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="イベントループ・HTTPパーサーごとのSSEスループット")
+    parser.add_argument("--requests", type=int, default=300, help="プロファイルごとのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=30, help="同時接続数")
+    parser.add_argument("--words", type=int, default=100, help="入力の単語数（応答のイベント数に比例）")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES, help="比較する <loop>/<http> （カンマ区切り）")
+    args = parser.parse_args()
+
+    print(f"{'profile':<18} {'req/s':>8} {'events/s':>10} {'MiB/s':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for profile in args.profiles.split(","):
+        loop, http = profile.split("/")
+        missing = [module for module in (loop, http) if module in ("uvloop", "httptools") and not is_available(module)]
+        if missing:
+            print(f"{profile:<18} skipped ({', '.join(missing)} not installed; uv pip install -e \".[server]\")")
+            continue
+        port = free_port()
+        process = start_server(loop, http, port)
+        try:
+            result = asyncio.run(measure(port, args))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        elapsed = result["elapsed"]
+        latency = result["latency"]
+        print(
+            f"{profile:<18} {args.requests / elapsed:>8.1f} {result['events'] / elapsed:>10.0f} "
+            f"{result['bytes'] / elapsed / 2**20:>7.2f} {latency['p50'] * 1000:>8.1f} {latency['p99'] * 1000:>8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
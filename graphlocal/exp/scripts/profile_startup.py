@@ -0,0 +1,92 @@
+# scripts/profile_startup.py
+# ---------------------------------------------------------
+# 起動時間のプロファイル（import時間の内訳と起動時間の予算チェック）
+#
+#   uv run python scripts/profile_startup.py
+#   uv run python scripts/profile_startup.py --runs 10 --budget 1.5 --top 30
+# ---------------------------------------------------------
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 起動時間の予算（秒）: インタープリタ起動から app の読み込み完了（グラフ構築込み）まで
+DEFAULT_BUDGET = 2.5
+
+
+def measure_startup(module: str) -> float:
+    """新しいプロセスで module を読み込むまでの実時間（秒）を計測"""
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - started
+
+
+def profile_imports(module: str) -> list[tuple[str, int, int]]:
+    """
+    -X importtime の出力を解析
+
+    Returns:
+        (モジュール名, self時間[us], 累積時間[us]) のリスト
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="起動時間のプロファイル")
+    parser.add_argument("--module", default="app", help="読み込むモジュール（デフォルト: app）")
+    parser.add_argument("--runs", type=int, default=5, help="起動時間の計測回数")
+    parser.add_argument("--top", type=int, default=20, help="表示するモジュール数")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="起動時間の予算（秒）")
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"== Top {args.top} imports by cumulative time ({args.module}) ==")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"{cumulative_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {name}")
+
+    print(f"\n== Top {args.top} packages by self time ==")
+    for package, self_us in sorted(by_package.items(), key=lambda r: r[1], reverse=True)[: args.top]:
+        print(f"{self_us / 1000:9.1f} ms  {package}")
+
+    timings = [measure_startup(args.module) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"\n== Startup ({args.runs} runs) ==")
+    print(f"median {median:.3f}s  min {min(timings):.3f}s  max {max(timings):.3f}s  budget {args.budget:.3f}s")
+
+    if median > args.budget:
+        print("FAIL: startup time exceeds budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# scripts/record_fixtures.py
+# ---------------------------------------------------------
+# 実際のグラフの実行を記録し、再生用のフィクスチャ（graph.recording）を作成
+#
+#   uv run python scripts/record_fixtures.py --out tests/fixtures/recordings
+#   uv run python scripts/record_fixtures.py --out traces/replay --gzip \
+#       --tool-latency "lognormal:median=0.3,sigma=0.8" "tool: weather" "hello"
+# ---------------------------------------------------------
+import argparse
+import asyncio
+import logging
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import GraphConfig  # noqa: E402
+from graph.builder import create_graph  # noqa: E402
+from graph.recording import record  # noqa: E402
+
+# 入力を指定しない場合に記録する入力（ツールあり・なし）
+DEFAULT_INPUTS = ("hello", "tool: weather in tokyo")
+
+
+def fixture_name(index: int, text: str) -> str:
+    """入力からファイル名を作る（例: 01-tool-weather-in-tokyo）"""
+    slug = re.sub(r"[^0-9a-z]+", "-", text.lower()).strip("-")[:40] or "input"
+    return f"{index:02d}-{slug}"
+
+
+async def run(args: argparse.Namespace) -> int:
+    config = GraphConfig(
+        tool_latency=args.tool_latency,
+        response_latency=args.response_latency,
+        response_tokens_per_second=args.tokens_per_second,
+        latency_seed=args.seed,
+    )
+    graph = create_graph(config)
+    out = Path(args.out)
+    suffix = ".ndjson.gz" if args.gzip else ".ndjson"
+    for index, text in enumerate(args.inputs or DEFAULT_INPUTS, start=1):
+        recording = await record(graph, text)
+        path = recording.save(out / f"{fixture_name(index, text)}{suffix}")
+        print(f"{path}: events={len(recording.events)} duration={recording.duration:.3f}s "
+              f"size={path.stat().st_size} bytes")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="グラフの実行を記録して再生用のフィクスチャを作成")
+    parser.add_argument("inputs", nargs="*", help="記録する入力（省略時はツールあり・なしの2件）")
+    parser.add_argument("--out", required=True, help="出力先ディレクトリ")
+    parser.add_argument("--gzip", action="store_true", help="gzip で圧縮して書き出す（.ndjson.gz）")
+    parser.add_argument("--tool-latency", help="ツールのレイテンシモデル（例: lognormal:median=0.3,sigma=0.8）")
+    parser.add_argument("--response-latency", help="応答の最初のトークンまでのレイテンシモデル")
+    parser.add_argument("--tokens-per-second", type=float, help="応答のトークン生成速度")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# server.py
+# ---------------------------------------------------------
+# uvicorn の起動プロファイル（ENVIRONMENT=production では uvloop / httptools と本番向けの設定）
+#
+#   uv run python main.py serve
+#   ENVIRONMENT=production uv run python main.py serve --host 0.0.0.0
+# ---------------------------------------------------------
+import importlib.util
+import logging
+from typing import Any, Dict
+
+from config import AppSettings
+
+logger = logging.getLogger(__name__)
+
+# 本番プロファイルを使う ENVIRONMENT の値
+PRODUCTION_ENVIRONMENTS = frozenset({"production", "prod"})
+
+# 本番プロファイルの既定値
+PRODUCTION_KEEP_ALIVE = 75
+PRODUCTION_BACKLOG = 4096
+
+
+def is_available(module: str) -> bool:
+    """モジュールがインストールされているか（インポートはしない）"""
+    return importlib.util.find_spec(module) is not None
+
+
+def is_production(settings: AppSettings) -> bool:
+    """本番プロファイルを使うか"""
+    return settings.environment.lower() in PRODUCTION_ENVIRONMENTS
+
+
+def uvicorn_options(settings: AppSettings) -> Dict[str, Any]:
+    """
+    uvicorn.run に渡す設定
+
+    development: reload を有効にし、その他は uvicorn の既定値。
+    production: reload を無効にし、インストールされていれば uvloop / httptools を使い、
+    Keep-Alive を75秒（一般的なロードバランサーの60秒より長く）、バックログを4096（uvicorn の既定は2048）にする。
+    ワーカー数は1（スレッド・ジョブ・ブロブ・ツール出力はプロセス内に保持し、uvicorn のワーカーは
+    1つの待ち受けソケットを共有するため、ワーカーを指定して振り分けられない）。
+    SERVER_* で指定した値はどちらのプロファイルでも優先する。
+
+    Args:
+        settings: アプリケーション設定
+
+    Returns:
+        uvicorn.run のキーワード引数
+    """
+    server = settings.server
+    options: Dict[str, Any] = {
+        "host": server.host,
+        "port": server.port,
+        "log_level": settings.log_level.lower(),
+    }
+    if is_production(settings):
+        options.update(
+            reload=False,
+            loop="uvloop" if is_available("uvloop") else "asyncio",
+            http="httptools" if is_available("httptools") else "h11",
+            workers=1,
+            timeout_keep_alive=PRODUCTION_KEEP_ALIVE,
+            backlog=PRODUCTION_BACKLOG,
+        )
+    else:
+        options["reload"] = True
+    overrides = {
+        "workers": server.workers,
+        "loop": server.loop,
+        "http": server.http,
+        "timeout_keep_alive": server.keep_alive,
+        "backlog": server.backlog,
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    if options.get("reload") and options.get("workers", 1) > 1:
+        # uvicorn は reload と複数ワーカーを同時に使えない（reload を優先する）
+        options.pop("workers")
+    return options
+
+
+def run(settings: AppSettings, **overrides: Any) -> None:
+    """
+    設定に応じたプロファイルでサーバーを起動する
+
+    Args:
+        settings: アプリケーション設定
+        **overrides: uvicorn.run のキーワード引数（コマンドライン引数など）
+    """
+    import uvicorn
+
+    options = {**uvicorn_options(settings), **overrides}
+    if options.get("workers", 1) > 1:
+        logger.warning(
+            f"Starting {options['workers']} workers: threads, jobs, blobs and shared tool results are kept per "
+            "worker process, so a thread or job is only visible on the worker that created it"
+        )
+    uvicorn.run("app:app", **options)
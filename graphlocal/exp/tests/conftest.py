@@ -6,7 +6,6 @@ import pytest
 from fastapi.testclient import TestClient
 
 from api.repositories.graph_repository import GraphRepository
-from api import set_graph_repository
 from tests.fixtures.mock_graph import create_mock_graph
 
 
@@ -25,20 +24,33 @@ def mock_graph_repository():
 def test_app(mock_graph_repository):
     """
     テスト用のFastAPIアプリケーションを作成
+    
+    依存性コンテナ（レート制限のバケットなどを含む）は TestClient の開始時に lifespan で作成される。
     """
-    from fastapi import FastAPI
-    from api import router
+    from app import create_app
     
-    app = FastAPI()
-    set_graph_repository(mock_graph_repository)
-    app.include_router(router)
-    return app
+    return create_app(mock_graph_repository)
 
 
 @pytest.fixture
 def client(test_app):
     """
-    テスト用のHTTPクライアント
+    テスト用のHTTPクライアント（lifespan を実行する）
     """
-    return TestClient(test_app)
+    with TestClient(test_app) as client:
+        yield client
+
 
+@pytest.fixture
+def admin_token(monkeypatch):
+    """管理用トークンを設定（スレッドの削除・移行と /admin/* で必要）"""
+    from config import get_default_settings
+    
+    monkeypatch.setattr(get_default_settings().admin, "token", "secret")
+    return "secret"
+
+
+@pytest.fixture
+def admin_headers(admin_token):
+    """管理用トークンのヘッダー"""
+    return {"X-Admin-Token": admin_token}
@@ -0,0 +1,98 @@
+# tests/e2e/test_admin_api.py
+# ---------------------------------------------------------
+# エンドツーエンドテスト（管理用API）
+# ---------------------------------------------------------
+def test_admin_disabled_without_token(client):
+    """
+    ADMIN_TOKEN 未設定の場合は管理用エンドポイントを公開しない
+    """
+    assert client.get("/admin/memory").status_code == 404
+
+
+def test_admin_memory_report(client, admin_token):
+    """
+    グラフ・スレッドごとのチェックポイント数と概算バイト数を返す
+    """
+    assert client.get("/admin/memory").status_code == 401
+    assert client.get("/admin/memory", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+    for thread_id in ("mem-small", "mem-large"):
+        client.post("/chat", json={"input": "x", "thread_id": thread_id}).read()
+    client.post("/chat", json={"input": "y" * 5000, "thread_id": "mem-large"}).read()
+
+    headers = {"X-Admin-Token": admin_token}
+    report = client.get("/admin/memory", params={"top": 1}, headers=headers).json()
+    default = report["graphs"]["default"]
+    assert default["supported"]
+    assert default["threads"] >= 2
+    assert default["checkpoints"] >= default["threads"]
+    assert report["total_bytes"] == default["bytes"] > 0
+    assert [entry["thread_id"] for entry in report["largest_threads"]] == ["mem-large"]
+
+    try:
+        first = client.get("/admin/memory", params={"allocations": "true"}, headers=headers).json()
+        assert first["allocations"]["started"]
+        second = client.get("/admin/memory", params={"allocations": "true"}, headers=headers).json()
+        assert not second["allocations"]["started"]
+        assert isinstance(second["allocations"]["top"], list)
+    finally:
+        assert client.delete("/admin/memory/allocations", headers=headers).json() == {"stopped": True}
+
+
+def test_admin_loop_reports_blocking_node(admin_token):
+    """
+    ノードがイベントループをブロックした場合、そのノード関数と秒数を返す
+    """
+    import time
+
+    from fastapi.testclient import TestClient
+    from langgraph.graph import END, START, StateGraph
+
+    from api.repositories.graph_repository import GraphRepository
+    from app import create_app
+    from graph.state import GraphState
+
+    async def blocking_respond(state: GraphState):
+        time.sleep(0.3)
+        return {"step": "idle"}
+
+    builder = StateGraph(GraphState)
+    builder.add_node("respond", blocking_respond)
+    builder.add_edge(START, "respond")
+    builder.add_edge("respond", END)
+    repo = GraphRepository()
+    repo.register("default", builder.compile())
+
+    with TestClient(create_app(repo)) as client:
+        # ウォームアップの実行もブロックするので、ready になってから計測する
+        deadline = time.monotonic() + 5
+        while client.get("/readyz").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        before = len(client.get("/admin/loop", headers={"X-Admin-Token": admin_token}).json()["slow_callbacks"])
+        client.post("/chat", json={"input": "x", "stateless": True}).read()
+        time.sleep(0.4)
+        report = client.get("/admin/loop", headers={"X-Admin-Token": admin_token}).json()
+
+    assert len(report["slow_callbacks"]) == before + 1
+    slow = report["slow_callbacks"][0]
+    assert slow["coroutine"].endswith("blocking_respond")
+    assert slow["duration"] > 0.2
+    assert report["threshold"] == 0.1
+
+
+def test_admin_profile_returns_collapsed_stacks(client, admin_token):
+    """
+    指定した秒数サンプリングし、flamegraph の collapsed 形式のファイルを返す
+    """
+    assert client.get("/admin/profile", params={"seconds": 0.1}).status_code == 401
+    headers = {"X-Admin-Token": admin_token}
+    assert client.get("/admin/profile", params={"scope": "node"}, headers=headers).status_code == 422
+
+    response = client.get("/admin/profile", params={"seconds": 0.2, "scope": "all"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["content-disposition"].endswith('.collapsed"')
+    assert float(response.headers["x-profile-seconds"]) >= 0.2
+    lines = response.text.splitlines()
+    assert len(lines) == len(set(lines))
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == int(response.headers["x-profile-samples"])
@@ -2,6 +2,8 @@
 # ---------------------------------------------------------
 # エンドツーエンドテスト（チャットAPI）
 # ---------------------------------------------------------
+import time
+
 import pytest
 
 
@@ -103,3 +105,220 @@ def test_chat_endpoint_invalid_request(client):
     )
     assert response.status_code == 422  # Validation error
 
+
+
+def test_chat_endpoint_lane_from_api_key(test_app, monkeypatch):
+    """
+    bulk用のAPIキーはリクエストの priority より優先して bulk レーンで実行される
+    """
+    from fastapi.testclient import TestClient
+
+    from config import get_default_settings
+
+    # コントローラーは lifespan で作成されるので、設定はクライアントの開始前に変更する
+    monkeypatch.setattr(get_default_settings().scheduler, "bulk_api_keys", "eval-key")
+
+    with TestClient(test_app) as client:
+        response = client.post("/chat", json={"input": "こんにちは"})
+        assert response.headers["X-Lane"] == "interactive"
+
+        response = client.post("/chat", json={"input": "こんにちは", "priority": "bulk"})
+        assert response.headers["X-Lane"] == "bulk"
+
+        response = client.post(
+            "/chat",
+            json={"input": "こんにちは", "priority": "interactive"},
+            headers={"X-API-Key": "eval-key"}
+        )
+        assert response.headers["X-Lane"] == "bulk"
+
+        metrics = client.get("/metrics").json()
+    assert metrics["counters"]["scheduler.bulk.completed"] >= 2
+    assert "scheduler.interactive.latency_seconds" in metrics["histograms"]
+
+
+def test_chat_endpoint_invalid_priority(client):
+    """
+    未知の priority は422エラー
+    """
+    response = client.post("/chat", json={"input": "こんにちは", "priority": "urgent"})
+    assert response.status_code == 422
+
+
+def test_chat_endpoint_rejects_while_draining(test_app, client):
+    """
+    シャットダウンのドレイン中は新しいチャットを503で断る
+    """
+    test_app.state.container.stream_tracker.start_draining()
+    response = client.post("/chat", json={"input": "こんにちは"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_chat_endpoint_compression(client):
+    """
+    Accept-Encoding に gzip を含む場合はSSEを gzip で返し、identity の場合は圧縮しない
+    """
+    import json
+
+    response = client.post("/chat", json={"input": "tool: search test"}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    # クライアント側で展開されたイベントは圧縮しない場合と同じ形式
+    events = [json.loads(line[6:]) for line in response.iter_lines() if line.startswith("data: ")]
+    assert events[0]["ch"] == "session"
+    assert any(event["ch"] == "raw" for event in events)
+
+    response = client.post("/chat", json={"input": "こんにちは"}, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_chat_endpoint_rate_limit(mock_graph_repository):
+    """
+    スレッドごとの上限を超えると429（Retry-After 付き）、成功時は X-RateLimit-* ヘッダーを返す
+    """
+    from fastapi.testclient import TestClient
+
+    from api.services.rate_limiter import RateLimiter
+    from app import create_app
+    from config import RateLimitConfig
+
+    app = create_app(mock_graph_repository, rate_limiter=RateLimiter(RateLimitConfig(enabled=True, thread_rate=0.01, thread_burst=2)))
+    with TestClient(app) as client:
+        response = client.post("/chat", json={"input": "こんにちは", "thread_id": "limited"})
+        assert response.status_code == 200
+        assert response.headers["X-RateLimit-Limit"] == "2"
+        assert response.headers["X-RateLimit-Remaining"] == "1"
+
+        client.post("/chat", json={"input": "こんにちは", "thread_id": "limited"})
+        response = client.post("/chat", json={"input": "こんにちは", "thread_id": "limited"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+        # 別のスレッドと、レート制限の対象外のエンドポイントは使える
+        assert client.post("/chat", json={"input": "こんにちは", "thread_id": "other"}).status_code == 200
+        assert client.get("/metrics").json()["counters"]["rate_limit.thread.rejected"] >= 1
+
+
+def test_chat_endpoint_stateless(client, admin_headers):
+    """
+    thread_id がなければチェックポイントなしで実行し、stateless=false ならヘッダーとセッションのスレッドIDが一致する
+    """
+    import json
+
+    response = client.post("/chat", json={"input": "こんにちは"})
+    assert response.headers["X-Stateless"] == "true"
+    assert "X-Thread-Id" not in response.headers
+    session = json.loads(next(line for line in response.iter_lines() if line.startswith("data: "))[6:])
+    assert session["data"] == {"thread_id": None, "stateless": True}
+
+    response = client.post("/chat", json={"input": "こんにちは", "stateless": False})
+    thread_id = response.headers["X-Thread-Id"]
+    session = json.loads(next(line for line in response.iter_lines() if line.startswith("data: "))[6:])
+    assert session["data"] == {"thread_id": thread_id, "stateless": False}
+    assert client.get(f"/threads/{thread_id}", headers=admin_headers).status_code == 200
+
+
+def test_chat_endpoint_event_filter(client):
+    """
+    events で指定したチャネル・ノードのイベントだけが送られ、不正な指定は422
+    """
+    import json
+
+    response = client.post(
+        "/chat",
+        json={"input": "tool: search test", "events": {"channels": ["updates"], "nodes": ["respond"]}},
+    )
+    events = [json.loads(line[6:]) for line in response.iter_lines() if line.startswith("data: ")]
+    assert [event["ch"] for event in events] == ["session", "raw"]
+    assert list(events[1]["data"][2]) == ["respond"]
+
+    response = client.post("/chat", json={"input": "a", "events": {"channels": ["values"]}})
+    assert response.status_code == 422
+
+
+def test_controllers_are_shared(test_app, client):
+    """
+    コントローラー・サービスは lifespan で作成したコンテナのものをリクエスト間で共有する
+    """
+    from types import SimpleNamespace
+
+    from api.router import get_chat_controller
+
+    container = test_app.state.container
+    connection = SimpleNamespace(app=test_app)
+    assert get_chat_controller(connection) is container.chat_controller
+    assert container.chat_controller.chat_service is container.job_service.chat_service
+    assert client.post("/chat", json={"input": "こんにちは"}).status_code == 200
+    assert test_app.state.container is container
+
+
+def test_chat_endpoint_body_limit(mock_graph_repository, monkeypatch):
+    """
+    LIMITS_MAX_BODY_BYTES を超えるボディは、Content-Length の有無に関わらず413
+    """
+    from fastapi.testclient import TestClient
+
+    from app import create_app
+    from config import get_default_settings
+
+    monkeypatch.setattr(get_default_settings().limits, "max_body_bytes", 1024)
+    with TestClient(create_app(mock_graph_repository)) as client:
+        response = client.post("/chat", json={"input": "x" * 2000})
+        assert response.status_code == 413
+
+        # chunked（Content-Length なし）は受信したバイト数で打ち切る
+        chunks = iter([b'{"input": "', b"x" * 2000, b'"}'])
+        response = client.post("/chat", content=chunks, headers={"Content-Type": "application/json"})
+        assert response.status_code == 413
+
+        assert client.post("/chat", json={"input": "x" * 100}).status_code == 200
+        assert client.get("/metrics").json()["counters"]["limits.body.rejected"] >= 2
+
+
+def test_chat_endpoint_offloads_large_input(mock_graph_repository, monkeypatch, admin_headers):
+    """
+    LIMITS_INLINE_INPUT_CHARS より長い入力は状態に先頭のみを残し、全文は /blobs/{id} で取得できる
+    """
+    from fastapi.testclient import TestClient
+
+    from app import create_app
+    from config import get_default_settings
+    from utils.serializers import to_jsonable
+
+    monkeypatch.setattr(get_default_settings().limits, "inline_input_chars", 16)
+    text = "長い入力 " * 100
+    app = create_app(mock_graph_repository)
+    with TestClient(app) as client:
+        assert client.post("/chat", json={"input": text, "thread_id": "big"}).status_code == 200
+        # 入力はチェックポイントの履歴に先頭とブロブIDだけが残る
+        history = mock_graph_repository.get("default").get_state_history({"configurable": {"thread_id": "big"}})
+        humans = [m for snapshot in history for m in snapshot.values.get("messages", []) if m.type == "human"]
+        assert humans and all(m.content == text[:16] + "…" and m.blob for m in humans)
+        assert to_jsonable(humans[0])["blob"] == humans[0].blob
+        # 退避した入力は管理用トークンがなければ取得できない
+        assert client.get(f"/blobs/{humans[0].blob}").status_code == 401
+        response = client.get(f"/blobs/{humans[0].blob}", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.text == text
+
+        # ステートレスの場合は先頭のみを渡し、ブロブは保存しない
+        client.post("/chat", json={"input": text + "!", "stateless": True})
+        assert len(app.state.container.blob_repository._blobs) == 1
+        assert client.get("/blobs/" + "0" * 64, headers=admin_headers).status_code == 404
+        assert client.get("/blobs/..%2Fetc", headers=admin_headers).status_code == 404
+
+        # ジョブのレコードにも先頭のみを残す
+        job = client.post("/jobs", json={"input": text, "thread_id": "big-job"}).json()
+        assert job["request"]["input"] == text[:16] + "…" and job["input_blob"] == humans[0].blob
+
+        # 参照しているスレッドがすべて削除（drain を含む）されたブロブは消える
+        blob_id = humans[0].blob
+        while client.get(f"/jobs/{job['id']}").json()["status"] in ("queued", "running"):
+            time.sleep(0.01)
+        assert client.delete("/threads/big-job", headers=admin_headers).status_code == 200
+        assert client.get(f"/blobs/{blob_id}", headers=admin_headers).status_code == 200
+        client.get("/threads/export", params={"thread_id": "big", "drain": "true"}, headers=admin_headers).read()
+        assert client.get(f"/blobs/{blob_id}", headers=admin_headers).status_code == 404
@@ -0,0 +1,63 @@
+# tests/e2e/test_health_api.py
+# ---------------------------------------------------------
+# エンドツーエンドテスト（ヘルスチェック・レディネス・飽和度）
+# ---------------------------------------------------------
+import time
+
+
+def _wait_ready(client, timeout: float = 5.0):
+    """ウォームアップが終わるまで /readyz を呼ぶ"""
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/readyz")
+        if response.status_code == 200 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.02)
+
+
+def test_healthz_and_readyz_after_warmup(client):
+    """
+    /healthz は常に200、/readyz は全グラフのウォームアップが終わってから200
+    """
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+    response = _wait_ready(client)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True and body["reasons"] == []
+    assert body["graphs"]["default"]["status"] == "warm"
+    # ウォームアップはステートレスで実行し、スレッドを残さない
+    assert client.get("/saturation").json()["checkpointer"]["graphs"]["default"]["threads"] == 0
+    assert body["in_flight"] == 0
+
+
+def test_readyz_fails_while_draining(client, test_app):
+    """
+    ドレインを始めた後は503を返し、ロードバランサーの振り分けから外れる
+    """
+    assert _wait_ready(client).status_code == 200
+    test_app.state.container.stream_tracker.start_draining()
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "draining" in response.json()["reasons"]
+    assert client.get("/healthz").status_code == 200
+
+
+def test_saturation(client):
+    """
+    実行中のストリーム・スケジューラー・イベントループの遅延・チェックポインターの大きさを返す
+    """
+    client.post("/chat", json={"input": "hello", "thread_id": "sat-1"}).read()
+
+    body = client.get("/saturation").json()
+    assert body["streams"] == {"in_flight": 0, "draining": False}
+    assert body["scheduler"]["active"] == 0
+    assert set(body["scheduler"]["queued"]) == {"interactive", "bulk"}
+    assert body["loop"]["lag"] >= 0
+    assert body["checkpointer"]["graphs"]["default"]["threads"] == 1
+    assert body["checkpointer"]["total_bytes"] > 0
+    assert "streams.in_flight" in client.get("/metrics").json()["gauges"]
@@ -0,0 +1,39 @@
+# tests/e2e/test_job_api.py
+# ---------------------------------------------------------
+# エンドツーエンドテスト（バックグラウンドジョブAPI）
+# ---------------------------------------------------------
+import json
+
+from fastapi.testclient import TestClient
+
+
+def test_submit_poll_and_attach(test_app, admin_headers):
+    """
+    ジョブは202ですぐに返り、状態の取得とイベントの取得（Last-Event-ID で再開）ができる
+    """
+    # ワーカーがリクエストをまたいで動き続けるよう、同じイベントループを使う
+    with TestClient(test_app) as client:
+        response = client.post("/jobs", json={"input": "tool: search test"})
+        assert response.status_code == 202
+        job = response.json()
+        assert response.headers["Location"] == f"/jobs/{job['id']}"
+        assert job["status"] == "queued"
+
+        response = client.get(f"/jobs/{job['id']}/events")
+        lines = [line for line in response.iter_lines() if line]
+        ids = [int(line[4:]) for line in lines if line.startswith("id: ")]
+        events = [json.loads(line[6:]) for line in lines if line.startswith("data: ")]
+        assert ids == list(range(len(events)))
+        assert events[0]["ch"] == "session"
+
+        job = client.get(f"/jobs/{job['id']}").json()
+        assert job["status"] == "succeeded"
+        assert job["events"] == len(events)
+        assert client.get(f"/threads/{job['thread_id']}", headers=admin_headers).status_code == 200
+
+        response = client.get(f"/jobs/{job['id']}/events", headers={"Last-Event-ID": str(len(events) - 2)})
+        assert [line for line in response.iter_lines() if line.startswith("id: ")] == [f"id: {len(events) - 1}"]
+
+        assert client.delete(f"/jobs/{job['id']}").json()["deleted"]
+        assert client.get(f"/jobs/{job['id']}").status_code == 404
+        assert client.post("/jobs?graph_name=missing", json={"input": "a"}).status_code == 404
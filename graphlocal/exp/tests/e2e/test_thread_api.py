@@ -0,0 +1,104 @@
+# tests/e2e/test_thread_api.py
+# ---------------------------------------------------------
+# エンドツーエンドテスト（スレッドAPI）
+# ---------------------------------------------------------
+import json
+
+
+def _run_chat(client, thread_id: str, text: str = "tool: search test"):
+    """チャットを実行してストリームを最後まで読む"""
+    response = client.post("/chat", json={"input": text, "thread_id": thread_id})
+    assert response.status_code == 200
+    response.read()
+
+
+def test_get_and_delete_thread(client, admin_headers):
+    """
+    スレッド状態の取得と削除のテスト
+    """
+    _run_chat(client, "thread-a")
+
+    assert client.get("/threads/thread-a").status_code == 401
+    response = client.get("/threads/thread-a", headers=admin_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["thread_id"] == "thread-a"
+    assert body["values"]["messages"][-1]["role"] == "assistant"
+
+    assert client.delete("/threads/thread-a").status_code == 401
+    response = client.delete("/threads/thread-a", headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/threads/thread-a", headers=admin_headers).status_code == 404
+    assert client.delete("/threads/thread-a", headers=admin_headers).status_code == 404
+
+
+def test_get_thread_unknown_graph(client, admin_headers):
+    """
+    存在しないグラフを指定した場合は404
+    """
+    response = client.get("/threads/thread-a", params={"graph_name": "nonexistent"}, headers=admin_headers)
+    assert response.status_code == 404
+
+
+def test_export_drain_and_import_threads(client, admin_headers):
+    """
+    エクスポート（drain）したスレッドをインポートで復元できる
+    """
+    _run_chat(client, "thread-1")
+    _run_chat(client, "thread-2", "こんにちは")
+    before = client.get("/threads/thread-2", headers=admin_headers).json()
+
+    response = client.get("/threads/export", params={"drain": "true"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [line for line in response.text.splitlines() if line]
+    assert sorted(json.loads(line)["thread_id"] for line in lines) == ["thread-1", "thread-2"]
+    assert client.get("/threads/thread-2", headers=admin_headers).status_code == 404
+
+    response = client.post("/threads/import", content="\n".join(lines).encode(), headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json() == {"imported": 2}
+    assert client.get("/threads/thread-2", headers=admin_headers).json() == before
+
+
+def test_import_invalid_record(client, admin_headers):
+    """
+    不正なNDJSONは400
+    """
+    response = client.post("/threads/import", content=b"not json\n", headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_thread_migration_requires_admin_token(client):
+    """
+    スレッドの取得・削除・エクスポート・インポートは管理用エンドポイント（ADMIN_TOKEN 未設定の場合は404）
+    """
+    _run_chat(client, "thread-x")
+    assert client.delete("/threads/thread-x").status_code == 404
+    assert client.get("/threads/export").status_code == 404
+    assert client.post("/threads/import", content=b"").status_code == 404
+    assert client.get("/threads/thread-x").status_code == 404
+
+
+
+def test_import_body_limit(mock_graph_repository, monkeypatch, admin_headers):
+    """
+    インポートのボディは LIMITS_MAX_BODY_BYTES ではなく LIMITS_MAX_IMPORT_BYTES で制限する（超えたら413）
+    """
+    from fastapi.testclient import TestClient
+
+    from app import create_app
+    from config import get_default_settings
+
+    monkeypatch.setattr(get_default_settings().limits, "max_body_bytes", 128)
+    monkeypatch.setattr(get_default_settings().limits, "max_import_bytes", 4096)
+    with TestClient(create_app(mock_graph_repository)) as client:
+        _run_chat(client, "thread-limit", "x")
+        body = client.get("/threads/export", headers=admin_headers).content
+        assert 128 < len(body) <= 4096
+        response = client.post("/threads/import", content=body, headers=admin_headers)
+        assert response.json() == {"imported": 1}
+
+        chunks = iter([body] * 10)
+        response = client.post("/threads/import", content=chunks, headers=admin_headers)
+        assert response.status_code == 413
@@ -0,0 +1,86 @@
+# tests/e2e/test_ws_api.py
+# ---------------------------------------------------------
+# エンドツーエンドテスト（WebSocketチャットAPI）
+# ---------------------------------------------------------
+
+
+def _receive_until_end(ws, thread_ids):
+    """指定したスレッドがすべて end になるまでフレームを受信し、スレッドごとに振り分ける"""
+    frames = {thread_id: [] for thread_id in thread_ids}
+    pending = set(thread_ids)
+    while pending:
+        frame = ws.receive_json()
+        frames[frame["t"]].append(frame)
+        if frame["ch"] == "end":
+            pending.discard(frame["t"])
+    return frames
+
+
+def test_ws_multiplexes_threads(client, admin_headers):
+    """
+    1接続で複数スレッドのターンを並行に実行し、フレームはスレッドIDで振り分けられる
+    """
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"t": "ws-1", "input": "tool: search test"})
+        ws.send_json({"t": "ws-2", "input": "こんにちは"})
+        frames = _receive_until_end(ws, ["ws-1", "ws-2"])
+
+        for thread_id in ("ws-1", "ws-2"):
+            channels = [frame["ch"] for frame in frames[thread_id]]
+            assert channels[0] == "session"
+            assert frames[thread_id][0]["data"]["thread_id"] == thread_id
+            assert channels[-1] == "end"
+            assert "error" not in channels
+
+        # 同じ接続で次のターンを続けられる
+        ws.send_json({"t": "ws-1", "input": "続き"})
+        frames = _receive_until_end(ws, ["ws-1"])
+        assert frames["ws-1"][-1]["ch"] == "end"
+
+    assert client.get("/threads/ws-1", headers=admin_headers).json()["values"]["messages"][-1]["type"] == "AIMessage"
+
+
+def test_ws_invalid_frames(client):
+    """
+    不正なフレーム（バイナリフレームを含む）はエラーフレームを返し、接続は維持される
+    """
+    with client.websocket_connect("/ws") as ws:
+        ws.send_text("not json")
+        frame = ws.receive_json()
+        assert frame["t"] is None
+        assert frame["ch"] == "error"
+
+        ws.send_bytes(b'{"t": "ws-3", "input": "binary"}')
+        frame = ws.receive_json()
+        assert frame["t"] is None
+        assert frame["ch"] == "error"
+
+        ws.send_json({"t": "ws-3", "input": ""})
+        frame = ws.receive_json()
+        assert frame == {"t": "ws-3", "ch": "error", "data": frame["data"]}
+
+        ws.send_json({"t": "ws-3", "input": "こんにちは"})
+        frames = _receive_until_end(ws, ["ws-3"])
+        assert frames["ws-3"][0]["ch"] == "session"
+
+
+def test_ws_turn_without_thread_is_stateless(client, admin_headers):
+    """
+    "t" のないターンは /chat と同じくステートレスで実行し、フレームには接続内の相関IDを付ける
+    """
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"input": "こんにちは"})
+        session = ws.receive_json()
+        assert session["ch"] == "session"
+        assert session["t"] is not None
+        assert session["data"] == {"thread_id": None, "stateless": True}
+        frames = _receive_until_end(ws, [session["t"]])
+        assert frames[session["t"]][-1]["ch"] == "end"
+
+        # stateless=false の場合は採番したスレッドIDを付ける
+        ws.send_json({"input": "こんにちは", "stateless": False})
+        session = ws.receive_json()
+        assert session["data"] == {"thread_id": session["t"], "stateless": False}
+        _receive_until_end(ws, [session["t"]])
+
+    assert client.get(f"/threads/{session['t']}", headers=admin_headers).status_code == 200
@@ -4,10 +4,10 @@
 # ---------------------------------------------------------
 from typing import Any, Dict
 
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages import AIMessage, ToolMessage
 from langgraph.graph import START, END, StateGraph
-from langgraph.checkpoint.memory import MemorySaver
 
+from graph.builder import create_checkpointer
 from graph.state import GraphState, StepType
 from graph.nodes import NodeName
 
@@ -22,7 +22,7 @@ async def mock_planner(state: GraphState) -> Dict[str, Any]:
         return {"step": StepType.RESPONDING}
     
     last = messages[-1]
-    text = (last.content or "").strip().lower() if isinstance(last, HumanMessage) else ""
+    text = (last.content or "").strip().lower() if last.type == "human" else ""
     step = StepType.TOOLING if text.startswith("tool:") else StepType.RESPONDING
     return {"step": step}
 
@@ -37,7 +37,7 @@ async def mock_call_tool(state: GraphState) -> Dict[str, Any]:
         return {"step": StepType.RESPONDING}
     
     last = messages[-1]
-    user_text = (last.content or "").strip() if isinstance(last, HumanMessage) else ""
+    user_text = (last.content or "").strip() if last.type == "human" else ""
     query = user_text.split(":", 1)[1].strip() if ":" in user_text else user_text
     
     # モックツール結果
@@ -70,7 +70,7 @@ async def mock_respond(state: GraphState) -> Dict[str, Any]:
         return {"messages": [AIMessage(content="Mock: メッセージが見つかりません")]}
     
     last = messages[-1]
-    user_text = (last.content or "").strip() if isinstance(last, HumanMessage) else ""
+    user_text = (last.content or "").strip() if last.type == "human" else ""
     used_tool = bool(state.get("tool_results"))
     content = ("（ツールを使いました）\n" if used_tool else "") + f"Mock Echo: {user_text}"
     return {"messages": [AIMessage(content=content)]}
@@ -94,13 +94,13 @@ def create_mock_graph(checkpointer=None):
     テスト用のモックグラフを作成
     
     Args:
-        checkpointer: チェックポインター（Noneの場合はMemorySaverを使用）
+        checkpointer: チェックポインター（Noneの場合は create_checkpointer() の MemorySaver を使用）
     
     Returns:
         コンパイルされたモックグラフ
     """
     if checkpointer is None:
-        checkpointer = MemorySaver()
+        checkpointer = create_checkpointer()
     
     builder = StateGraph(GraphState)
     builder.add_node(NodeName.PLANNER, mock_planner)
@@ -118,3 +118,89 @@ async def test_graph_execution_nonexistent_graph(mock_repo):
         ):
             pass
 
+
+
+@pytest.mark.asyncio
+async def test_graph_execution_event_filter(mock_repo):
+    """
+    リクエストの絞り込みはストリームモード・ノードで、グラフごとの絞り込みと合成して適用する
+    """
+    from api.models import EventFilter
+
+    def initial_state() -> GraphState:
+        return {"messages": [HumanMessage(content="tool: search")], "step": StepType.IDLE}
+
+    all_events = [event async for event in mock_repo.stream_execution("test_graph", initial_state(), stateless=True)]
+    assert {mode for _, mode, _ in all_events} == {"messages", "updates"}
+
+    events = [
+        event async for event in mock_repo.stream_execution(
+            "test_graph", initial_state(), stateless=True,
+            event_filter=EventFilter(channels=["updates"], nodes=["respond"]),
+        )
+    ]
+    assert [(ns, mode, list(data)) for ns, mode, data in events] == [((), "updates", ["respond"])]
+
+    # サブグラフを含めない場合も (名前空間, モード, データ) の形で返す
+    events = [
+        event async for event in mock_repo.stream_execution(
+            "test_graph", initial_state(), stateless=True,
+            event_filter=EventFilter(channels=["updates"], subgraphs=False),
+        )
+    ]
+    assert [list(data) for _, _, data in events] == [["planner"], ["tool"], ["respond"]]
+
+    # グラフごとの絞り込みはリクエストの指定より狭くできない
+    mock_repo.register("filtered", create_mock_graph(), event_filter=EventFilter(nodes=["planner", "respond"]))
+    events = [
+        event async for event in mock_repo.stream_execution(
+            "filtered", initial_state(), stateless=True,
+            event_filter=EventFilter(channels=["updates"], nodes=["tool", "respond"]),
+        )
+    ]
+    assert [list(data) for _, _, data in events] == [["respond"]]
+
+    # チャネルが空でもグラフは実行される
+    events = [
+        event async for event in mock_repo.stream_execution(
+            "test_graph", initial_state(), config={"thread_id": "silent"}, event_filter=EventFilter(channels=[])
+        )
+    ]
+    assert events == []
+    assert "silent" in mock_repo.get("test_graph").checkpointer.storage
+
+
+@pytest.mark.asyncio
+async def test_replay_recorded_fixtures():
+    """
+    記録したフィクスチャ（tests/fixtures/recordings）をリポジトリ・チャットサービス経由で再生する
+    """
+    from pathlib import Path
+
+    from api.models import ChatRequest, EventFilter
+    from api.services.chat_service import ChatService
+    from graph.recording import ReplayGraph, load_recordings
+    from utils.serializers import to_jsonable
+
+    recordings = load_recordings(Path(__file__).parent.parent / "fixtures" / "recordings")
+    repo = GraphRepository()
+    repo.register("replay", ReplayGraph(recordings, speed=0))
+    service = ChatService(repo)
+
+    for recording in recordings:
+        events = [
+            event async for event in service.stream_events(ChatRequest(input=recording.input), "replay")
+        ]
+        assert events[0]["ch"] == "session"
+        assert [event["data"] for event in events[1:]] == [
+            to_jsonable([list(e.namespace), e.mode, e.data]) for e in recording.events
+        ]
+
+    # 絞り込みは実際のグラフと同じように働く
+    events = [
+        event async for event in repo.stream_execution(
+            "replay", {"messages": [HumanMessage(content=recordings[0].input)]}, stateless=True,
+            event_filter=EventFilter(channels=["updates"], nodes=["respond"]),
+        )
+    ]
+    assert [list(data) for _, _, data in events] == [["respond"]]
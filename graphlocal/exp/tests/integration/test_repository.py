@@ -3,9 +3,11 @@
 # 統合テスト（リポジトリ）
 # ---------------------------------------------------------
 import pytest
+from langchain_core.messages import HumanMessage
 
 from api.repositories.graph_repository import GraphRepository
 from tests.fixtures.mock_graph import create_mock_graph
+from utils.serializers import to_jsonable
 
 
 def test_repository_register_and_get():
@@ -63,3 +65,290 @@ def test_repository_overwrite():
     retrieved_graph = repo.get("test_graph")
     assert retrieved_graph == mock_graph2
 
+
+
+@pytest.mark.asyncio
+async def test_repository_stateless_execution_skips_checkpoints():
+    """
+    ステートレス実行はチェックポインターを外したグラフで実行し、チェックポイントを書かない
+    """
+    from langchain_core.messages import HumanMessage
+
+    repo = GraphRepository()
+    mock_graph = create_mock_graph()
+    repo.register("default", mock_graph)
+
+    stateless_graph = repo.get_stateless("default")
+    assert stateless_graph.checkpointer is None
+    assert repo.get_stateless("default") is stateless_graph
+    assert mock_graph.checkpointer is not None
+
+    events = [
+        event async for event in repo.stream_execution(
+            "default", {"messages": [HumanMessage(content="こんにちは")], "step": "idle"}, stateless=True
+        )
+    ]
+    assert events
+    assert len(mock_graph.checkpointer.storage) == 0
+
+    async for _ in repo.stream_execution(
+        "default", {"messages": [HumanMessage(content="こんにちは")], "step": "idle"}, config={"thread_id": "t1"}
+    ):
+        pass
+    assert "t1" in mock_graph.checkpointer.storage
+
+    # 再登録するとステートレス版も作り直す
+    repo.register("default", create_mock_graph())
+    assert repo.get_stateless("default") is not stateless_graph
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_blob_repository(tmp_path, on_disk):
+    """
+    ブロブは内容のハッシュで1つにまとめて保存し、不正なIDはパスに使わない
+    """
+    from api.repositories.blob_repository import BlobRepository, blob_id_of
+
+    repo = BlobRepository(str(tmp_path / "blobs") if on_disk else None)
+    blob_id = repo.put("大きな入力".encode())
+    assert blob_id == blob_id_of("大きな入力".encode())
+    assert repo.put("大きな入力".encode()) == blob_id
+    assert repo.get(blob_id) == "大きな入力".encode()
+    if on_disk:
+        assert (tmp_path / "blobs" / blob_id[:2] / blob_id).is_file()
+        assert BlobRepository(str(tmp_path / "blobs")).get(blob_id) == "大きな入力".encode()
+
+    assert repo.get("../" + blob_id) is None
+    assert repo.delete(blob_id) is True
+    assert repo.get(blob_id) is None
+    assert repo.delete(blob_id) is False
+
+
+@pytest.mark.asyncio
+async def test_tool_results_shared_across_threads_and_exported():
+    """
+    同じツール出力は複数スレッドで共有し、エクスポートに含め、全スレッドの削除で解放する
+    """
+    from config import GraphConfig
+    from graph.builder import create_graph
+    from graph.result_store import get_tool_result_store
+
+    store = get_tool_result_store()
+    repo = GraphRepository()
+    repo.register("default", create_graph(GraphConfig(tool_processing_delay=0.0, response_delay=0.0)))
+    for thread_id in ("share-1", "share-2"):
+        async for _ in repo.stream_execution(
+            "default",
+            {"messages": [HumanMessage(content="tool: shared store")], "step": "idle"},
+            config={"thread_id": thread_id},
+        ):
+            pass
+
+    state = await repo.get_thread_state("default", "share-1")
+    ref = state["values"]["tool_results"][-1].ref
+    assert ref is not None and store.refcount(ref) == 2
+    assert to_jsonable(state["values"]["tool_results"])[-1]["output"]["top"] == "Top result for 'shared store'"
+    assert repo.memory_stats()["tool_results"]["entries"] >= 1
+
+    assert await repo.delete_thread("default", "share-1")
+    assert store.refcount(ref) == 1
+    records = [record async for record in repo.export_threads("default", ["share-2"], drain=True)]
+    assert store.get(ref) is None
+    assert list(records[0]["tool_results"]) == [ref]
+
+    async def replay():
+        for record in records:
+            yield record
+
+    assert await repo.import_threads("default", replay()) == 1
+    assert store.refcount(ref) == 1
+    state = await repo.get_thread_state("default", "share-2")
+    assert to_jsonable(state["values"]["tool_results"])[-1]["output"]["items"][0] == "shared store - A"
+
+    tampered = dict(records[0], tool_results={ref: {"top": "改ざん"}})
+
+    async def replay_tampered():
+        yield tampered
+
+    with pytest.raises(ValueError):
+        await repo.import_threads("default", replay_tampered())
+
+
+@pytest.mark.asyncio
+async def test_tool_result_refs_are_scoped_per_graph():
+    """
+    別のグラフの同じスレッドIDは別の参照として数え、インポートは既存のスレッドの参照を置き換える
+    """
+    from config import GraphConfig
+    from graph.builder import create_graph
+    from graph.result_store import get_tool_result_store
+
+    store = get_tool_result_store()
+    repo = GraphRepository()
+    for name in ("a", "b"):
+        repo.register(name, create_graph(GraphConfig(tool_processing_delay=0.0, response_delay=0.0)))
+        async for _ in repo.stream_execution(
+            name,
+            {"messages": [HumanMessage(content="tool: scoped refs")], "step": "idle"},
+            config={"thread_id": "same-id"},
+        ):
+            pass
+
+    ref = (await repo.get_thread_state("a", "same-id"))["values"]["tool_results"][-1].ref
+    assert store.refcount(ref) == 2
+    assert await repo.delete_thread("a", "same-id")
+    assert store.refcount(ref) == 1
+    state = await repo.get_thread_state("b", "same-id")
+    assert to_jsonable(state["values"]["tool_results"])[-1]["output"]["top"] == "Top result for 'scoped refs'"
+
+    # 既存のスレッドへのインポートは置き換えで、参照は1つのまま
+    records = [record async for record in repo.export_threads("b", ["same-id"])]
+
+    async def replay():
+        for record in records:
+            yield record
+
+    assert await repo.import_threads("b", replay()) == 1
+    assert store.refcount(ref) == 1
+    assert await repo.delete_thread("b", "same-id")
+    assert store.get(ref) is None
+
+
+@pytest.mark.asyncio
+async def test_blobs_are_refcounted_and_exported():
+    """
+    スレッドが参照するブロブはエクスポートに含めてインポート先で復元し、参照がなくなれば削除する
+    """
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import END, START, StateGraph
+
+    from api.repositories.blob_repository import BlobRepository
+    from graph.messages import BLOB_KEY
+    from graph.state import GraphState
+
+    async def noop(state: GraphState):
+        return {"step": "idle"}
+
+    def build() -> GraphRepository:
+        builder = StateGraph(GraphState)
+        builder.add_node("noop", noop)
+        builder.add_edge(START, "noop")
+        builder.add_edge("noop", END)
+        repo = GraphRepository()
+        repo.register("default", builder.compile(checkpointer=MemorySaver()))
+        return repo
+
+    source, blobs = build(), BlobRepository()
+    text = "長い入力".encode("utf-8") * 100
+    for thread_id in ("blob-1", "blob-2"):
+        blob_id = blobs.put(text, source.thread_owner("default", thread_id))
+        message = HumanMessage(content="長い…", additional_kwargs={BLOB_KEY: blob_id})
+        async for _ in source.stream_execution(
+            "default", {"messages": [message], "step": "idle"}, config={"thread_id": thread_id}
+        ):
+            pass
+    assert blobs.refcount(blob_id) == 2
+
+    assert await source.delete_thread("default", "blob-1", blobs=blobs)
+    assert blobs.get(blob_id) == text
+    records = [record async for record in source.export_threads("default", drain=True, blobs=blobs)]
+    assert blobs.get(blob_id) is None
+    assert list(records[0]["blobs"]) == [blob_id]
+
+    async def replay():
+        for record in records:
+            yield record
+
+    target, target_blobs = build(), BlobRepository()
+    assert await target.import_threads("default", replay(), blobs=target_blobs) == 1
+    assert target_blobs.get(blob_id) == text and target_blobs.refcount(blob_id) == 1
+
+    tampered = dict(records[0], blobs={blob_id: "eA=="})
+
+    async def replay_tampered():
+        yield tampered
+
+    with pytest.raises(ValueError):
+        await target.import_threads("default", replay_tampered(), blobs=target_blobs)
+
+
+def _interrupted_graph():
+    """並列ノードの片方が完了し、もう片方（サブグラフ）が interrupt で止まるグラフ"""
+    import operator
+    from typing import Annotated, TypedDict
+
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import END, START, StateGraph
+    from langgraph.types import interrupt
+
+    class State(TypedDict):
+        log: Annotated[list, operator.add]
+
+    def ask(state: State):
+        return {"log": [f"answer:{interrupt('question')}"]}
+
+    sub = StateGraph(State)
+    sub.add_node("ask", ask)
+    sub.add_edge(START, "ask")
+    sub.add_edge("ask", END)
+
+    builder = StateGraph(State)
+    builder.add_node("fast", lambda state: {"log": ["fast"]})
+    builder.add_node("sub", sub.compile())
+    builder.add_edge(START, "fast")
+    builder.add_edge(START, "sub")
+    builder.add_edge("fast", END)
+    builder.add_edge("sub", END)
+    repo = GraphRepository()
+    repo.register("default", builder.compile(checkpointer=MemorySaver()))
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_import_restores_subgraphs_and_pending_writes():
+    """
+    中断したスレッドはサブグラフの状態と保留中の書き込みごと移行し、移行先で再開できる
+    """
+    from langgraph.types import Command
+
+    source = _interrupted_graph()
+    config = {"configurable": {"thread_id": "interrupted"}}
+    await source.get("default").ainvoke({"log": []}, config)
+    records = [record async for record in source.export_threads("default", drain=True)]
+    assert len(records) == 1
+
+    async def replay(items):
+        for item in items:
+            yield item
+
+    target = _interrupted_graph()
+    assert await target.import_threads("default", replay(records)) == 1
+    state = await target.get("default").aget_state(config, subgraphs=True)
+    tasks = {task.name: task for task in state.tasks}
+    assert tasks["fast"].result == {"log": ["fast"]}
+    assert tasks["sub"].state.next == ("ask",)
+    result = await target.get("default").ainvoke(Command(resume="yes"), config)
+    assert sorted(result["log"]) == ["answer:yes", "fast"]
+
+
+@pytest.mark.asyncio
+async def test_import_validates_every_record_before_writing():
+    """
+    不正なレコードが含まれる場合は、その前のレコードも含めてどのスレッドも書き込まない
+    """
+    repo = GraphRepository()
+    repo.register("default", create_mock_graph())
+    async for _ in repo.stream_execution(
+        "default", {"messages": [HumanMessage(content="hello")], "step": "idle"}, config={"thread_id": "keep"}
+    ):
+        pass
+    [record] = [record async for record in repo.export_threads("default")]
+    await repo.delete_thread("default", "keep")
+
+    async def replay():
+        yield record
+        yield {"thread_id": "broken", "type": "msgpack", "data": "not base64!"}
+
+    with pytest.raises(ValueError):
+        await repo.import_threads("default", replay())
+    assert await repo.list_threads("default") == []
@@ -0,0 +1,86 @@
+# tests/unit/test_chat_model.py
+# ---------------------------------------------------------
+# ユニットテスト（応答のトークンストリーミングとチャンクのまとめ送り）
+# ---------------------------------------------------------
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from config import GraphConfig
+from graph.builder import create_graph
+from graph.chat_model import CoalescingChatModel, StubChatModel, create_chat_model
+
+
+def _stub(**overrides) -> StubChatModel:
+    return create_chat_model(GraphConfig(response_delay=0.0, **overrides))
+
+
+@pytest.mark.asyncio
+async def test_stub_streams_tokens_and_coalesces():
+    """
+    スタブは1トークンずつ返し、ラッパーは chunk_tokens 個ずつ、または max_delay 秒ごとにまとめる
+    """
+    prompt = [SystemMessage(content="（ツールを使いました）\n"), HumanMessage(content="a b c d e")]
+
+    tokens = [chunk.content async for chunk in _stub().astream(prompt) if chunk.content]
+    assert tokens == ["（ツールを使いました）\n", "Echo: ", "a ", "b ", "c ", "d ", "e"]
+    assert (await _stub().ainvoke(prompt)).content == "".join(tokens)
+    # 同期呼び出しも同じ応答を返す（ラッパー経由でも同じ）
+    assert _stub().invoke(prompt).content == "".join(tokens)
+    assert _stub(response_chunk_tokens=3).invoke(prompt).content == "".join(tokens)
+
+    coalesced = _stub(response_chunk_tokens=3)
+    assert isinstance(coalesced, CoalescingChatModel)
+    chunks = [chunk.content async for chunk in coalesced.astream(prompt) if chunk.content]
+    assert chunks == ["（ツールを使いました）\nEcho: a ", "b c d ", "e"]
+
+    # 1トークン 0.05 秒、最大 0.01 秒しか溜めないので、まとめられずに1トークンずつ送られる
+    slow = _stub(response_chunk_tokens=10, response_chunk_max_delay=0.01, response_tokens_per_second=20)
+    chunks = [chunk.content async for chunk in slow.astream(prompt) if chunk.content]
+    assert chunks == tokens
+
+
+@pytest.mark.asyncio
+async def test_coalescing_closes_inner_stream_when_abandoned():
+    """
+    まとめ送りのストリームを途中で閉じると、内側のモデルのストリームも閉じる
+    """
+    closed = []
+
+    class TrackedStub(StubChatModel):
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            try:
+                async for chunk in super()._astream(messages, stop=stop, **kwargs):
+                    yield chunk
+            finally:
+                closed.append(True)
+
+    stub = _stub(response_tokens_per_second=100)
+    model = CoalescingChatModel(
+        inner=TrackedStub(latency=stub.latency, rate=stub.rate), chunk_tokens=2, max_delay=0.05
+    )
+    stream = model.astream([HumanMessage(content="a b c d e f g h")])
+    assert (await anext(stream)).content
+    await stream.aclose()
+
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_respond_streams_chunks_through_messages_mode():
+    """
+    応答ノードのトークンは messages ストリームに順に流れ、完成したメッセージは再送されない
+    """
+    graph = create_graph(GraphConfig(tool_processing_delay=0.0, response_delay=0.0), speculative=False)
+    streamed = []
+    async for mode, (message, metadata) in graph.astream(
+        {"messages": [HumanMessage(content="hello world")], "step": "idle"},
+        stream_mode=["messages"],
+        config={"configurable": {"thread_id": "chunks"}},
+    ):
+        if metadata["langgraph_node"] == "respond":
+            streamed.append(message)
+
+    assert all(message.type == "AIMessageChunk" for message in streamed)
+    assert len([message for message in streamed if message.content]) > 1
+    state = await graph.aget_state({"configurable": {"thread_id": "chunks"}})
+    assert "".join(message.content for message in streamed) == state.values["messages"][-1].content
@@ -0,0 +1,89 @@
+# tests/unit/test_compression.py
+# ---------------------------------------------------------
+# ユニットテスト（ストリーミング圧縮と Accept-Encoding のネゴシエーション）
+# ---------------------------------------------------------
+import asyncio
+import zlib
+
+import pytest
+
+from api.compression import StreamCompression, negotiate_encoding, parse_accept_encoding
+from config import CompressionConfig
+from utils.metrics import MetricsRegistry
+
+
+def _compression(**overrides) -> StreamCompression:
+    return StreamCompression(CompressionConfig(encodings="gzip", **overrides), metrics=MetricsRegistry())
+
+
+async def _events(*chunks, delay: float = 0.0):
+    for chunk in chunks:
+        if delay:
+            await asyncio.sleep(delay)
+        yield chunk
+
+
+def test_negotiate_encoding():
+    """
+    q 値が最大のものを選び、同じ q 値ならサーバー側の優先順に従う
+    """
+    assert parse_accept_encoding("gzip;q=0.5, br , *;q=0") == {"gzip": 0.5, "br": 1.0, "*": 0.0}
+    assert negotiate_encoding("gzip, deflate, br", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.2", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+    assert negotiate_encoding("identity, gzip;q=0.5", ["gzip"]) is None
+    assert negotiate_encoding(None, ["gzip"]) is None
+    assert _compression(enabled=False).negotiate("gzip") is None
+
+
+@pytest.mark.asyncio
+async def test_gzip_stream_is_decodable_per_flush():
+    """
+    min_size 以上のイベントは1つずつ圧縮・フラッシュされ、受信側がその場で展開できる
+    """
+    events = [f"data: {{\"ch\":\"messages\",\"data\":\"{i:03d}{'x' * 600}\"}}\n\n" for i in range(3)]
+    decoder = zlib.decompressobj(31)
+    decoded = []
+    async for chunk in _compression().encode_stream(_events(*events), "gzip"):
+        decoded.append(decoder.decompress(chunk).decode())
+    assert decoded[:3] == events
+    assert "".join(decoded) == "".join(events)
+    assert decoder.eof
+
+
+@pytest.mark.asyncio
+async def test_small_events_are_coalesced_until_min_size_or_max_delay():
+    """
+    小さいイベントは min_size バイトまで溜めてまとめて圧縮し、max_delay 秒を超えては溜めない
+    """
+    compression = _compression(min_size=64, max_delay=10.0)
+    chunks = [chunk async for chunk in compression.encode_stream(_events(*["data: tiny\n\n"] * 12), "gzip")]
+    # 12バイトのイベント6個（72バイト）ずつ2回にまとめ、最後に終端を送る
+    assert len(chunks) == 3
+    assert zlib.decompress(b"".join(chunks), 31) == b"data: tiny\n\n" * 12
+
+    compression = _compression(min_size=1024, max_delay=0.01)
+    slow = compression.encode_stream(_events("data: a\n\n", "data: b\n\n", delay=0.05), "gzip")
+    chunks = [chunk async for chunk in slow]
+    assert len(chunks) == 3
+    assert compression.metrics.snapshot()["counters"]["compression.gzip.bytes_in"] == 18
+
+
+@pytest.mark.asyncio
+async def test_identity_passes_through_and_source_runs_in_one_task():
+    """
+    圧縮しない場合はそのまま返し、圧縮する場合もソースは1つのタスクで読まれる
+    """
+    tasks = set()
+
+    async def source():
+        for chunk in ("data: a\n\n", b"data: b\n\n"):
+            tasks.add(asyncio.current_task())
+            yield chunk
+
+    assert [chunk async for chunk in _compression().encode_stream(source(), None)] == [b"data: a\n\n", b"data: b\n\n"]
+    tasks.clear()
+    compressed = b"".join([chunk async for chunk in _compression(min_size=1).encode_stream(source(), "gzip")])
+    assert zlib.decompress(compressed, 31) == b"data: a\n\ndata: b\n\n"
+    assert len(tasks) == 1
@@ -0,0 +1,30 @@
+# tests/unit/test_config.py
+# ---------------------------------------------------------
+# ユニットテスト（設定の .env 読み込み）
+# ---------------------------------------------------------
+from config import HealthConfig, RateLimitConfig, _read_env_file_cached, read_env_file
+
+
+def test_env_file_is_parsed_once_and_shared(tmp_path, monkeypatch):
+    """
+    .env は設定クラス間で1回だけパースし、env_prefix と大文字・小文字を区別しない変数名で読む
+    （優先順位: 初期化引数 > 環境変数 > .env）
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("HEALTH_WARMUP_RETRIES", raising=False)
+    monkeypatch.delenv("HEALTH_MAX_LOOP_LAG", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_ENABLED", raising=False)
+    (tmp_path / ".env").write_text(
+        "HEALTH_WARMUP_RETRIES=7\nhealth_max_loop_lag=0.9\nRATE_LIMIT_ENABLED=true\nOTHER=1\n", encoding="utf-8"
+    )
+
+    misses = _read_env_file_cached.cache_info().misses
+    health = HealthConfig()
+    assert (health.warmup_retries, health.max_loop_lag) == (7, 0.9)
+    assert RateLimitConfig().enabled is True
+    assert read_env_file()["other"] == "1"
+    assert _read_env_file_cached.cache_info().misses == misses + 1
+
+    monkeypatch.setenv("HEALTH_WARMUP_RETRIES", "9")
+    assert HealthConfig().warmup_retries == 9
+    assert HealthConfig(warmup_retries=2).warmup_retries == 2
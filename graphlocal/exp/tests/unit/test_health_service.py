@@ -0,0 +1,134 @@
+# tests/unit/test_health_service.py
+# ---------------------------------------------------------
+# ユニットテスト（ウォームアップ・レディネスの判定）
+# ---------------------------------------------------------
+import pytest
+
+from api.repositories.graph_repository import GraphRepository
+from api.services.health_service import HealthService, WarmupStatus
+from api.services.lane_scheduler import LaneScheduler
+from api.services.stream_tracker import StreamTracker
+from config import HealthConfig
+from tests.fixtures.mock_graph import create_mock_graph
+from utils.loop_lag import LoopLagMonitor
+from utils.metrics import MetricsRegistry
+
+
+class BrokenGraph:
+    """実行すると失敗するグラフ"""
+    checkpointer = None
+
+    async def astream(self, *args, **kwargs):
+        raise RuntimeError("not compiled")
+        yield
+
+
+def _service(repo: GraphRepository, **config) -> HealthService:
+    return HealthService(
+        repo,
+        StreamTracker(),
+        LaneScheduler(max_concurrency=1, weights={"interactive": 1}, metrics=MetricsRegistry()),
+        LoopLagMonitor(interval=0.01, metrics=MetricsRegistry()),
+        HealthConfig(**config),
+    )
+
+
+@pytest.mark.asyncio
+async def test_not_ready_until_every_graph_is_warm():
+    """
+    ウォームアップが終わるまでは ready にせず、失敗したグラフがあれば ready にしない
+    """
+    repo = GraphRepository()
+    repo.register("default", create_mock_graph())
+    repo.register("broken", BrokenGraph())
+    service = _service(repo, warmup_retries=0)
+
+    await service.start()
+    assert service.readiness()["graphs"]["default"]["status"] == WarmupStatus.PENDING
+    await service._warmup_task
+    report = service.readiness()
+    await service.stop()
+
+    assert report["graphs"]["default"]["status"] == WarmupStatus.WARM
+    assert report["graphs"]["broken"] == {
+        "status": WarmupStatus.FAILED, "seconds": report["graphs"]["broken"]["seconds"], "error": "not compiled"
+    }
+    assert report["ready"] is False
+    assert report["reasons"] == ["graph 'broken' is failed"]
+    # ステートレス実行なのでスレッドは残らない
+    assert await repo.list_threads("default") == []
+
+
+class FlakyGraph:
+    """最初の実行だけ失敗するグラフ"""
+    checkpointer = None
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.calls = 0
+
+    async def astream(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("cold dependency")
+        async for event in self.graph.astream(*args, **kwargs):
+            yield event
+
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_retried():
+    """
+    失敗したグラフは待ってからやり直し、成功すれば ready になる（やり直しの回数を超えたら失敗のまま）
+    """
+    repo = GraphRepository()
+    flaky = FlakyGraph(create_mock_graph().copy(update={"checkpointer": None}))
+    repo.register("flaky", flaky)
+    repo.register("broken", BrokenGraph())
+    service = _service(repo, warmup_retries=2, warmup_backoff=0.01)
+
+    warmups = await service.warm_up()
+    assert warmups["flaky"].status == WarmupStatus.WARM
+    assert warmups["flaky"].to_dict()["attempts"] == 2
+    assert flaky.calls == 2
+    assert warmups["broken"].status == WarmupStatus.FAILED
+    assert warmups["broken"].attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_saturation_reuses_checkpointer_stats():
+    """
+    チェックポインターの大きさは HEALTH_SATURATION_CACHE_SECONDS の間は計算し直さない
+    """
+    repo = GraphRepository()
+    repo.register("default", create_mock_graph())
+    calls = []
+    memory_stats = repo.memory_stats
+    repo.memory_stats = lambda top: calls.append(top) or memory_stats(top=top)
+
+    service = _service(repo, warmup=False, saturation_cache_seconds=60)
+    first = service.saturation()["checkpointer"]
+    assert service.saturation()["checkpointer"] == first
+    assert calls == [0]
+
+    service.config.saturation_cache_seconds = 0
+    service.saturation()
+    assert calls == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_not_ready_when_saturated():
+    """
+    実行中のストリーム数・イベントループの遅延が上限を超えている間は ready にしない
+    """
+    repo = GraphRepository()
+    repo.register("default", create_mock_graph())
+    service = _service(repo, warmup=False, max_in_flight=1, max_loop_lag=0.1)
+    await service.start()
+    assert service.readiness()["ready"] is True
+
+    with service.tracker.track():
+        assert service.readiness()["reasons"] == ["in-flight streams 1 >= 1"]
+    service.loop_monitor.record(0.5)
+    assert service.readiness()["reasons"] == ["event loop lag 0.500s > 0.1s"]
+    await service.stop()
+
@@ -0,0 +1,140 @@
+# tests/unit/test_job_service.py
+# ---------------------------------------------------------
+# ユニットテスト（バックグラウンドジョブの実行・再取得・永続化）
+# ---------------------------------------------------------
+import asyncio
+import json
+
+import pytest
+
+from api.models import ChatRequest
+from api.repositories.graph_repository import GraphRepository
+from api.repositories.job_repository import JobRepository
+from api.services.chat_service import ChatService
+from api.services.job_service import JobQueueFull, JobService, JobStatus
+from config import JobConfig
+from tests.fixtures.mock_graph import create_mock_graph
+from utils.metrics import MetricsRegistry
+
+
+def _service(directory=None, **overrides) -> JobService:
+    repo = GraphRepository()
+    repo.register("default", create_mock_graph())
+    return JobService(
+        ChatService(repo),
+        JobRepository(directory),
+        JobConfig(**overrides),
+        metrics=MetricsRegistry(),
+    )
+
+
+async def _wait_finished(service: JobService, job_id: str) -> dict:
+    async for _ in service.events(job_id):
+        pass
+    return service.describe(job_id)
+
+
+@pytest.mark.asyncio
+async def test_job_runs_in_background_and_events_resume(tmp_path):
+    """
+    submit はすぐに返り、イベントは番号付きで記録され、途中の番号から取り直せる
+    """
+    service = _service(tmp_path)
+    job = await service.submit(ChatRequest(input="tool: search test"))
+    assert job["status"] == JobStatus.QUEUED
+    assert job["thread_id"]
+
+    finished = await _wait_finished(service, job["id"])
+    assert finished["status"] == JobStatus.SUCCEEDED
+    assert finished["result"]["message"]["type"] == "AIMessage"
+    assert finished["events"] > 2
+
+    events = [event async for event in service.events(job["id"], after=0)]
+    assert [index for index, _ in events] == list(range(1, finished["events"]))
+    first = [event async for event in service.events(job["id"])][0][1]
+    assert json.loads(first)["ch"] == "session"
+
+    # レコードとイベントはディレクトリに残り、別のサービスから読み戻せる
+    restored = _service(tmp_path)
+    await restored.start()
+    assert restored.describe(job["id"])["status"] == JobStatus.SUCCEEDED
+    assert restored.describe(job["id"])["events"] == finished["events"]
+    await restored.stop()
+    await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_queue_limit_cancel_and_interrupted_jobs(tmp_path):
+    """
+    待ち行列が上限なら JobQueueFull、待機中のジョブは中断でき、再起動時に実行中だったジョブは失敗になる
+    """
+    service = _service(tmp_path, max_workers=1, max_queued=1)
+    # ワーカーが取り出す前に待ち行列を埋める
+    first = await service.submit(ChatRequest(input="a"))
+    with pytest.raises(JobQueueFull):
+        await service.submit(ChatRequest(input="b"))
+
+    cancelled = await service.cancel(first["id"])
+    assert cancelled["status"] == JobStatus.CANCELLED
+    await asyncio.sleep(0.05)
+    assert service.describe(first["id"])["events"] == 0
+    assert service.delete(first["id"])
+
+    # 実行中のまま停止したジョブ
+    second = await service.submit(ChatRequest(input="c"))
+    record = service.repository.get(second["id"])
+    await service.stop()
+    record["status"] = JobStatus.RUNNING
+    service.repository.save(record)
+
+    restored = _service(tmp_path)
+    await restored.start()
+    job = restored.describe(second["id"])
+    assert job["status"] == JobStatus.FAILED
+    assert job["error"]
+    await restored.stop()
+
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_fail_the_job(tmp_path):
+    """
+    イベントの記録や結果の取得で例外が起きた場合は、実行中のまま残さず失敗として記録する
+    """
+    service = _service(tmp_path)
+
+    def broken_append(job_id, event):
+        raise OSError("disk full")
+
+    service.repository.append_event = broken_append
+    finished = await _wait_finished(service, (await service.submit(ChatRequest(input="a")))["id"])
+    assert finished["status"] == JobStatus.FAILED
+    assert finished["error"] == "disk full"
+    await service.stop()
+
+    service = _service(tmp_path)
+
+    async def broken_result(record):
+        raise RuntimeError("no state")
+
+    service._result = broken_result
+    finished = await _wait_finished(service, (await service.submit(ChatRequest(input="b")))["id"])
+    assert finished["status"] == JobStatus.FAILED
+    assert finished["error"] == "no state"
+    # 失敗するまでのイベントはファイルに書き出されている
+    lines = (tmp_path / f"{finished['id']}.ndjson").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == finished["events"] > 0
+    await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_jobs_always_write_checkpoints():
+    """
+    stateless を指定したリクエストでも、ジョブはスレッドに結果を残す
+    """
+    service = _service()
+    job = await service.submit(ChatRequest(input="hello", stateless=True))
+    assert job["request"].get("stateless") is False
+    finished = await _wait_finished(service, job["id"])
+    assert finished["status"] == JobStatus.SUCCEEDED
+    assert finished["result"]["message"]["type"] == "AIMessage"
+    await service.stop()
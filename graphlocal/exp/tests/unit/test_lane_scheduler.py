@@ -0,0 +1,77 @@
+# tests/unit/test_lane_scheduler.py
+# ---------------------------------------------------------
+# ユニットテスト（優先レーンの重み付き公平キューイング）
+# ---------------------------------------------------------
+import asyncio
+
+import pytest
+
+from api.services.lane_scheduler import Lane, LaneScheduler
+from utils.metrics import MetricsRegistry
+
+
+@pytest.mark.asyncio
+async def test_slots_are_shared_by_weight():
+    """
+    両レーンが詰まっているときは重みの比でスロットが割り当てられる
+    """
+    scheduler = LaneScheduler(
+        max_concurrency=1,
+        weights={Lane.INTERACTIVE: 3, Lane.BULK: 1},
+        metrics=MetricsRegistry(),
+    )
+    order = []
+    gate = asyncio.Event()
+
+    async def worker(lane):
+        async with scheduler.slot(lane):
+            order.append(lane)
+            await gate.wait()
+
+    # 先に bulk がスロットを占有し、残りは待ち行列に入る
+    blocker = asyncio.create_task(worker(Lane.BULK))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(worker(Lane.BULK)) for _ in range(4)]
+    tasks += [asyncio.create_task(worker(Lane.INTERACTIVE)) for _ in range(6)]
+    await asyncio.sleep(0)
+    assert scheduler.queued(Lane.BULK) == 4
+    assert scheduler.queued(Lane.INTERACTIVE) == 6
+
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+
+    # 両レーンが待っている間は interactive:bulk = 3:1 で割り当てられる
+    contended = order[1:9]
+    assert contended.count(Lane.INTERACTIVE) == 6
+    assert contended.count(Lane.BULK) == 2
+    assert order[9:] == [Lane.BULK] * 2
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue_and_metrics_are_recorded():
+    """
+    待機中にキャンセルされたリクエストは待ち行列から外れ、レーン別のメトリクスが記録される
+    """
+    metrics = MetricsRegistry()
+    scheduler = LaneScheduler(max_concurrency=1, weights={Lane.INTERACTIVE: 8, Lane.BULK: 1}, metrics=metrics)
+
+    await scheduler.acquire(Lane.INTERACTIVE)
+    waiter = asyncio.create_task(scheduler.acquire(Lane.BULK))
+    await asyncio.sleep(0)
+    assert scheduler.queued(Lane.BULK) == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.queued(Lane.BULK) == 0
+    scheduler.release()
+
+    async with scheduler.slot(Lane.BULK):
+        pass
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["scheduler.bulk.completed"] == 1
+    assert snapshot["histograms"]["scheduler.bulk.latency_seconds"]["count"] == 1
+    assert snapshot["gauges"]["scheduler.active"] == 0
+
+    with pytest.raises(ValueError):
+        await scheduler.acquire("realtime")
@@ -0,0 +1,81 @@
+# tests/unit/test_latency.py
+# ---------------------------------------------------------
+# ユニットテスト（スタブノードの擬似レイテンシモデル）
+# ---------------------------------------------------------
+import json
+import random
+import statistics
+
+import pytest
+
+from config import GraphConfig
+from graph.latency import (
+    FixedLatency,
+    HistogramLatency,
+    InjectedError,
+    LatencyModel,
+    LogNormalLatency,
+    TokenRate,
+    parse_latency_model,
+    split_tokens,
+    tool_latency,
+)
+
+
+def test_parse_latency_specs(tmp_path):
+    """
+    仕様文字列から各レイテンシモデルを作成できる
+    """
+    assert parse_latency_model("0.3").sample() == 0.3
+    assert parse_latency_model("fixed:0.1").sample() == 0.1
+
+    model = parse_latency_model("lognormal:median=0.2,sigma=0.8,max=1.5", random.Random(1))
+    assert isinstance(model, LogNormalLatency)
+    samples = [model.sample() for _ in range(2000)]
+    assert statistics.median(samples) == pytest.approx(0.2, rel=0.15)
+    assert max(samples) <= 1.5
+
+    trace = tmp_path / "tool.json"
+    trace.write_text(json.dumps({"buckets": [[0.1, 90], [0.5, 0], [2.0, 10]]}))
+    model = parse_latency_model(f"histogram:{trace}", random.Random(1))
+    samples = [model.sample() for _ in range(2000)]
+    slow = [value for value in samples if value > 0.5]
+    assert all(0 <= value <= 2.0 for value in samples)
+    assert not [value for value in samples if 0.1 < value <= 0.5]
+    assert len(slow) / len(samples) == pytest.approx(0.1, abs=0.03)
+
+    lines = tmp_path / "respond.txt"
+    lines.write_text("0.25\n0.5\n")
+    assert HistogramLatency.from_file(str(lines)).sample() in (0.25, 0.5)
+
+    with pytest.raises(ValueError):
+        parse_latency_model("gamma:k=2")
+    # sample を実装していないモデルは作成できない
+    with pytest.raises(TypeError):
+        LatencyModel()
+
+
+@pytest.mark.asyncio
+async def test_error_injection_and_token_rate():
+    """
+    エラー注入は設定した確率で発生し、シードで再現できる
+    """
+    config = GraphConfig(tool_processing_delay=0.0, tool_error_rate=0.3, latency_seed=7)
+
+    async def failures(latency):
+        count = 0
+        for _ in range(500):
+            try:
+                await latency("tool")
+            except InjectedError:
+                count += 1
+        return count
+
+    first = await failures(tool_latency(config))
+    assert first / 500 == pytest.approx(0.3, abs=0.06)
+    assert await failures(tool_latency(config)) == first
+    assert isinstance(tool_latency(GraphConfig()).model, FixedLatency)
+
+    assert split_tokens("Echo: hello world") == ["Echo: ", "hello ", "world"]
+    assert TokenRate(20).delay(10) == 0.5
+    assert TokenRate(None).delay(10) == 0.0
@@ -0,0 +1,73 @@
+# tests/unit/test_loop_lag.py
+# ---------------------------------------------------------
+# ユニットテスト（イベントループの遅延と、ループをブロックしたコールバックの検出）
+# ---------------------------------------------------------
+import asyncio
+import time
+
+import pytest
+
+from utils.loop_lag import LoopLagMonitor, SlowCallbackDetector
+from utils.metrics import MetricsRegistry
+
+
+async def blocking_node(seconds: float) -> None:
+    """ループをブロックするノード（同期の sleep）"""
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_measures_blocking_call():
+    """
+    ループをブロックした時間だけ遅延として計測する
+    """
+    monitor = LoopLagMonitor(interval=0.01, metrics=MetricsRegistry())
+    monitor.start()
+    await asyncio.sleep(0.03)
+    time.sleep(0.2)
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+    assert 0.15 < monitor.max_lag < 0.5
+    assert not monitor.running
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("debug", [False, True])
+async def test_slow_callback_detector_names_blocking_coroutine(caplog, debug):
+    """
+    ループをブロックしたコルーチンと実行位置・秒数を記録し、debug の場合はスタックのサンプルも残す
+    """
+    metrics = MetricsRegistry()
+    detector = SlowCallbackDetector(threshold=0.05, debug=debug, metrics=metrics)
+    detector.start()
+    await asyncio.sleep(0.05)
+    await blocking_node(0.3)
+    await asyncio.sleep(0.15)
+    detector.stop()
+
+    slow = detector.recent()
+    assert len(slow) == 1
+    assert slow[0].coroutine == f"{__name__}:blocking_node"
+    assert slow[0].location.startswith("tests/unit/test_loop_lag.py:")
+    assert 0.2 < slow[0].duration < 0.6
+    assert metrics.snapshot()["counters"]["loop.slow_callbacks"] == 1
+    assert "blocking_node" in caplog.text
+    if debug:
+        assert "time.sleep(seconds)" in slow[0].stack
+        assert all(stack.endswith(":blocking_node") for stack in slow[0].samples)
+    else:
+        assert slow[0].stack is None and not slow[0].samples
+
+
+@pytest.mark.asyncio
+async def test_slow_callback_detector_ignores_short_callbacks():
+    """
+    閾値より短いブロックは記録しない
+    """
+    detector = SlowCallbackDetector(threshold=0.2, metrics=MetricsRegistry())
+    detector.start()
+    for _ in range(3):
+        await blocking_node(0.02)
+        await asyncio.sleep(0.02)
+    detector.stop()
+    assert detector.recent() == []
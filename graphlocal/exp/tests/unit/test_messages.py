@@ -0,0 +1,68 @@
+# tests/unit/test_messages.py
+# ---------------------------------------------------------
+# ユニットテスト（コンパクトなメッセージ表現）
+# ---------------------------------------------------------
+import json
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+
+from graph.builder import create_checkpointer
+from graph.messages import CompactMessage, ToolResult, compact_messages, compact_tool_results
+from utils.serializers import to_jsonable
+
+
+TOOL_RESULT = {
+    "id": "tool-1",
+    "name": "fake_search",
+    "input": {"q": "テスト"},
+    "output": {"top": "Top result for 'テスト'", "items": ["A", "B"]},
+}
+
+
+def test_compact_messages_is_lossless_at_api_boundary():
+    """
+    コンパクト化したメッセージは to_jsonable でLangChainのメッセージと同じ形式に戻る
+    """
+    original = [
+        HumanMessage(content="こんにちは"),
+        ToolMessage(tool_call_id="tool-1", content=json.dumps(TOOL_RESULT, ensure_ascii=False)),
+        AIMessage(content="Echo: こんにちは"),
+    ]
+
+    compact = compact_messages([], original)
+
+    assert [m.type for m in compact] == ["human", "tool", "ai"]
+    assert isinstance(compact[1].content, ToolResult)
+    assert to_jsonable(compact) == to_jsonable(original)
+
+
+def test_compact_messages_keeps_non_json_tool_content():
+    """
+    ツール結果の形式でない content は文字列のまま保持する
+    """
+    compact = compact_messages([], [ToolMessage(tool_call_id="x", content="{not json")])
+    assert compact[0].content == "{not json"
+
+
+def test_compact_messages_normalizes_chunks():
+    """
+    チャンク型は通常のメッセージタイプに正規化される
+    """
+    compact = compact_messages([], [AIMessageChunk(content="Echo")])
+    assert compact == [CompactMessage(type="ai", content="Echo")]
+
+
+def test_compact_state_roundtrips_through_checkpointer():
+    """
+    コンパクトな状態はチェックポインターのシリアライザで往復できる
+    """
+    serde = create_checkpointer().serde
+    state = {
+        "messages": compact_messages([], [HumanMessage(content="tool: テスト")]),
+        "tool_results": compact_tool_results([], [TOOL_RESULT]),
+    }
+
+    restored = serde.loads_typed(serde.dumps_typed(state))
+
+    assert restored == state
+    assert to_jsonable(restored["tool_results"]) == [TOOL_RESULT]
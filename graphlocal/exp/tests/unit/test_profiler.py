@@ -0,0 +1,146 @@
+# tests/unit/test_profiler.py
+# ---------------------------------------------------------
+# ユニットテスト（サンプリングCPUプロファイラー）
+# ---------------------------------------------------------
+import asyncio
+import functools
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.graph import END, START, StateGraph
+
+from api.repositories.graph_repository import GraphRepository
+from api.services.profiler_service import ProfilerService
+from config import ProfilerConfig
+from graph.state import GraphState
+from utils.profiler import Profile, SamplingProfiler
+
+
+def _spin() -> int:
+    return sum(range(1000))
+
+
+def traced(func):
+    """ノード関数を包むデコレーター"""
+    @functools.wraps(func)
+    async def wrapper(state):
+        return await func(state)
+    return wrapper
+
+
+@traced
+async def busy_node(state: GraphState):
+    """ループをブロックして CPU を使うノード"""
+    deadline = time.perf_counter() + 0.3
+    while time.perf_counter() < deadline:
+        _spin()
+    return {"step": "idle"}
+
+
+def _repository() -> GraphRepository:
+    builder = StateGraph(GraphState)
+    builder.add_node("busy", busy_node)
+    builder.add_edge(START, "busy")
+    builder.add_edge("busy", END)
+    repo = GraphRepository()
+    repo.register("default", builder.compile())
+    return repo
+
+
+async def _profile_while_running(service: ProfilerService, scope: str) -> Profile:
+    repo = service.graph_repo
+
+    async def run():
+        state = {"messages": [HumanMessage(content="x")], "step": "idle"}
+        async for _ in repo.stream_execution("default", state, stateless=True):
+            pass
+
+    profile, _ = await asyncio.gather(service.profile(0.2, scope), run())
+    return profile
+
+
+@pytest.mark.asyncio
+async def test_graph_scope_keeps_only_node_stacks():
+    """
+    scope=graph の場合はノード関数を起点とするスタックだけを記録し、all の場合はすべてを記録する
+    """
+    service = ProfilerService(_repository(), ProfilerConfig(interval=0.005))
+
+    profile = await _profile_while_running(service, "graph")
+    assert profile.total > 0
+    assert profile.ticks >= profile.total
+    assert all(stack.startswith(f"{__name__}:traced.<locals>.wrapper;") for stack in profile.samples)
+    assert any(stack.endswith(f"{__name__}:_spin") for stack in profile.samples)
+    assert not service.running
+
+    profile = await _profile_while_running(service, "all")
+    busy = [stack for stack in profile.samples if f"{__name__}:busy_node" in stack]
+    assert busy
+    assert not any(stack.startswith(f"{__name__}:") for stack in busy)
+
+
+@pytest.mark.asyncio
+async def test_one_profile_at_a_time():
+    """
+    プロファイル中に別のプロファイルは始められない
+    """
+    service = ProfilerService(_repository(), ProfilerConfig(interval=0.005, max_seconds=0.1))
+    task = asyncio.ensure_future(service.profile(10))
+    await asyncio.sleep(0)
+    with pytest.raises(RuntimeError):
+        await service.profile(0.1)
+    profile = await asyncio.wait_for(task, 1)
+    assert profile.seconds < 1
+
+
+def test_idle_threads_are_dropped():
+    """
+    待機中のスレッドのスタックは idle=True の場合のみ記録し、collapsed 形式は「スタック サンプル数」の行になる
+    """
+    stop = threading.Event()
+    waiter = threading.Thread(target=stop.wait)
+    waiter.start()
+    try:
+        frames = {waiter.ident: sys._current_frames()[waiter.ident]}
+        for idle in (False, True):
+            profile = Profile(started_at=time.time(), seconds=0.0, interval=0.01)
+            SamplingProfiler(idle=idle).sample(frames, profile)
+            assert (profile.total, profile.dropped) == ((1, 0) if idle else (0, 1))
+        assert profile.to_collapsed().startswith("threading:Thread._bootstrap;")
+        assert profile.to_collapsed().endswith("threading:Condition.wait 1\n")
+    finally:
+        stop.set()
+        waiter.join()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="SIGUSR1 is not available")
+async def test_signal_writes_collapsed_file(tmp_path):
+    """
+    シグナルでプロファイルを始め、終わったら collapsed 形式のファイルに書き出す
+    """
+    config = ProfilerConfig(interval=0.005, signal_seconds=0.1, signal_scope="all", directory=str(tmp_path))
+    service = ProfilerService(_repository(), config)
+    previous = signal.getsignal(signal.SIGUSR1)
+    await service.start()
+    try:
+        os.kill(os.getpid(), signal.SIGUSR1)
+        await asyncio.sleep(0.05)
+        assert service.running
+        assert service.begin_signal_profile() is None
+        await busy_node({})
+        await asyncio.sleep(0.1)
+    finally:
+        await service.stop()
+    assert signal.getsignal(signal.SIGUSR1) == previous
+
+    [path] = tmp_path.iterdir()
+    assert path.name.startswith(f"profile-{os.getpid()}-") and path.suffix == ".collapsed"
+    lines = path.read_text().splitlines()
+    assert any(f"{__name__}:busy_node" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
@@ -0,0 +1,114 @@
+# tests/unit/test_rate_limiter.py
+# ---------------------------------------------------------
+# ユニットテスト（トークンバケットによるレート制限）
+# ---------------------------------------------------------
+import pytest
+
+from api.services.rate_limiter import InMemoryBackend, RateLimiter, client_identity
+from config import RateLimitConfig
+from utils.metrics import MetricsRegistry
+
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(clock: FakeClock, **overrides) -> RateLimiter:
+    config = RateLimitConfig(**{"enabled": True, **overrides})
+    return RateLimiter(config, backend=InMemoryBackend(clock=clock), metrics=MetricsRegistry())
+
+
+@pytest.mark.asyncio
+async def test_client_bucket_refills_over_time():
+    """
+    burst 回まで続けて受け付け、その後は rate に応じて補充された分だけ受け付ける
+    """
+    clock = FakeClock()
+    limiter = _limiter(clock, client_rate=2.0, client_burst=3)
+
+    decisions = [await limiter.check("ip:1.2.3.4") for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].headers()["Retry-After"] == "1"
+    assert decisions[3].retry_after == pytest.approx(0.5)
+    assert limiter.metrics.snapshot()["counters"]["rate_limit.client.rejected"] == 1
+
+    # 別のクライアントは影響を受けない
+    assert (await limiter.check("ip:5.6.7.8")).allowed
+
+    clock.now = 0.5
+    assert (await limiter.check("ip:1.2.3.4")).allowed
+    assert not (await limiter.check("ip:1.2.3.4")).allowed
+
+
+@pytest.mark.asyncio
+async def test_thread_bucket_and_most_restrictive_decision():
+    """
+    スレッドのバケットはクライアントとは別に制限し、残りが少ない方の判定を返す
+    """
+    clock = FakeClock()
+    limiter = _limiter(clock, client_burst=10, thread_rate=1.0, thread_burst=2)
+
+    first = await limiter.check("key:a", thread_id="t1")
+    assert first.scope == "thread" and first.remaining == 1
+    assert (await limiter.check("key:a", thread_id="t1")).allowed
+    rejected = await limiter.check("key:a", thread_id="t1")
+    assert not rejected.allowed and rejected.scope == "thread"
+    # 同じスレッドIDでもグラフが違えば別のバケット
+    assert (await limiter.check("key:a", thread_id="t1", graph_name="other")).allowed
+
+    assert await _limiter(clock, enabled=False).check("key:a") is None
+    assert RateLimitConfig().enabled is False
+
+
+@pytest.mark.asyncio
+async def test_rejected_thread_does_not_spend_client_tokens():
+    """
+    スレッドの上限で拒否されたリクエストはクライアントのバケットを減らさない
+    """
+    clock = FakeClock()
+    limiter = _limiter(clock, client_rate=0.01, client_burst=3, thread_rate=0.01, thread_burst=1)
+
+    assert (await limiter.check("key:a", thread_id="t1")).allowed
+    for _ in range(5):
+        rejected = await limiter.check("key:a", thread_id="t1")
+        assert not rejected.allowed and rejected.scope == "thread"
+    # クライアントのバケットには t1 の1回分しか使っていない
+    assert [(await limiter.check("key:a")).allowed for _ in range(3)] == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_evicts_least_recently_used():
+    """
+    キーが max_keys を超えたら最も長く使われていないバケットを捨てる
+    """
+    backend = InMemoryBackend(max_keys=2, clock=FakeClock())
+    await backend.take([("a", 1.0, 1)])
+    await backend.take([("b", 1.0, 1)])
+    await backend.take([("a", 1.0, 1)])
+    await backend.take([("c", 1.0, 1)])
+    assert len(backend) == 2
+    # b は捨てられたので満杯のバケットから取り出せる
+    [(allowed, _, _)] = await backend.take([("b", 1.0, 1)])
+    assert allowed
+
+
+def test_client_identity_behind_trusted_proxy():
+    """
+    信頼するプロキシからの接続のみ X-Forwarded-For を右からたどり、最初の信頼しないアドレスを使う
+    """
+    assert client_identity("secret", "1.2.3.4") == "key:secret"
+    assert client_identity(None, "1.2.3.4") == "ip:1.2.3.4"
+
+    proxies = {"10.0.0.1", "10.0.0.2"}
+    # クライアントが付けた偽の値（左端）は使わない
+    assert client_identity(None, "10.0.0.1", "6.6.6.6, 1.2.3.4, 10.0.0.2", proxies) == "ip:1.2.3.4"
+    # 信頼しない接続元のヘッダーは無視する
+    assert client_identity(None, "5.5.5.5", "1.2.3.4", proxies) == "ip:5.5.5.5"
+    assert client_identity(None, "10.0.0.1", None, proxies) == "ip:10.0.0.1"
@@ -0,0 +1,105 @@
+# tests/unit/test_recording.py
+# ---------------------------------------------------------
+# ユニットテスト（グラフ実行の記録と再生）
+# ---------------------------------------------------------
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from config import GraphConfig
+from graph.builder import create_graph
+from graph.recording import RecordedEvent, Recording, ReplayGraph, record
+from utils.serializers import to_jsonable
+
+
+def _state(text: str) -> dict:
+    return {"messages": [HumanMessage(content=text)], "step": "idle"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("suffix", [".ndjson", ".ndjson.gz"])
+async def test_record_save_load_roundtrip(tmp_path, suffix):
+    """
+    実際のグラフの実行を記録し、ファイルに書き出して読み戻しても同じイベント列になる
+    """
+    graph = create_graph(GraphConfig(tool_processing_delay=0.0, response_delay=0.0))
+    recording = await record(graph, "tool: weather")
+    assert {event.mode for event in recording.events} >= {"updates", "messages"}
+    assert [event.offset for event in recording.events] == sorted(event.offset for event in recording.events)
+    # 別のプロセスで再生できるよう、ツールの出力は共有ストアの参照ではなく記録に残す
+    tool_results = [
+        result
+        for event in recording.events if event.mode == "updates"
+        for update in event.data.values()
+        for result in (update or {}).get("tool_results", [])
+    ]
+    assert tool_results and all(result.ref is None for result in tool_results)
+
+    loaded = Recording.load(recording.save(tmp_path / f"run{suffix}"))
+    assert loaded.input == "tool: weather"
+    assert [(e.offset, e.namespace, e.mode) for e in loaded.events] == [
+        (round(e.offset, 6), e.namespace, e.mode) for e in recording.events
+    ]
+    assert [to_jsonable(e.data) for e in loaded.events] == [to_jsonable(e.data) for e in recording.events]
+    # messages のデータは (チャンク, メタデータ) のタプルに戻る
+    assert all(isinstance(e.data, tuple) for e in loaded.events if e.mode == "messages")
+
+
+def test_load_rejects_unknown_version(tmp_path):
+    """
+    形式のバージョンが異なるファイルは読み込まない
+    """
+    path = tmp_path / "bad.ndjson"
+    path.write_text('{"version": 99, "input": "x"}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        Recording.load(path)
+
+
+@pytest.mark.asyncio
+async def test_replay_stream_shapes():
+    """
+    stream_mode・subgraphs の指定に応じて astream と同じ形で返す
+    """
+    graph = ReplayGraph([Recording(input="hi", events=[
+        RecordedEvent(0.0, (), "updates", {"planner": {"step": "responding"}}),
+        RecordedEvent(0.0, ("tool:1",), "custom", {"chunk": "x"}),
+        RecordedEvent(0.0, (), "messages", ("chunk", {"langgraph_node": "respond"})),
+    ])], speed=0)
+
+    events = [e async for e in graph.astream(_state("hi"), stream_mode=["updates", "custom"], subgraphs=True)]
+    assert events == [((), "updates", {"planner": {"step": "responding"}}), (("tool:1",), "custom", {"chunk": "x"})]
+
+    events = [e async for e in graph.astream(_state("hi"), stream_mode=["updates", "custom"])]
+    assert events == [("updates", {"planner": {"step": "responding"}})]
+
+    events = [e async for e in graph.astream(_state("hi"), stream_mode="messages")]
+    assert events == [("chunk", {"langgraph_node": "respond"})]
+
+
+@pytest.mark.asyncio
+async def test_replay_speed_and_selection():
+    """
+    記録したタイミングを speed 倍で再生し、入力が一致する記録を選ぶ
+    """
+    slow = Recording(input="slow", events=[
+        RecordedEvent(0.0, (), "updates", {"a": {}}),
+        RecordedEvent(0.2, (), "updates", {"b": {}}),
+    ])
+    fast = Recording(input="fast", events=[RecordedEvent(0.0, (), "updates", {"c": {}})])
+    graph = ReplayGraph([slow, fast], speed=2.0)
+
+    started = time.perf_counter()
+    events = [e async for e in graph.astream(_state("slow"), stream_mode="updates")]
+    elapsed = time.perf_counter() - started
+    assert events == [{"a": {}}, {"b": {}}]
+    assert 0.09 <= elapsed < 0.2
+
+    graph.speed = 0
+    started = time.perf_counter()
+    assert [e async for e in graph.astream(_state("slow"), stream_mode="updates")] == [{"a": {}}, {"b": {}}]
+    assert time.perf_counter() - started < 0.05
+
+    # 一致する記録がない場合は順番に使う
+    assert [e async for e in graph.astream(_state("other"), stream_mode="updates")] == [{"a": {}}, {"b": {}}]
+    assert [e async for e in graph.astream(_state("other"), stream_mode="updates")] == [{"c": {}}]
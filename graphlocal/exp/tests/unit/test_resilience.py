@@ -0,0 +1,128 @@
+# tests/unit/test_resilience.py
+# ---------------------------------------------------------
+# ユニットテスト（タイムアウト・デッドライン・サーキットブレーカー）
+# ---------------------------------------------------------
+import asyncio
+import json
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from config import GraphConfig
+from graph.nodes import create_call_tool, create_respond
+from graph.resilience import (
+    DEADLINE_KEY,
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    DeadlineExceeded,
+    make_deadline,
+    run_with_timeout,
+)
+
+
+async def _fail():
+    raise RuntimeError("boom")
+
+
+async def _ok():
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_run_with_timeout_uses_earliest_budget():
+    """
+    ノードのタイムアウトよりデッドラインが近い場合はデッドラインで打ち切られる
+    """
+    deadline = make_deadline(0.05)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        await run_with_timeout(asyncio.sleep(1), node_timeout=10, deadline=deadline)
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers():
+    """
+    失敗率が閾値を超えるとOPENになり、reset_timeout後の試行成功でCLOSEDに戻る
+    """
+    breaker = CircuitBreaker("test", failure_threshold=0.5, window_size=4, min_calls=2, reset_timeout=0.05)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await breaker.call(_fail())
+    assert breaker.state == CircuitState.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok())
+
+    await asyncio.sleep(0.06)
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert await breaker.call(_ok()) == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_counts_slow_calls_as_failures():
+    """
+    latency_threshold を超えた呼び出しは失敗として数えられる
+    """
+    breaker = CircuitBreaker("slow", latency_threshold=0.0, window_size=2, min_calls=2)
+    await breaker.call(asyncio.sleep(0.01))
+    await breaker.call(asyncio.sleep(0.01))
+    assert breaker.state == CircuitState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_call_tool_returns_degraded_result_on_timeout():
+    """
+    ツールがタイムアウトした場合は縮退結果を返して応答へ進む
+    """
+    cfg = GraphConfig(tool_processing_delay=1.0, tool_timeout=0.01)
+    call_tool = create_call_tool(cfg)
+    state = {"messages": [HumanMessage(content="tool: slow")]}
+
+    result = await call_tool(state, {"configurable": {}})
+
+    tool_result = result["tool_results"][0]
+    assert tool_result.degraded is True
+    assert tool_result.output["items"] == []
+    assert json.loads(result["messages"][0].content)["degraded"] is True
+
+
+@pytest.mark.asyncio
+async def test_call_tool_returns_degraded_result_on_tool_error(monkeypatch):
+    """
+    ツールが想定外のエラーを送出した場合も縮退結果とツールメッセージを返して応答へ進む
+    """
+    from graph import nodes
+
+    async def broken_search(query, latency):
+        raise ValueError("broken index")
+
+    monkeypatch.setattr(nodes, "fake_search", broken_search)
+    call_tool = create_call_tool(GraphConfig())
+    state = {"messages": [HumanMessage(content="tool: broken")]}
+
+    result = await call_tool(state, {"configurable": {}})
+
+    tool_result = result["tool_results"][0]
+    assert tool_result.degraded is True
+    assert tool_result.error == "broken index"
+    assert json.loads(result["messages"][0].content)["degraded"] is True
+    assert result["step"] == "responding"
+
+
+@pytest.mark.asyncio
+async def test_respond_honors_request_deadline():
+    """
+    リクエストのデッドラインが応答ノードに伝播する
+    """
+    cfg = GraphConfig(response_delay=1.0)
+    respond = create_respond(cfg)
+    state = {"messages": [HumanMessage(content="hello")]}
+    config = {"configurable": {DEADLINE_KEY: make_deadline(0.01)}}
+
+    result = await respond(state, config)
+
+    assert "タイムアウト" in result["messages"][0].content
@@ -0,0 +1,49 @@
+# tests/unit/test_result_store.py
+# ---------------------------------------------------------
+# ユニットテスト（ツール出力の共有ストア）
+# ---------------------------------------------------------
+from graph.messages import CompactMessage, ToolResult
+from graph.result_store import ToolResultStore, collect_refs
+from utils.serializers import to_jsonable
+
+OUTPUT = {"top": "Top result for 'テスト'", "items": ["A", "B"]}
+
+
+def test_store_deduplicates_and_evicts_unreferenced_outputs():
+    """
+    同じ出力は1つにまとめ、参照しているスレッドがなくなった時点で削除する
+    """
+    store = ToolResultStore()
+    key = store.put(OUTPUT, "thread-1")
+    assert store.put({"items": ["A", "B"], "top": "Top result for 'テスト'"}, "thread-2") == key
+    assert store.put(OUTPUT, "thread-2") == key
+    assert (len(store), store.refcount(key)) == (1, 2)
+    stats = store.stats()
+    assert stats["references"] == 2 and stats["saved_bytes"] == stats["bytes"]
+
+    assert store.release("thread-1") == 0
+    assert store.get(key) == OUTPUT
+    assert store.release("thread-2") == 1
+    assert store.get(key) is None and len(store) == 0
+
+
+def test_shared_result_keeps_only_reference_and_resolves_at_api_boundary(monkeypatch):
+    """
+    share した ToolResult は参照だけを持ち、to_jsonable で元の出力に戻る
+    """
+    store = ToolResultStore()
+    monkeypatch.setattr("utils.serializers.get_tool_result_store", lambda: store)
+    result = ToolResult(id="tool-1", name="fake_search", input={"q": "テスト"}, output=OUTPUT)
+
+    shared = store.share(result, "thread-1")
+    assert shared.output == {} and shared.ref is not None
+    assert ToolResult.from_dict(shared.to_dict()) == shared
+    message = CompactMessage(type="tool", content=shared, tool_call_id="tool-1")
+    assert collect_refs({"messages": [message], "tool_results": [shared]}) == {shared.ref}
+
+    assert to_jsonable(shared) == to_jsonable(result)
+    assert to_jsonable(message) == to_jsonable(CompactMessage(type="tool", content=result, tool_call_id="tool-1"))
+
+    # 参照先がなくなった場合は参照のまま返す
+    store.release("thread-1")
+    assert to_jsonable(shared)["ref"] == shared.ref
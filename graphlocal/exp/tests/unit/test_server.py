@@ -0,0 +1,57 @@
+# tests/unit/test_server.py
+# ---------------------------------------------------------
+# ユニットテスト（uvicorn の起動プロファイル）
+# ---------------------------------------------------------
+import pytest
+
+import server
+from config import AppSettings
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """SERVER_* を指定していない設定"""
+    for key in ("SERVER_WORKERS", "SERVER_LOOP", "SERVER_HTTP", "SERVER_KEEP_ALIVE", "SERVER_BACKLOG"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("ENVIRONMENT", "development")
+    return AppSettings()
+
+
+def test_development_profile(settings):
+    """
+    development では reload を有効にし、その他は uvicorn の既定値に任せる
+    """
+    options = server.uvicorn_options(settings)
+    assert options["reload"] is True
+    assert "workers" not in options and "loop" not in options
+
+
+@pytest.mark.parametrize("installed", [True, False])
+def test_production_profile(settings, monkeypatch, installed):
+    """
+    production では reload を無効にし、ワーカー数は1（スレッド・ジョブはプロセス内）にし、
+    uvloop / httptools はインストールされている場合のみ使う
+    """
+    monkeypatch.setattr(server, "is_available", lambda module: installed)
+    settings.environment = "production"
+    options = server.uvicorn_options(settings)
+    assert options["reload"] is False
+    assert options["workers"] == 1
+    assert options["timeout_keep_alive"] == server.PRODUCTION_KEEP_ALIVE
+    assert options["backlog"] == server.PRODUCTION_BACKLOG
+    assert (options["loop"], options["http"]) == (("uvloop", "httptools") if installed else ("asyncio", "h11"))
+
+
+def test_server_overrides(settings, monkeypatch):
+    """
+    SERVER_* の指定はプロファイルの値より優先する（reload と複数ワーカーは併用しない）
+    """
+    monkeypatch.setenv("SERVER_WORKERS", "2")
+    monkeypatch.setenv("SERVER_KEEP_ALIVE", "30")
+    settings = AppSettings()
+    settings.environment = "production"
+    options = server.uvicorn_options(settings)
+    assert (options["workers"], options["timeout_keep_alive"]) == (2, 30)
+
+    settings.environment = "development"
+    assert "workers" not in server.uvicorn_options(settings)
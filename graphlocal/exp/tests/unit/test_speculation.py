@@ -0,0 +1,124 @@
+# tests/unit/test_speculation.py
+# ---------------------------------------------------------
+# ユニットテスト（応答ノードの投機実行）
+# ---------------------------------------------------------
+import asyncio
+import inspect
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from config import GraphConfig
+from graph.builder import create_graph
+from graph.nodes import create_composer, create_planner
+from graph.result_store import get_tool_result_store
+from graph.speculation import _in_flight
+from utils.metrics import get_metrics
+
+
+async def _invoke(graph, text: str, thread_id: str) -> dict:
+    return await graph.ainvoke(
+        {"messages": [HumanMessage(content=text)], "step": "idle"},
+        config={"configurable": {"thread_id": thread_id}},
+    )
+
+
+@pytest.mark.asyncio
+async def test_speculative_graph_matches_plain_chat_and_tool_path():
+    """
+    応答経路では投機結果を採用し、ツール経路では投機結果を破棄して通常どおりツールを実行する
+    """
+    config = GraphConfig(tool_processing_delay=0.0, response_delay=0.05)
+    graph = create_graph(config, speculative=True)
+    counters = get_metrics().snapshot()["counters"]
+    hits, misses = counters.get("speculation.hit", 0), counters.get("speculation.miss", 0)
+
+    chat = await _invoke(graph, "こんにちは", "spec-1")
+    assert chat["messages"][-1].content == "Echo: こんにちは"
+    assert chat["speculation"] is None
+    assert not chat.get("tool_results")
+
+    tool = await _invoke(graph, "tool: LangGraph", "spec-2")
+    result = get_tool_result_store().resolve(tool["tool_results"][-1])
+    assert result.output["items"][0] == "LangGraph - A"
+    assert tool["messages"][-1].content.startswith("（ツールを使いました）")
+
+    snapshot = get_metrics().snapshot()
+    assert snapshot["counters"]["speculation.hit"] == hits + 1
+    assert snapshot["counters"]["speculation.miss"] == misses + 1
+    assert "speculation.saved_seconds" in snapshot["histograms"]
+    assert "speculation.wasted_seconds" in snapshot["histograms"]
+    assert not _in_flight
+
+
+@pytest.mark.asyncio
+async def test_planner_cancels_losing_speculation():
+    """
+    ツール経路と判定した場合は投機中の応答生成をキャンセルする
+    """
+    coroutines = []
+
+    async def generate():
+        await asyncio.sleep(10)
+        return "never"
+
+    def speculate(state):
+        coroutines.append(generate())
+        return coroutines[-1]
+
+    planner = create_planner(GraphConfig(), speculate=speculate)
+    update = await planner({"messages": [HumanMessage(content="tool: x")]}, {})
+    assert update == {"step": "tooling"}
+    await asyncio.sleep(0)
+    assert inspect.getcoroutinestate(coroutines[0]) == inspect.CORO_CLOSED
+    assert not _in_flight
+
+    planner = create_planner(GraphConfig(), speculate=create_composer(GraphConfig(response_delay=0.0)))
+    update = await planner({"messages": [HumanMessage(content="hello")]}, {})
+    assert update["step"] == "responding"
+    assert update["speculation"] in _in_flight
+    _in_flight.pop(update["speculation"]).task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_failed_run_discards_unclaimed_speculation():
+    """
+    応答ノードが採用する前に実行が失敗した場合、投機はキャンセルして登録から外す
+    """
+    from langgraph.graph import END, START, StateGraph
+
+    from api.repositories.graph_repository import GraphRepository
+    from graph.state import GraphState
+
+    coroutines = []
+
+    async def generate():
+        await asyncio.sleep(10)
+        return "never"
+
+    def speculate(state):
+        coroutines.append(generate())
+        return coroutines[-1]
+
+    async def boom(state: GraphState):
+        assert state["speculation"] in _in_flight
+        raise RuntimeError("boom")
+
+    builder = StateGraph(GraphState)
+    builder.add_node("planner", create_planner(GraphConfig(), speculate=speculate))
+    builder.add_node("boom", boom)
+    builder.add_edge(START, "planner")
+    builder.add_edge("planner", "boom")
+    builder.add_edge("boom", END)
+    repo = GraphRepository()
+    repo.register("default", builder.compile())
+
+    with pytest.raises(RuntimeError):
+        async for _ in repo.stream_execution(
+            "default", {"messages": [HumanMessage(content="hello")], "step": "idle"}
+        ):
+            pass
+
+    await asyncio.sleep(0)
+    assert inspect.getcoroutinestate(coroutines[0]) == inspect.CORO_CLOSED
+    assert not _in_flight
@@ -0,0 +1,84 @@
+# tests/unit/test_stream_tracker.py
+# ---------------------------------------------------------
+# ユニットテスト（実行中ストリームのドレインとスレッドの書き出し）
+# ---------------------------------------------------------
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from api.repositories.graph_repository import GraphRepository
+from api.services.chat_service import ChatService
+from api.services.stream_tracker import ServiceDraining, StreamTracker
+from api.services.thread_service import ThreadService
+from api.models import ChatRequest
+from tests.fixtures.mock_graph import create_mock_graph
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_then_kills_overdue_streams():
+    """
+    期限内に終わったストリームはドレイン、期限を過ぎたストリームは中断として数える
+    """
+    tracker = StreamTracker()
+
+    async def stream(seconds):
+        with tracker.track():
+            await asyncio.sleep(seconds)
+
+    tasks = [asyncio.create_task(stream(0.05)), asyncio.create_task(stream(10))]
+    await asyncio.sleep(0)
+    assert tracker.active == 2
+
+    result = await tracker.drain(timeout=0.2)
+    assert (result.drained, result.killed) == (1, 1)
+    assert tasks[1].cancelled()
+    with pytest.raises(ServiceDraining):
+        with tracker.track():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_killed_chat_stream_reports_shutdown(tmp_path):
+    """
+    中断されたチャットはエラーイベントで終わり、スレッドは書き出し・読み込みで引き継げる
+    """
+    repo = GraphRepository()
+    repo.register("default", create_mock_graph())
+    tracker = StreamTracker()
+    service = ChatService(repo, tracker=tracker)
+
+    async def slow_stream(*args, **kwargs):
+        yield ((), "updates", {"planner": {"step": "responding"}})
+        await asyncio.sleep(10)
+        yield ((), "updates", {})
+
+    repo.stream_execution = slow_stream
+    events = []
+
+    async def consume():
+        async for event in service.stream_events(ChatRequest(input="hi", thread_id="t1")):
+            events.append(event)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.05)
+    result = await tracker.drain(timeout=0.05)
+    await task
+    assert result.killed == 1
+    assert events[-1]["ch"] == "error"
+    assert not service.accepting
+
+    # スナップショットの書き出し・読み込み
+    graph = repo.get("default")
+    await graph.ainvoke(
+        {"messages": [HumanMessage(content="hi")], "step": "idle"},
+        config={"configurable": {"thread_id": "saved"}},
+    )
+    saved = await ThreadService(repo).save_snapshot(str(tmp_path))
+    assert saved == {"default": 1}
+
+    other = GraphRepository()
+    other.register("default", create_mock_graph())
+    assert await ThreadService(other).restore_snapshot(str(tmp_path)) == {"default": 1}
+    assert await other.get_thread_state("default", "saved") is not None
+    assert not (tmp_path / "default.ndjson").exists()
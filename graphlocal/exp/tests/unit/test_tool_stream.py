@@ -0,0 +1,127 @@
+# tests/unit/test_tool_stream.py
+# ---------------------------------------------------------
+# ユニットテスト（ストリーミングツールと応答ノードの並行実行）
+# ---------------------------------------------------------
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from config import GraphConfig
+from graph.builder import create_graph
+from graph.result_store import get_tool_result_store
+
+
+async def _run(config: GraphConfig, text: str):
+    """グラフを実行し、(経過時間, custom イベント, 応答ノードの更新より前の custom イベント数, 最終状態) を返す"""
+    graph = create_graph(config)
+    run_config = {"configurable": {"thread_id": f"stream-{time.monotonic_ns()}"}}
+    custom = []
+    before_respond = None
+    started = time.monotonic()
+    async for mode, data in graph.astream(
+        {"messages": [HumanMessage(content=text)], "step": "idle"},
+        stream_mode=["updates", "custom"],
+        config=run_config,
+    ):
+        if mode == "custom":
+            custom.append(data)
+        elif "respond" in data:
+            before_respond = len(custom)
+    elapsed = time.monotonic() - started
+    state = await graph.aget_state(run_config)
+    return elapsed, custom, before_respond, state.values
+
+
+@pytest.mark.asyncio
+async def test_responder_overlaps_streaming_tool():
+    """
+    部分結果は custom ストリームに流れ、応答はツールの完了を待たずに始まる
+    """
+    config = GraphConfig(tool_streaming=True, tool_processing_delay=0.3, response_delay=0.2)
+    elapsed, custom, before_respond, values = await _run(config, "tool: LangGraph")
+
+    assert [event["item"] for event in custom] == ["LangGraph - A", "LangGraph - B", "LangGraph - C"]
+    assert before_respond == 3
+    # 逐次実行なら 0.3 + 0.2 秒かかる
+    assert elapsed < 0.45
+
+    # スレッドの状態には共有ストアの参照だけが残る
+    result = get_tool_result_store().resolve(values["tool_results"][-1])
+    assert result.output["items"] == ["LangGraph - A", "LangGraph - B", "LangGraph - C"]
+    assert not result.degraded
+    assert values["tool_stream"] is None
+    # 非ストリーミングの場合と同じく、応答の前にツールメッセージが残る
+    assert [m.type for m in values["messages"]] == ["tool", "ai"]
+    assert values["messages"][-1].content.startswith("（ツールを使いました）")
+
+
+@pytest.mark.asyncio
+async def test_streaming_tool_timeout_keeps_partial_items():
+    """
+    ストリーミング中にタイムアウトした場合は届いた分の部分結果で縮退する
+    """
+    config = GraphConfig(tool_streaming=True, tool_processing_delay=0.3, response_delay=0.0, tool_timeout=0.15)
+    _, custom, _, values = await _run(config, "tool: LangGraph")
+
+    result = get_tool_result_store().resolve(values["tool_results"][-1])
+    assert result.degraded
+    assert result.output["items"] == ["LangGraph - A"]
+    assert [event["item"] for event in custom] == ["LangGraph - A"]
+    assert values["messages"][-1].content.startswith("（ツールが利用できませんでした）")
+
+
+@pytest.mark.asyncio
+async def test_respond_timeout_records_degraded_stream_result():
+    """
+    応答ノードがタイムアウトした場合も、届いた分の部分結果で縮退した結果とツールメッセージを残し、
+    tool_stream を空にする
+    """
+    config = GraphConfig(tool_streaming=True, tool_processing_delay=0.6, response_delay=0.0, respond_timeout=0.3)
+    _, _, _, values = await _run(config, "tool: LangGraph")
+
+    assert values["tool_stream"] is None
+    assert [m.type for m in values["messages"]] == ["tool", "ai"]
+    assert values["messages"][-1].content == "エラー: 応答がタイムアウトしました"
+    result = get_tool_result_store().resolve(values["tool_results"][-1])
+    assert result.degraded
+    assert result.output["items"] == ["LangGraph - A"]
+
+@pytest.mark.asyncio
+async def test_failed_run_cancels_unclaimed_stream():
+    """
+    応答ノードが受け取る前に実行が失敗した場合、ストリームは中断して登録から外す
+    """
+    from langgraph.graph import END, START, StateGraph
+
+    from api.repositories.graph_repository import GraphRepository
+    from graph import tool_stream
+    from graph.nodes import create_call_tool
+    from graph.state import GraphState
+
+    registered = []
+
+    async def boom(state: GraphState):
+        registered.extend(tool_stream._in_flight.values())
+        raise RuntimeError("boom")
+
+    builder = StateGraph(GraphState)
+    builder.add_node("call_tool", create_call_tool(GraphConfig(tool_streaming=True, tool_processing_delay=5.0)))
+    builder.add_node("boom", boom)
+    builder.add_edge(START, "call_tool")
+    builder.add_edge("call_tool", "boom")
+    builder.add_edge("boom", END)
+    repo = GraphRepository()
+    repo.register("default", builder.compile())
+
+    with pytest.raises(RuntimeError):
+        async for _ in repo.stream_execution(
+            "default", {"messages": [HumanMessage(content="tool: LangGraph")], "step": "idle"}
+        ):
+            pass
+
+    assert len(registered) == 1
+    assert not tool_stream._in_flight
+    with pytest.raises(asyncio.CancelledError):
+        await registered[0].wait()
@@ -0,0 +1,231 @@
+# utils/loop_lag.py
+# ---------------------------------------------------------
+# イベントループの遅延（ラグ）の計測と、ループをブロックしたコールバックの特定
+# ---------------------------------------------------------
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from utils import stacks
+from utils.metrics import MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    イベントループの遅延を一定間隔で計測する
+
+    interval 秒の sleep が実際に何秒遅れて戻ったかを遅延とする。ノードやシリアライザが
+    ループをブロックすると、その間のすべてのストリームがこの分だけ遅れる。
+    直近 window 回の計測値を保持し、最大値をレディネスの判定に使う。
+    """
+
+    def __init__(self, interval: float = 0.25, window: int = 20, metrics: Optional[MetricsRegistry] = None):
+        """
+        初期化
+
+        Args:
+            interval: 計測間隔（秒）
+            window: 最大値を求める直近の計測回数
+            metrics: 計測値の記録先（Noneの場合はデフォルトレジストリ）
+        """
+        self.interval = interval
+        self.metrics = metrics or get_metrics()
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.metrics.set_gauge("loop.lag", lambda: self.lag)
+        self.metrics.set_gauge("loop.lag.max", lambda: self.max_lag)
+
+    @property
+    def running(self) -> bool:
+        """計測中か"""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def lag(self) -> float:
+        """直近の遅延（秒、計測前は0）"""
+        return self._samples[-1] if self._samples else 0.0
+
+    @property
+    def max_lag(self) -> float:
+        """直近 window 回の遅延の最大値（秒）"""
+        return max(self._samples, default=0.0)
+
+    def start(self) -> None:
+        """実行中のイベントループで計測を始める"""
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """計測を止める"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def record(self, lag: float) -> None:
+        """遅延を記録"""
+        self._samples.append(lag)
+        self.metrics.observe("loop.lag", lag)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - started - self.interval))
+
+
+@dataclass
+class SlowCallback:
+    """イベントループをブロックしたコールバック"""
+    # 検出した時刻（UNIX時刻）と、ループが止まっていた秒数
+    detected_at: float
+    duration: float
+    # 実行中だったコルーチン（<モジュール>:<修飾名>、グラフのノードなど）と、アプリケーションの実行位置
+    coroutine: Optional[str]
+    location: Optional[str]
+    # デバッグモードのみ: 最初のサンプルのスタックと、collapsed 形式のスタックごとのサンプル数
+    stack: Optional[str] = None
+    samples: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換（デバッグモードの項目は記録した場合のみ含める）"""
+        data: Dict[str, Any] = {
+            "detected_at": self.detected_at,
+            "duration": round(self.duration, 6),
+            "coroutine": self.coroutine,
+            "location": self.location,
+        }
+        if self.stack is not None:
+            data["stack"] = self.stack
+        if self.samples:
+            data["samples"] = dict(self.samples)
+        return data
+
+
+class SlowCallbackDetector:
+    """
+    イベントループをブロックしているコールバックを別スレッドから特定する
+
+    監視スレッドが check_interval ごとに call_soon_threadsafe でループに応答を求め、threshold 秒
+    以内に応答がなければ、ループのスレッドのスタックを sys._current_frames() で取得して実行中の
+    コルーチン（ノード関数など）を記録する。応答が返ったら、待った秒数とともにログ・メトリクス・
+    直近の履歴に残す。debug の場合は、止まっている間のスタックをサンプリングしてログに出す。
+    LoopLagMonitor の sleep による計測と違い、計測間隔と重なったブロックも取りこぼさない。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        debug: bool = False,
+        history: int = 100,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            threshold: 遅いとみなす秒数
+            debug: 止まっている間のスタックをサンプリングしてログに出す
+            history: 保持する直近の件数
+            metrics: 件数・秒数の記録先（Noneの場合はデフォルトレジストリ）
+        """
+        self.threshold = threshold
+        self.debug = debug
+        self.metrics = metrics or get_metrics()
+        # 応答を求める間隔と、止まっている間のサンプリングの間隔
+        self.check_interval = min(0.05, threshold / 2)
+        self._history: Deque[SlowCallback] = deque(maxlen=history)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        """監視中か"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """実行中のイベントループの監視を始める（ループのスレッドから呼ぶ）"""
+        if self.running or self.threshold <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="slow-callback-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """監視スレッドを止める"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def recent(self, limit: Optional[int] = None) -> List[SlowCallback]:
+        """直近の遅いコールバック（新しい順）"""
+        items = list(reversed(self._history))
+        return items[:limit] if limit is not None else items
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            answered = threading.Event()
+            sent = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                # ループが閉じた
+                return
+            if answered.wait(self.threshold):
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            slow = self._describe(frame)
+            samples: Counter = Counter()
+            while True:
+                if self.debug and frame is not None:
+                    samples[stacks.collapse(frame)] += 1
+                del frame
+                if answered.wait(self.check_interval) or self._stop.is_set():
+                    break
+                frame = sys._current_frames().get(self._loop_thread)
+            slow.duration = time.monotonic() - sent
+            slow.samples = dict(samples)
+            self._finish(slow)
+
+    def _describe(self, frame: Any) -> SlowCallback:
+        """ループのスレッドで実行中のフレームから、ブロックしているコルーチンと実行位置を求める"""
+        coroutine = stacks.innermost_coroutine(frame)
+        location = stacks.innermost_app_frame(frame)
+        return SlowCallback(
+            detected_at=time.time(),
+            duration=0.0,
+            coroutine=stacks.frame_name(coroutine) if coroutine is not None else None,
+            location=stacks.frame_location(location) if location is not None else None,
+            stack="".join(traceback.format_stack(frame)) if self.debug and frame is not None else None,
+        )
+
+    def _finish(self, slow: SlowCallback) -> None:
+        """ログ・メトリクス・履歴に記録"""
+        self._history.append(slow)
+        self.metrics.inc("loop.slow_callbacks")
+        self.metrics.observe("loop.slow_callback", slow.duration)
+        logger.warning(
+            f"Event loop blocked for {slow.duration:.3f}s by {slow.coroutine or '?'} at {slow.location or '?'}"
+        )
+        if self.debug:
+            top = sorted(slow.samples.items(), key=lambda item: item[1], reverse=True)[:5]
+            lines = "\n".join(f"{count:>4} {stack}" for stack, count in top)
+            logger.warning(f"Stack when the loop was blocked:\n{slow.stack}Stack samples:\n{lines}")
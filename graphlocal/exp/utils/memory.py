@@ -0,0 +1,92 @@
+# utils/memory.py
+# ---------------------------------------------------------
+# メモリ割り当ての追跡（tracemallocのスナップショット差分）
+# ---------------------------------------------------------
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+
+class AllocationTracker:
+    """
+    tracemalloc のスナップショットを取り、前回からの差分を返す
+
+    トレース中はメモリ割り当てごとにオーバーヘッドがかかるため、必要なときだけ開始する。
+    """
+
+    def __init__(self, frames: int = 1):
+        """
+        初期化
+
+        Args:
+            frames: 割り当て元として記録するスタックフレーム数
+        """
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        """トレース中か"""
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """トレースを開始し、差分の基準となるスナップショットを取る"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._baseline = self._take()
+
+    def stop(self) -> None:
+        """トレースを停止"""
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def diff(self, top: int = 10) -> Dict[str, Any]:
+        """
+        前回のスナップショットからの差分を返し、今回のスナップショットを次の基準にする
+
+        トレースしていない場合は開始して、空の差分を返す。
+
+        Returns:
+            {"traced_bytes", "peak_bytes", "top": 割り当て元ごとの増減}
+        """
+        if not tracemalloc.is_tracing() or self._baseline is None:
+            self.start()
+            return {**self._traced(), "started": True, "top": []}
+        snapshot = self._take()
+        stats = snapshot.compare_to(self._baseline, "lineno")
+        self._baseline = snapshot
+        top_stats: List[Dict[str, Any]] = [
+            {
+                "location": str(stat.traceback[0]) if stat.traceback else "?",
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+            for stat in stats[:top]
+        ]
+        return {**self._traced(), "started": False, "top": top_stats}
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+
+    @staticmethod
+    def _traced() -> Dict[str, int]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {"traced_bytes": current, "peak_bytes": peak}
+
+
+# プロセス全体で共有するデフォルトのトラッカー
+_default_tracker = AllocationTracker()
+
+
+def get_allocation_tracker() -> AllocationTracker:
+    """デフォルトの割り当てトラッカーを取得"""
+    return _default_tracker
@@ -0,0 +1,105 @@
+# utils/metrics.py
+# ---------------------------------------------------------
+# プロセス内メトリクス（カウンター・ゲージ・レイテンシ分布）
+# ---------------------------------------------------------
+import math
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Union
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """ソート済みサンプルのパーセンタイル（0〜100、nearest-rank法）"""
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class LatencyHistogram:
+    """直近のサンプルからパーセンタイルを算出するレイテンシ分布"""
+
+    def __init__(self, max_samples: int = 2048):
+        """
+        初期化
+
+        Args:
+            max_samples: パーセンタイル計算に使う直近のサンプル数
+        """
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """サンプルを記録（秒）"""
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> float:
+        """直近のサンプルのパーセンタイル（0〜100）を返す（サンプルがない場合は0）"""
+        if not self._samples:
+            return 0.0
+        return _percentile(sorted(self._samples), q)
+
+    def snapshot(self) -> Dict[str, float]:
+        """集計値を返す"""
+        if not self._samples:
+            return {"count": self.count, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(self._samples)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": _percentile(ordered, 50),
+            "p95": _percentile(ordered, 95),
+            "p99": _percentile(ordered, 99),
+            "max": ordered[-1],
+        }
+
+
+class MetricsRegistry:
+    """メトリクスのレジストリ（/metrics エンドポイントで公開する）"""
+
+    def __init__(self):
+        """初期化"""
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Union[float, Callable[[], Any]]] = {}
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """カウンターを加算"""
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: Union[float, Callable[[], Any]]) -> None:
+        """ゲージを設定（呼び出し可能オブジェクトを渡すとスナップショット時に評価する）"""
+        self._gauges[name] = value
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        """レイテンシ分布を取得（なければ作成）"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = LatencyHistogram()
+        return histogram
+
+    def observe(self, name: str, value: float) -> None:
+        """レイテンシ分布にサンプルを記録"""
+        self.histogram(name).observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """全メトリクスの現在値を返す"""
+        return {
+            "counters": dict(self._counters),
+            "gauges": {name: value() if callable(value) else value for name, value in self._gauges.items()},
+            "histograms": {name: histogram.snapshot() for name, histogram in self._histograms.items()},
+        }
+
+    def reset(self) -> None:
+        """全メトリクスを削除（テスト用）"""
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+
+# プロセス全体で共有するデフォルトレジストリ
+_default_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """デフォルトのメトリクスレジストリを取得"""
+    return _default_registry
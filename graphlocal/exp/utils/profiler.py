@@ -0,0 +1,135 @@
+# utils/profiler.py
+# ---------------------------------------------------------
+# サンプリングCPUプロファイラー（flamegraph の collapsed 形式で出力）
+# ---------------------------------------------------------
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Dict, Iterable, List, Optional
+
+from utils import stacks
+
+# 待機中のスレッド（セレクター・ロック・キューの待ち）とみなす、最も内側のフレームの関数名
+_IDLE_FUNCTIONS = frozenset({"select", "poll", "wait", "_wait_for_tstate_lock"})
+
+
+@dataclass
+class Profile:
+    """サンプリングの結果"""
+    # 開始時刻（UNIX時刻）、サンプリングした秒数と間隔
+    started_at: float
+    seconds: float
+    interval: float
+    # サンプリングした回数（スレッドごとではなく、1回の sys._current_frames() を1と数える）
+    ticks: int = 0
+    # collapsed 形式のスタックごとのサンプル数
+    samples: Counter = field(default_factory=Counter)
+    # 対象外（roots を含まない・待機中）として捨てたスタックの数
+    dropped: int = 0
+
+    @property
+    def total(self) -> int:
+        """記録したサンプル数"""
+        return sum(self.samples.values())
+
+    def to_collapsed(self) -> str:
+        """flamegraph.pl / speedscope で読める collapsed 形式（1行に「スタック サンプル数」、多い順）"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class SamplingProfiler:
+    """
+    別スレッドから一定間隔で全スレッドのスタックを取得するサンプリングプロファイラー
+
+    sys._current_frames() を読むだけなので、プロファイル中も計測対象のコードには手を入れない。
+    roots を指定した場合は、そのいずれかのコードを実行中のスタックだけを残し、最も外側の root の
+    フレームから下を記録する（グラフのノードはタスクとして実行されるため、呼び出し元の
+    ストリーミングとは別のスタックになる）。
+    """
+
+    def __init__(self, interval: float = 0.01, roots: Iterable[CodeType] = (), idle: bool = False):
+        """
+        初期化
+
+        Args:
+            interval: サンプリング間隔（秒）
+            roots: 記録するスタックの起点とするコード（空の場合はすべてのスタックを記録）
+            idle: 待機中のスレッドのスタックも記録する
+        """
+        self.interval = interval
+        self.roots = frozenset(roots)
+        self.idle = idle
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._profile: Optional[Profile] = None
+
+    @property
+    def running(self) -> bool:
+        """サンプリング中か"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        サンプリングを始める
+
+        Raises:
+            RuntimeError: すでにサンプリング中の場合
+        """
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self._profile = Profile(started_at=time.time(), seconds=0.0, interval=self.interval)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        """サンプリングを止めて結果を返す"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        profile = self._profile or Profile(started_at=time.time(), seconds=0.0, interval=self.interval)
+        self._profile = None
+        return profile
+
+    def sample(self, frames: Dict[int, FrameType], profile: Profile) -> None:
+        """1回分のスタック（スレッドIDとフレームの対応）を profile に加える"""
+        profile.ticks += 1
+        for frame in frames.values():
+            stack = self._collapse(stacks.walk(frame))
+            if stack is None:
+                profile.dropped += 1
+            else:
+                profile.samples[stack] += 1
+
+    def _collapse(self, frames: List[FrameType]) -> Optional[str]:
+        """対象のスタックであれば collapsed 形式の1行分を返す（対象外の場合はNone）"""
+        if not frames:
+            return None
+        innermost = frames[-1]
+        if (
+            not self.idle
+            and innermost.f_code.co_name in _IDLE_FUNCTIONS
+            and stacks.is_library(innermost.f_code.co_filename)
+        ):
+            return None
+        if self.roots:
+            start = next((i for i, frame in enumerate(frames) if frame.f_code in self.roots), None)
+            if start is None:
+                return None
+            frames = frames[start:]
+        return ";".join(stacks.frame_name(frame) for frame in frames)
+
+    def _run(self) -> None:
+        profile = self._profile
+        own = threading.get_ident()
+        started = time.monotonic()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            frames.pop(own, None)
+            self.sample(frames, profile)
+            del frames
+        profile.seconds = time.monotonic() - started
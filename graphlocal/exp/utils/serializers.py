@@ -3,13 +3,30 @@
 # JSONシリアライゼーション関数
 # ---------------------------------------------------------
 import json
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
+from graph.messages import MESSAGE_CLASS_NAMES, MESSAGE_ROLES, CompactMessage, ToolResult, to_compact_message
+from graph.result_store import get_tool_result_store
 
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
 
-def get_message_role(m: BaseMessage) -> str:
+# langchain_core のメッセージクラス（初回利用時に読み込む）
+_message_types: tuple | None = None
+
+
+def _get_message_types() -> tuple:
+    """(BaseMessage, HumanMessage, AIMessage, ToolMessage) を遅延インポートして返す"""
+    global _message_types
+    if _message_types is None:
+        from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
+        _message_types = (BaseMessage, HumanMessage, AIMessage, ToolMessage)
+    return _message_types
+
+
+def get_message_role(m: "BaseMessage") -> str:
     """メッセージのロールを取得"""
+    _, HumanMessage, AIMessage, ToolMessage = _get_message_types()
     if isinstance(m, HumanMessage): 
         return "user"
     if isinstance(m, AIMessage): 
@@ -20,14 +37,37 @@ def get_message_role(m: BaseMessage) -> str:
 
 
 def to_jsonable(obj: Any) -> Any:
-    """オブジェクトをJSONシリアライズ可能な形式に変換"""
-    if isinstance(obj, BaseMessage):
+    """
+    オブジェクトをJSONシリアライズ可能な形式に変換
+
+    共有ストアに移したツールの出力（ToolResult.ref）はここで出力に戻す。
+    """
+    if isinstance(obj, CompactMessage):
+        # LangChainのメッセージと同じ形式に戻す（ツール結果はJSON文字列に戻す）
+        content = obj.content
+        if isinstance(content, ToolResult):
+            content = json.dumps(get_tool_result_store().resolve(content).to_dict(), ensure_ascii=False)
+        data = {
+            "type": MESSAGE_CLASS_NAMES.get(obj.type, obj.type),
+            "role": MESSAGE_ROLES.get(obj.type, "system"),
+            "content": content
+        }
+        if obj.blob is not None:
+            # 全文は GET /blobs/{blob} で取得する
+            data["blob"] = obj.blob
+        return data
+    if isinstance(obj, ToolResult):
+        return to_jsonable(get_tool_result_store().resolve(obj).to_dict())
+    if isinstance(obj, _get_message_types()[3]):
+        # ツール結果の content が参照を含む場合があるので、コンパクト表現を経由する
+        return to_jsonable(to_compact_message(obj))
+    if isinstance(obj, _get_message_types()[0]):
         return {
             "type": obj.__class__.__name__, 
             "role": get_message_role(obj), 
             "content": obj.content
         }
-    if isinstance(obj, list): 
+    if isinstance(obj, (list, tuple)): 
         return [to_jsonable(x) for x in obj]
     if isinstance(obj, dict): 
         return {k: to_jsonable(v) for k, v in obj.items()}
@@ -36,7 +76,7 @@ def to_jsonable(obj: Any) -> Any:
 
 def json_serializer(o: Any) -> Any:
     """JSONシリアライゼーション用のカスタムエンコーダー"""
-    if isinstance(o, BaseMessage):
+    if isinstance(o, (CompactMessage, ToolResult, _get_message_types()[0])):
         return to_jsonable(o)
     # BaseMessage以外のオブジェクトの処理
     if hasattr(o, "__dict__"):
@@ -0,0 +1,74 @@
+# utils/stacks.py
+# ---------------------------------------------------------
+# スタックフレームの整形（遅いコールバックの特定・サンプリングプロファイラーで共有）
+# ---------------------------------------------------------
+import inspect
+import os
+import sysconfig
+from types import FrameType
+from typing import List, Optional
+
+# 標準ライブラリ・インストール済みパッケージのディレクトリ（アプリケーションのコードと区別する）
+_LIBRARY_PATHS = tuple(
+    os.path.normcase(os.path.realpath(path)) + os.sep
+    for path in {sysconfig.get_paths()[name] for name in ("stdlib", "platstdlib", "purelib", "platlib")}
+)
+_ASYNC_FLAGS = inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def is_library(filename: str) -> bool:
+    """標準ライブラリ・インストール済みパッケージのファイルか"""
+    if filename.startswith("<"):
+        return True
+    return os.path.normcase(os.path.realpath(filename)).startswith(_LIBRARY_PATHS)
+
+
+def short_path(filename: str) -> str:
+    """アプリケーションのファイルはルートからの相対パス、それ以外はファイル名だけにする"""
+    if filename.startswith(_ROOT + os.sep):
+        return os.path.relpath(filename, _ROOT)
+    return os.path.basename(filename)
+
+
+def frame_name(frame: FrameType) -> str:
+    """フレームの関数名（<モジュール>:<修飾名>）"""
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def frame_location(frame: FrameType) -> str:
+    """フレームの実行位置（<ファイル>:<行> <関数名>）"""
+    return f"{short_path(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def walk(frame: Optional[FrameType]) -> List[FrameType]:
+    """フレームを外側（呼び出し元）から順に並べる"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def innermost_coroutine(frame: Optional[FrameType]) -> Optional[FrameType]:
+    """実行中のフレームから外側にたどって、最初のコルーチン（async def）のアプリケーションのフレーム"""
+    while frame is not None:
+        if frame.f_code.co_flags & _ASYNC_FLAGS and not is_library(frame.f_code.co_filename):
+            return frame
+        frame = frame.f_back
+    return None
+
+
+def innermost_app_frame(frame: Optional[FrameType]) -> Optional[FrameType]:
+    """実行中のフレームから外側にたどって、最初のアプリケーションのフレーム"""
+    while frame is not None:
+        if not is_library(frame.f_code.co_filename):
+            return frame
+        frame = frame.f_back
+    return None
+
+
+def collapse(frame: Optional[FrameType]) -> str:
+    """flamegraph.pl の collapsed 形式（外側から ; で連結）の1行分"""
+    return ";".join(frame_name(f) for f in walk(frame))